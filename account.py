@@ -0,0 +1,85 @@
+from collections.abc import MutableMapping
+
+# Record fields in the order read_old_bank_accounts has always produced them.
+FIELDS = ('account_number', 'name', 'status', 'balance', 'total_transactions', 'plan')
+# Optional field set by login() on the copy it returns.
+OPTIONAL_FIELDS = ('account_type',)
+_KNOWN_FIELDS = frozenset(FIELDS + OPTIONAL_FIELDS)
+
+
+class Account(MutableMapping):
+    """
+    Compact account record.
+
+    The fields live in __slots__ instead of a per-record dict, which keeps a
+    record several times smaller when the whole accounts file is loaded.
+    The record still behaves like the dict it replaces: acc['balance'],
+    acc.get(), 'plan' in acc, dict(acc), update() and == against a dict all
+    work, and repr() prints the same text as the equivalent dict. Only the
+    known fields can be set; an unset field is simply missing.
+    """
+
+    __slots__ = FIELDS + OPTIONAL_FIELDS
+
+    def __init__(self, account_number, name, status='A', balance=0, total_transactions=0, plan='NP',
+                 **optional):
+        self.account_number = account_number
+        self.name = name
+        self.status = status
+        self.balance = balance
+        self.total_transactions = total_transactions
+        self.plan = plan
+        for key, value in optional.items():
+            self[key] = value
+
+    @classmethod
+    def from_mapping(cls, mapping) -> "Account":
+        """Builds a record from a dict with at least account_number and name."""
+        record = cls(mapping['account_number'], mapping['name'])
+        for key, value in mapping.items():
+            record[key] = value
+        return record
+
+    def __getitem__(self, key):
+        if key in _KNOWN_FIELDS:
+            try:
+                return getattr(self, key)
+            except AttributeError:
+                pass
+        raise KeyError(key)
+
+    def __setitem__(self, key, value):
+        if key not in _KNOWN_FIELDS:
+            raise KeyError(f"Account records have no field '{key}'")
+        setattr(self, key, value)
+
+    def __delitem__(self, key):
+        if key not in _KNOWN_FIELDS:
+            raise KeyError(key)
+        try:
+            delattr(self, key)
+        except AttributeError:
+            raise KeyError(key) from None
+
+    def __iter__(self):
+        for key in self.__slots__:
+            if hasattr(self, key):
+                yield key
+
+    def __len__(self):
+        return sum(1 for _ in self)
+
+    def __contains__(self, key):
+        return key in _KNOWN_FIELDS and hasattr(self, key)
+
+    def copy(self) -> "Account":
+        return Account.from_mapping(self)
+
+    def to_dict(self) -> dict:
+        return dict(self.items())
+
+    def __repr__(self):
+        return repr(self.to_dict())
+
+    def __reduce__(self):
+        return (Account.from_mapping, (self.to_dict(),))
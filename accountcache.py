@@ -0,0 +1,89 @@
+import hashlib
+import os
+import pickle
+import instrumentation
+from account import Account, FIELDS
+from read import read_old_bank_accounts
+
+CACHE_SUFFIX = ".cache"
+CACHE_VERSION = 1
+
+
+def cache_path(file_path: str) -> str:
+    return file_path + CACHE_SUFFIX
+
+
+def _file_digest(file_path: str) -> str:
+    with open(file_path, 'rb') as file:
+        return hashlib.sha256(file.read()).hexdigest()
+
+
+def _line_count(file_path: str) -> int:
+    with open(file_path, 'rb') as file:
+        return sum(1 for _ in file)
+
+
+def invalidate(file_path: str) -> None:
+    """Removes the cached snapshot of an accounts file, if there is one."""
+    try:
+        os.remove(cache_path(file_path))
+    except FileNotFoundError:
+        pass
+
+
+def _load(file_path: str, stat):
+    try:
+        with open(cache_path(file_path), 'rb') as file:
+            snapshot = pickle.load(file)
+    except (OSError, EOFError, pickle.UnpicklingError, AttributeError, ImportError, ValueError):
+        return None
+    if not isinstance(snapshot, dict) or snapshot.get('version') != CACHE_VERSION:
+        return None
+    if (snapshot['size'], snapshot['mtime_ns']) == (stat.st_size, stat.st_mtime_ns):
+        return snapshot
+    # Same size but a new mtime (touched, or rewritten with the same content):
+    # the content hash decides, and a match refreshes the stored mtime.
+    if snapshot['size'] == stat.st_size and snapshot['sha256'] == _file_digest(file_path):
+        snapshot['mtime_ns'] = stat.st_mtime_ns
+        _save(file_path, snapshot)
+        return snapshot
+    return None
+
+
+def _save(file_path: str, snapshot: dict) -> None:
+    path = cache_path(file_path)
+    temp_path = f"{path}.{os.getpid()}.tmp"
+    with open(temp_path, 'wb') as file:
+        pickle.dump(snapshot, file, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(temp_path, path)
+
+
+@instrumentation.instrumented
+def read_accounts(file_path: str, reader=read_old_bank_accounts) -> list:
+    """
+    Returns what reader(file_path) (read_old_bank_accounts by default) would,
+    from a pickled snapshot in <accounts>.cache when the accounts file still
+    has the size, mtime (or content hash) the snapshot was taken from.
+
+    On a miss the file is parsed by `reader` and the snapshot is saved, but
+    only for a file that validated without errors and did not change while it
+    was parsed, so a cache hit never hides an error message.
+    write_new_current_accounts invalidates the snapshot of the file it writes.
+    """
+    before = os.stat(file_path)
+    snapshot = _load(file_path, before)
+    if snapshot is not None:
+        return [Account(*row) for row in snapshot['rows']]
+
+    accounts = reader(file_path)
+    after = os.stat(file_path)
+    if ((before.st_size, before.st_mtime_ns) == (after.st_size, after.st_mtime_ns)
+            and len(accounts) == _line_count(file_path)):
+        _save(file_path, {
+            'version': CACHE_VERSION,
+            'size': after.st_size,
+            'mtime_ns': after.st_mtime_ns,
+            'sha256': _file_digest(file_path),
+            'rows': [tuple(acc[field] for field in FIELDS) for acc in accounts],
+        })
+    return accounts
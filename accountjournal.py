@@ -0,0 +1,126 @@
+import os
+import accountcache
+from account import Account
+from money import parse_balance_field
+from write import format_account_line, write_new_current_accounts
+
+JOURNAL_SUFFIX = ".journal"
+
+# Journal lines, appended one batch per commit:
+#   P NNNNN AAAAAAAAAAAAAAAAAAAA S PPPPPPPP TTTT PP   put (add or replace) a record
+#   D NNNNN                                          delete a record
+#   C                                                end of a committed batch
+# A batch without its closing "C" line was interrupted and is ignored.
+PUT = "P"
+DELETE = "D"
+COMMIT = "C"
+
+
+def journal_path(file_path: str) -> str:
+    return file_path + JOURNAL_SUFFIX
+
+
+def parse_journal_record(record: str) -> Account:
+    """Parses a 45-character account record written by format_account_line."""
+    return Account(record[0:5].lstrip('0') or '0', record[6:26].strip(), record[27],
+                   parse_balance_field(record[29:37]), int(record[38:42]), record[43:45])
+
+
+class AccountJournal:
+    """
+    Write-ahead journal next to a Current Bank Accounts File.
+
+    Every commit appends the records it changed as one batch and fsyncs the
+    journal, so a commit costs O(changed records) and is durable once
+    append() returns. Readers overlay the journal on the base file with
+    replay(). compact() folds everything into a new base file that is
+    renamed over the old one, then drops the journal; until that rename the
+    old base plus the journal remain the current state.
+    """
+
+    def __init__(self, file_path: str):
+        self.file_path = file_path
+        self.path = journal_path(file_path)
+        self.entries = 0
+        self._file = None
+
+    def replay(self, accounts: dict) -> int:
+        """
+        Applies every committed batch to `accounts` (keyed by normalized
+        account number) and returns the number of entries applied.
+        """
+        self.entries = 0
+        if not os.path.exists(self.path):
+            return 0
+        batch = []
+        offset = committed_size = 0
+        with open(self.path, 'rb') as file:
+            for raw in file:
+                offset += len(raw)
+                try:
+                    line = raw.decode('ascii').rstrip('\n')
+                    if line == COMMIT:
+                        for kind, key, record in batch:
+                            if kind == PUT:
+                                accounts[key] = record
+                            else:
+                                accounts.pop(key, None)
+                        self.entries += len(batch)
+                        batch = []
+                        committed_size = offset
+                    elif line[:2] == PUT + " " and len(line) == 47:
+                        record = parse_journal_record(line[2:])
+                        batch.append((PUT, record['account_number'], record))
+                    elif line[:2] == DELETE + " " and len(line) == 7 and line[2:].isdigit():
+                        batch.append((DELETE, line[2:].lstrip('0') or '0', None))
+                    else:
+                        break
+                except ValueError:
+                    break
+        if committed_size < os.path.getsize(self.path):
+            # Drop the torn tail of an interrupted commit so new batches
+            # are appended right after the last committed one.
+            self.close()
+            os.truncate(self.path, committed_size)
+        return self.entries
+
+    def append(self, puts: list, deletes: list) -> None:
+        """Appends one batch of changed records and deleted account numbers."""
+        if not puts and not deletes:
+            return
+        lines = [f"{PUT} {format_account_line(acc)}" for acc in puts]
+        lines.extend(f"{DELETE} {key.zfill(5)}\n" for key in deletes)
+        lines.append(f"{COMMIT}\n")
+        if self._file is None:
+            self._file = open(self.path, 'a')
+        self._file.write("".join(lines))
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self.entries += len(puts) + len(deletes)
+
+    def compact(self, accounts: list) -> None:
+        """
+        Writes `accounts` as the new base file through a temporary file and an
+        atomic rename, then removes the journal. The parsed snapshot
+        accountcache may hold for the base file is dropped.
+        """
+        self.close()
+        temp_path = f"{self.file_path}.tmp"
+        write_new_current_accounts(accounts, temp_path)
+        with open(temp_path, 'rb') as file:
+            os.fsync(file.fileno())
+        os.replace(temp_path, self.file_path)
+        accountcache.invalidate(self.file_path)
+        self.discard()
+
+    def discard(self) -> None:
+        """Removes the journal file."""
+        self.close()
+        if os.path.exists(self.path):
+            os.remove(self.path)
+        self.entries = 0
+
+    def close(self) -> None:
+        if self._file is not None:
+            self._file.close()
+            self._file = None
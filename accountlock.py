@@ -0,0 +1,85 @@
+import contextlib
+import functools
+import os
+import random
+import time
+
+try:
+    import fcntl
+except ImportError:  # No advisory locks on this platform; generations still apply.
+    fcntl = None
+
+LOCK_SUFFIX = ".lock"
+# Attempts a transaction gets before giving up on a file that keeps changing.
+STALE_RETRIES = 10
+# Upper bound, in seconds, of the random pause before the n-th retry is n times this.
+STALE_BACKOFF = 0.005
+
+
+class StaleSnapshotError(RuntimeError):
+    """The accounts file changed since the snapshot being committed was loaded."""
+
+
+class AccountsFileLock:
+    """
+    Advisory lock and generation stamp shared by every process using one
+    Current Bank Accounts File, kept together in <accounts>.lock.
+
+    The lock is only held for short windows: while a snapshot is loaded
+    (shared) and while a commit checks the generation, writes and bumps it
+    (exclusive). A process whose snapshot's generation is no longer current
+    must reload and redo its transaction instead of overwriting newer data.
+    """
+
+    def __init__(self, file_path: str):
+        self.path = file_path + LOCK_SUFFIX
+        self._file = None
+
+    @contextlib.contextmanager
+    def locked(self, exclusive: bool = True):
+        with open(self.path, 'a+') as file:
+            if fcntl is not None:
+                fcntl.flock(file.fileno(), fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+            self._file = file
+            try:
+                yield self
+            finally:
+                self._file = None
+                if fcntl is not None:
+                    fcntl.flock(file.fileno(), fcntl.LOCK_UN)
+
+    def generation(self) -> int:
+        """Returns the current generation; only valid inside locked()."""
+        self._file.seek(0)
+        text = self._file.read().strip()
+        return int(text) if text.isdigit() else 0
+
+    def bump(self) -> int:
+        """Advances the generation after a commit; only valid inside locked(exclusive=True)."""
+        generation = self.generation() + 1
+        self._file.seek(0)
+        self._file.truncate()
+        self._file.write(f"{generation}\n")
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        return generation
+
+
+def retry_on_stale(method):
+    """
+    Retries a TransactionSystem/AccountManager operation against a freshly
+    loaded store when its commit finds the snapshot stale. The operation
+    only has side effects (session totals, log records) after its commit
+    succeeds, so rerunning it is safe. A short random pause before each
+    retry keeps contending processes from colliding again in lockstep.
+    """
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        for attempt in range(1, STALE_RETRIES + 1):
+            try:
+                return method(self, *args, **kwargs)
+            except StaleSnapshotError:
+                self.store.invalidate()
+                time.sleep(random.uniform(0, STALE_BACKOFF * attempt))
+        return self._fail("Commit", "Accounts file kept changing; transaction not applied")
+    return wrapper
@@ -1,16 +1,23 @@
-from read import read_old_bank_accounts
 from typing import Optional, Tuple
-from write import write_new_current_accounts
 from print_error import log_constraint_error
 from authsystem import login, is_admin
-from transactionlogger import TransactionLogger
+from transactionlogger import LOG_NAME_WIDTH, TransactionLogger
+from accountstore import get_account_store, normalize_account_number
+import instrumentation
+from accountlock import retry_on_stale
+from money import MAX_BALANCE_CENTS, format_account, format_amount, parse_amount
 
 FILE_PATH = "currentaccounts.txt"
+# New account names must fit the transaction log's name field, or the back
+# end would create the account under a truncated name.
+NAME_TOO_LONG = f"Account holder's name exceeds {LOG_NAME_WIDTH} characters."
 
 class AccountManager:
-    def __init__(self):
+    def __init__(self, store=None, logger=None):
         self.new_accounts = set()
-        self.logger = TransactionLogger()
+        self.logger = logger if logger is not None else TransactionLogger()
+        self.store = store if store is not None else get_account_store(FILE_PATH)
+        self.last_error = None
 
     def log_transaction(self, transaction_type, description):
         print(f"SUCCESS: {transaction_type}: {description}")
@@ -18,188 +25,310 @@ class AccountManager:
     def get_admin_credentials(self) -> Optional[Tuple[str, str]]:
         admin_acc = input("Enter your admin account number: ").strip()
         admin_name = input("Enter your admin account name: ").strip()
-        admin_user = login(admin_acc, admin_name, active_required=True)
-        if admin_user is None or not is_admin(admin_acc):
+        admin_user = login(admin_acc, admin_name, active_required=True, store=self.store)
+        if admin_user is None or not is_admin(admin_acc, self.store):
             log_constraint_error("Admin Authentication", "Invalid admin credentials or account is not an admin.")
             return None
         return admin_acc, admin_name
     
-    def increment_transaction_counter(self, account_number: str, accounts: list) -> None:
-        for acc in accounts:
-            if acc['account_number'] == account_number:
-                acc['total_transactions'] += 1
-                break
+    def increment_transaction_counter(self, account_number: str) -> None:
+        self.store.increment_transactions(account_number)
 
     def create_sample_account(self) -> bool:
-        accounts = read_old_bank_accounts(FILE_PATH)
         created = False
 
         # ensure sample Admin exists
-        if not any(acc["account_number"] == "1" for acc in accounts):
+        if "1" not in self.store:
             sample_admin = {
                 "account_number": "00001",
                 "name":           "Admin",
-                "balance":        10000.00,
+                "balance":        1000000,
                 "account_type":   "admin",
                 "status":         "A",
                 "total_transactions": 0
             }
-            accounts.append(sample_admin)
+            admin_record = self.store.add(sample_admin)
             self.new_accounts.add("00001")
             self.log_transaction("Create Account",
                                  "Sample admin account (00001) created for Admin with balance 10000.00")
-            self.logger.log_transaction("05", "Admin", "00001", 10000.00, "SP")
-            self.increment_transaction_counter("00001", accounts)
+            self.logger.log_transaction("05", "Admin", "00001", 1000000, admin_record["plan"])
+            self.increment_transaction_counter("1")
             created = True
 
         # ensure sample Standard exists
-        if not any(acc["account_number"] == "2" for acc in accounts):
+        if "2" not in self.store:
             sample_standard = {
                 "account_number":      "00002",
                 "name":                "Standard",
-                "balance":             5000.00,
+                "balance":             500000,
                 "account_type":        "basic",
                 "status":              "A",
                 "total_transactions":  0
             }
-            accounts.append(sample_standard)
+            standard_record = self.store.add(sample_standard)
             self.new_accounts.add("00002")
             self.log_transaction("Create Account",
                                  "Sample standard account (00002) created for Standard with balance 5000.00")
-            self.logger.log_transaction("05", "Standard", "00002", 5000.00, "SP")
-            self.increment_transaction_counter("00002", accounts)
+            self.logger.log_transaction("05", "Standard", "00002", 500000, standard_record["plan"])
+            self.increment_transaction_counter("2")
             created = True
 
         if created:
-            write_new_current_accounts(accounts, FILE_PATH)
+            self.store.commit()
         else:
             print("Sample accounts already exist.")
             return True
 
-        accounts_after = read_old_bank_accounts(FILE_PATH)
         print("Accounts after sample account creation:")
-        for acc in accounts_after:
-            print(acc)
+        for acc in self.store.accounts():
+            print(format_account(acc))
         return True
 
+    def _fail(self, context, message) -> bool:
+        log_constraint_error(context, message)
+        self.last_error = f"{context}: {message}"
+        return False
+
+    def _new_account_problem(self, account_number, name, acc_type, balance, taken=()):
+        """
+        Returns why an account cannot be created from these fields, or None:
+        the number must be a string of up to 5 digits, not in the store or in
+        `taken` (normalized numbers), the name must fit the log's name field
+        and the balance must be whole cents between $0.00 and $99999.99.
+        """
+        if not isinstance(account_number, str) or not account_number.isdigit() or len(account_number) > 5:
+            return f"Account number must be up to 5 digits, got '{account_number}'."
+        key = normalize_account_number(account_number)
+        if key in taken or key in self.store:
+            return f"Account number {account_number} already exists."
+        if len(name) > LOG_NAME_WIDTH:
+            return NAME_TOO_LONG
+        if acc_type not in ("admin", "basic"):
+            return "Invalid account type. Must be 'admin' or 'basic'."
+        if not isinstance(balance, int) or not 0 <= balance <= MAX_BALANCE_CENTS:
+            return "Initial balance must be between $0.00 and $99999.99."
+        return None
+
+    # ----- Programmatic operations (admin privileges are checked by the caller) -----
+
+    @instrumentation.instrumented
+    @retry_on_stale
+    def create_new_account(self, account_number: str, name: str, acc_type: str, balance: int) -> bool:
+        """Creates an active account with `balance` cents and logs it with code "05"."""
+        problem = self._new_account_problem(account_number, name, acc_type, balance)
+        if problem is not None:
+            return self._fail("Create Account", problem)
+        key = normalize_account_number(account_number)
+
+        new_account = {
+            "account_number": key,
+            "name": name,
+            "balance": balance,
+            "account_type": acc_type,
+            "status": "A",
+            "total_transactions": 0
+        }
+        record = self.store.add(new_account)
+        self.increment_transaction_counter(key)
+        self.store.commit()
+        self.new_accounts.add(key)
+        self.log_transaction("Create Account", f"Account {account_number} ({acc_type}) created for {name} with balance {format_amount(balance)}.")
+        self.logger.log_transaction("05", name, key, balance, record["plan"])
+        return True
+
+    @instrumentation.instrumented
+    @retry_on_stale
+    def delete_existing_account(self, account_number: str, name: str) -> bool:
+        """Deletes an account whose holder name matches and logs it with code "06"."""
+        key = normalize_account_number(account_number)
+        acc = self.store.get(key)
+        if acc is None:
+            return self._fail("Delete Account", "Target account not found.")
+        if acc["name"] != name:
+            return self._fail("Delete Account", "Target account holder's name does not match.")
+
+        self.store.remove(key)
+        self.store.commit()
+        self.log_transaction("Delete Account", f"Account {account_number} for {name} deleted.")
+        self.logger.log_transaction("06", name, account_number, 0, "SP")
+        return True
+
+    @instrumentation.instrumented
+    @retry_on_stale
+    def disable_existing_account(self, account_number: str, name: str) -> bool:
+        """Disables an active account whose holder name matches and logs it with code "07"."""
+        key = normalize_account_number(account_number)
+        acc = self.store.get(key)
+        if acc is None:
+            return self._fail("Disable Account", "Target account not found.")
+        if acc["name"] != name:
+            return self._fail("Disable Account", "Target account holder's name does not match.")
+        if acc["status"] != "A":
+            return self._fail("Disable Account", "Account is not active and cannot be disabled.")
+
+        self.store.update(key, status="D")
+        self.increment_transaction_counter(key)
+        self.store.commit()
+        self.log_transaction("Disable Account", f"Account {account_number} for {name} disabled.")
+        self.logger.log_transaction("07", name, account_number, 0, "SP")
+        return True
+
+    # ----- Bulk operations (see manifest.read_manifest for the entry dicts) -----
+
+    def _validate_targets(self, context: str, entries, active_required: bool):
+        """
+        Checks that every {"account_number", "name"} entry names a distinct
+        existing account with that holder (and, if asked, still active).
+        Returns the normalized account numbers, or None after reporting every
+        failing entry.
+        """
+        keys = []
+        seen = set()
+        failed = False
+        for index, entry in enumerate(entries, 1):
+            key = normalize_account_number(entry["account_number"])
+            acc = self.store.get(key)
+            if key in seen:
+                problem = f"Account {entry['account_number']} is listed twice."
+            elif acc is None:
+                problem = f"Target account {entry['account_number']} not found."
+            elif acc["name"] != entry["name"]:
+                problem = "Target account holder's name does not match."
+            elif active_required and acc["status"] != "A":
+                problem = f"Account {entry['account_number']} is not active."
+            else:
+                problem = None
+            if problem is not None:
+                self._fail(context, f"Entry {index}: {problem}")
+                failed = True
+            seen.add(key)
+            keys.append(key)
+        return None if failed else keys
+
+    @instrumentation.instrumented
+    @retry_on_stale
+    def create_accounts(self, entries) -> bool:
+        """
+        Creates one active account per {"account_number", "name", "acc_type",
+        "balance"} entry. Every entry is validated first, with account number
+        uniqueness checked against the store and the rest of the batch; if any
+        fails nothing is created. Otherwise all accounts are committed at once
+        and their "05" records are logged as one group.
+        """
+        seen = set()
+        failed = False
+        for index, entry in enumerate(entries, 1):
+            problem = self._new_account_problem(entry["account_number"], entry["name"], entry["acc_type"],
+                                                entry["balance"], seen)
+            if problem is not None:
+                self._fail("Create Accounts", f"Entry {index}: {problem}")
+                failed = True
+            elif isinstance(entry["account_number"], str):
+                seen.add(normalize_account_number(entry["account_number"]))
+        if failed:
+            return False
+
+        records = [self.store.add({"account_number": entry["account_number"], "name": entry["name"],
+                                   "balance": entry["balance"]})
+                   for entry in entries]
+        for record in records:
+            self.increment_transaction_counter(record["account_number"])
+        self.store.commit()
+        self.new_accounts.update(record["account_number"] for record in records)
+        self.log_transaction("Create Accounts", f"{len(entries)} accounts created.")
+        self.logger.log_transactions(("05", entry["name"], entry["account_number"], entry["balance"],
+                                      record["plan"])
+                                     for entry, record in zip(entries, records))
+        return True
+
+    @instrumentation.instrumented
+    @retry_on_stale
+    def disable_accounts(self, entries) -> bool:
+        """
+        Disables every {"account_number", "name"} entry's account, all or
+        nothing (see create_accounts), logging "07" records as one group.
+        """
+        keys = self._validate_targets("Disable Accounts", entries, active_required=True)
+        if keys is None:
+            return False
+        for key in keys:
+            self.store.update(key, status="D")
+            self.increment_transaction_counter(key)
+        self.store.commit()
+        self.log_transaction("Disable Accounts", f"{len(keys)} accounts disabled.")
+        self.logger.log_transactions(("07", entry["name"], entry["account_number"], 0, "SP") for entry in entries)
+        return True
+
+    @instrumentation.instrumented
+    @retry_on_stale
+    def delete_accounts(self, entries) -> bool:
+        """
+        Deletes every {"account_number", "name"} entry's account, all or
+        nothing (see create_accounts), logging "06" records as one group.
+        """
+        keys = self._validate_targets("Delete Accounts", entries, active_required=False)
+        if keys is None:
+            return False
+        for key in keys:
+            self.store.remove(key)
+        self.store.commit()
+        self.log_transaction("Delete Accounts", f"{len(keys)} accounts deleted.")
+        self.logger.log_transactions(("06", entry["name"], entry["account_number"], 0, "SP") for entry in entries)
+        return True
+
+    # ----- Interactive wrappers -----
+
     def create_account(self) -> bool:
         print("=== Create New Bank Account ===")
         if input("Are you logged in as admin? (y/n): ").strip().lower() != 'y':
-            log_constraint_error("Create Account", "Account creation requires admin privileges.")
-            return False
+            return self._fail("Create Account", "Account creation requires admin privileges.")
 
         if self.get_admin_credentials() is None:
             return False
 
-        name = input("Enter the account holder's name (max 20 characters): ").strip()
-        if len(name) > 20:
-            log_constraint_error("Create Account", "Account holder's name exceeds 20 characters.")
-            return False
+        name = input(f"Enter the account holder's name (max {LOG_NAME_WIDTH} characters): ").strip()
+        if len(name) > LOG_NAME_WIDTH:
+            return self._fail("Create Account", NAME_TOO_LONG)
 
         account_number = input("Enter the new account number: ").strip()
-        accounts = read_old_bank_accounts(FILE_PATH)
-        if any(acc["account_number"] == account_number for acc in accounts):
-            log_constraint_error("Create Account", "Account number already exists.")
-            return False
+        if normalize_account_number(account_number) in self.store:
+            return self._fail("Create Account", "Account number already exists.")
 
         acc_type = input("Enter account type (admin/basic): ").strip().lower()
         if acc_type not in ("admin", "basic"):
-            log_constraint_error("Create Account", "Invalid account type. Must be 'admin' or 'basic'.")
-            return False
+            return self._fail("Create Account", "Invalid account type. Must be 'admin' or 'basic'.")
 
         balance_str = input("Enter the initial balance (max $99999.99): ").strip()
         try:
-            balance = float(balance_str)
+            balance = parse_amount(balance_str)
         except ValueError:
-            log_constraint_error("Create Account", "Invalid balance amount entered.")
-            return False
+            return self._fail("Create Account", "Invalid balance amount entered.")
 
-        if balance > 99999.99:
-            log_constraint_error("Create Account", "Initial balance exceeds $99999.99.")
+        if not self.create_new_account(account_number, name, acc_type, balance):
             return False
-
-        new_account = {
-            "account_number": account_number,
-            "name": name,
-            "balance": balance,
-            "account_type": acc_type,
-            "status": "A",
-            "total_transactions": 0
-        }
-        accounts.append(new_account)
-        write_new_current_accounts(accounts, FILE_PATH)
-        self.new_accounts.add(account_number)
-        self.log_transaction("Create Account", f"Account {account_number} ({acc_type}) created for {name} with balance {balance}.")
-        self.logger.log_transaction("05", name, account_number, balance, "SP")
-        self.increment_transaction_counter(account_number, accounts)
-        write_new_current_accounts(accounts, FILE_PATH)
         print("Note: This account will not be available for transactions until the next session.")
         return True
 
     def delete_account(self) -> bool:
         print("=== Delete Bank Account ===")
         if input("Are you logged in as admin? (y/n): ").strip().lower() != 'y':
-            log_constraint_error("Delete Account", "Deletion requires admin privileges.")
-            return False
+            return self._fail("Delete Account", "Deletion requires admin privileges.")
 
         if self.get_admin_credentials() is None:
             return False
 
         target_name = input("Enter the target account holder's name: ").strip()
         target_account_number = input("Enter the target account number: ").strip()
-        accounts = read_old_bank_accounts(FILE_PATH)
-        target_found = False
-        for acc in accounts:
-            if acc["account_number"] == target_account_number:
-                if acc["name"] != target_name:
-                    log_constraint_error("Delete Account", "Target account holder's name does not match.")
-                    return False
-                target_found = True
-                break
-
-        if not target_found:
-            log_constraint_error("Delete Account", "Target account not found.")
-            return False
-
-        updated_accounts = [acc for acc in accounts if acc["account_number"] != target_account_number]
-        write_new_current_accounts(updated_accounts, FILE_PATH)
-        self.log_transaction("Delete Account", f"Account {target_account_number} for {target_name} deleted.")
-        self.logger.log_transaction("06", target_name, target_account_number, 0.0, "SP")
-        self.increment_transaction_counter(target_account_number, accounts)
-        write_new_current_accounts(updated_accounts, FILE_PATH)
-        return True
+        return self.delete_existing_account(target_account_number, target_name)
 
     def disable_account(self) -> bool:
         print("=== Disable Bank Account ===")
         if input("Are you logged in as admin? (y/n): ").strip().lower() != 'y':
-            log_constraint_error("Disable Account", "Disabling an account requires admin privileges.")
-            return False
+            return self._fail("Disable Account", "Disabling an account requires admin privileges.")
 
         if self.get_admin_credentials() is None:
             return False
 
         target_name = input("Enter the target account holder's name: ").strip()
         target_account_number = input("Enter the target account number: ").strip()
-        accounts = read_old_bank_accounts(FILE_PATH)
-        target_found = False
-        for acc in accounts:
-            if acc["account_number"] == target_account_number:
-                if acc["name"] != target_name:
-                    log_constraint_error("Disable Account", "Target account holder's name does not match.")
-                    return False
-                if acc["status"] != "A":
-                    log_constraint_error("Disable Account", "Account is not active and cannot be disabled.")
-                    return False
-                acc["status"] = "D"
-                target_found = True
-                break
-
-        if not target_found:
-            log_constraint_error("Disable Account", "Target account not found.")
-            return False
-
-        self.increment_transaction_counter(target_account_number, accounts)
-        write_new_current_accounts(accounts, FILE_PATH)
-        self.log_transaction("Disable Account", f"Account {target_account_number} for {target_name} disabled.")
-        self.logger.log_transaction("07", target_name, target_account_number, 0.0, "SP")
-        return True
+        return self.disable_existing_account(target_account_number, target_name)
@@ -0,0 +1,359 @@
+import contextlib
+import os
+from typing import Optional
+from account import Account
+from read import read_old_bank_accounts
+from write import format_account_line, write_new_current_accounts
+from mappedaccounts import MappedAccountsFile
+from accountjournal import AccountJournal, journal_path
+from accountlock import AccountsFileLock, StaleSnapshotError
+import accountcache
+
+FILE_PATH = "currentaccounts.txt"
+END_OF_FILE_NAME = "END_OF_FILE"
+
+# "rewrite" persists every commit by rewriting the whole accounts file;
+# "mmap" patches balance/transaction count/status fields in place;
+# "journal" appends changed records to a write-ahead journal.
+STORAGE_MODES = ("rewrite", "mmap", "journal")
+STORAGE_MODE = os.environ.get("BANK_STORAGE_MODE", "rewrite")
+IN_PLACE_FIELDS = frozenset(('balance', 'total_transactions', 'status'))
+# Journal entries after which a commit folds the journal into the base file.
+JOURNAL_COMPACT_ENTRIES = 1000
+# Coordinate with other processes through <accounts>.lock (see AccountsFileLock).
+FILE_LOCKING = os.environ.get("BANK_FILE_LOCKING", "") not in ("", "0")
+# Load through the parsed-accounts snapshot in <accounts>.cache (see accountcache).
+ACCOUNTS_CACHE = os.environ.get("BANK_ACCOUNTS_CACHE", "") not in ("", "0")
+
+_stores = {}
+
+
+def normalize_account_number(account_number: str) -> str:
+    """
+    Normalizes an account number the same way read_old_bank_accounts does
+    (leading zeros stripped, "0" for an all-zero number).
+    """
+    return account_number.lstrip('0') or '0'
+
+
+class AccountStore:
+    """
+    In-memory index of the Current Bank Accounts File.
+
+    The file is parsed once, on first use, and every record is keyed by its
+    normalized account number so lookups are O(1). Keys passed to get(),
+    update() etc. are matched as given, exactly like the account_number field
+    of a read_old_bank_accounts record; use normalize_account_number() first
+    for user-entered numbers. Changes are made against the in-memory records
+    and persisted with a single write on commit().
+
+    The store tracks which fields of which records changed since the last
+    commit, so repeated changes to one account are written once, and only
+    changed records are formatted and validated again: unchanged records are
+    written from the lines cached when they were last validated.
+
+    In "mmap" storage mode, commits that only change existing records are
+    written in place through a MappedAccountsFile; adding or removing
+    accounts still rewrites the file.
+
+    In "journal" storage mode, commits append the changed records to an
+    AccountJournal, loading overlays the journal on the file, and compact()
+    (run automatically once the journal holds JOURNAL_COMPACT_ENTRIES
+    entries, and by compact_journal() at day close) folds it into a new
+    accounts file by atomic rename.
+
+    With locking enabled, loads and commits take the advisory lock of an
+    AccountsFileLock, and a commit raises StaleSnapshotError instead of
+    writing when another process committed since this store loaded; the
+    caller invalidates the store and redoes its transaction.
+
+    With the cache enabled, load() takes the records from the pickled
+    snapshot accountcache keeps next to the file while the file is unchanged.
+    """
+
+    def __init__(self, file_path: str = FILE_PATH, mode: str = STORAGE_MODE, locking: bool = FILE_LOCKING,
+                 cache: bool = ACCOUNTS_CACHE):
+        if mode not in STORAGE_MODES:
+            raise ValueError(f"Invalid storage mode '{mode}'. Must be one of {', '.join(STORAGE_MODES)}")
+        self.file_path = file_path
+        self.mode = mode
+        self._accounts = None
+        self._mapped = None
+        self._dirty = {}
+        self._lines = {}
+        self._rewrite_needed = False
+        self._journal = AccountJournal(file_path) if mode == "journal" else None
+        self._lock = AccountsFileLock(file_path) if locking else None
+        self.cache = cache
+        self._generation = None
+        self._defer_depth = 0
+        self._commit_deferred = False
+        # authsystem.Capabilities by account number, dropped when a record's
+        # status or name changes or it is removed.
+        self.capabilities = {}
+
+    def _index(self) -> dict:
+        if self._accounts is None:
+            self.load()
+        return self._accounts
+
+    def load(self) -> None:
+        """
+        (Re)reads the accounts file and rebuilds the index. The END_OF_FILE
+        marker is skipped because write_new_current_accounts appends its own.
+        In journal mode the committed journal entries are applied on top
+        (the cache only ever holds the base file).
+        """
+        accounts = {}
+        with self._locked(exclusive=False):
+            if self.cache:
+                records = accountcache.read_accounts(self.file_path, read_old_bank_accounts)
+            else:
+                records = read_old_bank_accounts(self.file_path)
+            for acc in records:
+                key = acc['account_number']
+                if key == '0' and acc.get('name') == END_OF_FILE_NAME:
+                    continue
+                accounts[key] = acc
+            if self._journal is not None:
+                self._journal.replay(accounts)
+            if self._lock is not None:
+                self._generation = self._lock.generation()
+        self._accounts = accounts
+        self.capabilities = {}
+
+    def _locked(self, exclusive: bool = True):
+        if self._lock is None:
+            return contextlib.nullcontext()
+        return self._lock.locked(exclusive)
+
+    @contextlib.contextmanager
+    def _commit_window(self):
+        """Holds the exclusive lock around a write and checks the snapshot is current."""
+        with self._locked():
+            if self._lock is not None and self._lock.generation() != self._generation:
+                raise StaleSnapshotError(f"{self.file_path} changed since it was loaded")
+            yield
+            if self._lock is not None:
+                self._generation = self._lock.bump()
+
+    def invalidate(self) -> None:
+        """Drops the loaded records so the next access re-reads the file."""
+        self._accounts = None
+        self._generation = None
+        self.capabilities = {}
+        self._dirty = {}
+        self._lines = {}
+        self._rewrite_needed = False
+        self._close_mapped()
+        if self._journal is not None:
+            self._journal.close()
+
+    def clear(self) -> None:
+        """Empties the accounts file (and its journal) and drops the loaded records."""
+        with self._locked():
+            open(self.file_path, 'w').close()
+            if self._journal is not None:
+                self._journal.discard()
+            if self._lock is not None:
+                self._lock.bump()
+        self.invalidate()
+
+    def _close_mapped(self) -> None:
+        if self._mapped is not None:
+            self._mapped.close()
+            self._mapped = None
+
+    def get(self, account_number: str) -> Optional[Account]:
+        return self._index().get(account_number)
+
+    def __contains__(self, account_number: str) -> bool:
+        return account_number in self._index()
+
+    def __len__(self) -> int:
+        return len(self._index())
+
+    def accounts(self) -> list:
+        return list(self._index().values())
+
+    def add(self, account: dict) -> Account:
+        """
+        Adds a new account record, normalized to the Account shape produced
+        by read_old_bank_accounts, and returns the stored record.
+        """
+        key = normalize_account_number(account['account_number'])
+        record = Account(key, account['name'], account.get('status', 'A'), account['balance'],
+                         account.get('total_transactions', 0), account.get('plan', 'NP'))
+        self._index()[key] = record
+        self.capabilities.pop(key, None)
+        self._mark_dirty(key, record)
+        self._rewrite_needed = True
+        return record
+
+    def remove(self, account_number: str) -> Optional[Account]:
+        acc = self._index().pop(account_number, None)
+        if acc is not None:
+            self.capabilities.pop(account_number, None)
+            self._mark_dirty(account_number, ())
+            self._rewrite_needed = True
+        return acc
+
+    def update(self, account_number: str, **fields) -> Optional[Account]:
+        """Sets the given fields on an account record and returns it."""
+        acc = self.get(account_number)
+        if acc is not None:
+            acc.update(fields)
+            if 'status' in fields or 'name' in fields:
+                self.capabilities.pop(account_number, None)
+            self._mark_dirty(account_number, fields)
+        return acc
+
+    def _mark_dirty(self, account_number: str, fields) -> None:
+        self._dirty.setdefault(account_number, set()).update(fields)
+        self._lines.pop(account_number, None)
+
+    def dirty_accounts(self) -> dict:
+        """Returns {account number: changed field names} since the last commit."""
+        return {key: set(fields) for key, fields in self._dirty.items()}
+
+    def increment_transactions(self, account_number: str) -> None:
+        acc = self.get(account_number)
+        if acc is not None:
+            self.update(account_number, total_transactions=acc.get('total_transactions', 0) + 1)
+
+    @contextlib.contextmanager
+    def deferred_commits(self):
+        """
+        Groups several operations into one commit: commit() calls made inside
+        the block are postponed and a single commit runs when it exits.
+        """
+        self._defer_depth += 1
+        try:
+            yield self
+        finally:
+            self._defer_depth -= 1
+            if self._defer_depth == 0 and self._commit_deferred:
+                self._commit_deferred = False
+                self.commit()
+
+    def flush(self) -> None:
+        """
+        Runs a commit postponed by deferred_commits() now, without leaving the
+        block; long-lived callers use it to persist in periodic batches. If
+        the commit raises, the changes stay pending and the next flush()
+        tries again.
+        """
+        if not self._commit_deferred:
+            return
+        self._commit_deferred = False
+        depth, self._defer_depth = self._defer_depth, 0
+        try:
+            self.commit()
+        except BaseException:
+            self._commit_deferred = True
+            raise
+        finally:
+            self._defer_depth = depth
+
+    def commit(self) -> None:
+        """
+        Persists pending changes: appended to the journal in journal mode, in
+        place when the storage mode and the kind of change allow it, otherwise
+        with one write of the accounts file.
+        """
+        if self._defer_depth:
+            self._commit_deferred = True
+            return
+        if not self._dirty and not self._rewrite_needed:
+            return
+        self._index()
+        with self._commit_window():
+            self._write_changes()
+
+    def _write_changes(self) -> None:
+        if self._journal is not None:
+            self._commit_journal()
+            return
+        if self.mode == "mmap" and not self._rewrite_needed and self._commit_in_place():
+            self._dirty = {}
+            return
+        self._close_mapped()
+        write_new_current_accounts(self.accounts(), self.file_path, self._lines)
+        self._dirty = {}
+        self._rewrite_needed = False
+
+    def _commit_journal(self) -> None:
+        index = self._index()
+        puts = [index[key] for key in self._dirty if key in index]
+        deletes = [key for key in self._dirty if key not in index]
+        self._journal.append(puts, deletes)
+        self._dirty = {}
+        self._rewrite_needed = False
+        if self._journal.entries >= JOURNAL_COMPACT_ENTRIES:
+            self._journal.compact(self.accounts())
+
+    def compact(self) -> None:
+        """
+        Folds the journal into a new accounts file (journal mode only), so the
+        file on disk is complete for readers that do not replay the journal.
+        """
+        if self._journal is None:
+            return
+        self._index()
+        with self._commit_window():
+            if self._dirty:
+                self._commit_journal()
+            if self._journal.entries or os.path.exists(self._journal.path):
+                self._journal.compact(self.accounts())
+
+    def _commit_in_place(self) -> bool:
+        if self._mapped is None:
+            try:
+                self._mapped = MappedAccountsFile(self.file_path)
+            except (OSError, ValueError):
+                return False
+        if any(key not in self._mapped for key in self._dirty):
+            return False
+        for key, fields in self._dirty.items():
+            acc = self._accounts[key]
+            if not IN_PLACE_FIELDS.issuperset(fields):
+                self._mapped.set_record(key, format_account_line(acc))
+                continue
+            if 'balance' in fields:
+                self._mapped.set_balance(key, acc['balance'])
+            if 'total_transactions' in fields:
+                self._mapped.set_transactions(key, acc['total_transactions'])
+            if 'status' in fields:
+                self._mapped.set_status(key, acc['status'])
+        self._mapped.flush()
+        return True
+
+
+def get_account_store(file_path: str = FILE_PATH) -> AccountStore:
+    """
+    Returns the process-wide AccountStore for the given accounts file, using
+    the storage mode selected by the BANK_STORAGE_MODE environment variable.
+    """
+    store = _stores.get(file_path)
+    if store is None:
+        store = _stores[file_path] = AccountStore(file_path)
+    return store
+
+
+def compact_journal(file_path: str = FILE_PATH) -> bool:
+    """
+    Folds the journal that journal-mode stores left next to an accounts file
+    into the file, for readers that parse the file directly (the back end at
+    day close). Returns False when there is no journal to fold.
+    """
+    if not os.path.exists(journal_path(file_path)):
+        return False
+    AccountStore(file_path, mode="journal").compact()
+    return True
+
+
+def reset_account_stores() -> None:
+    """Forgets every shared AccountStore (used when the files change underneath)."""
+    for store in _stores.values():
+        store.invalidate()
+    _stores.clear()
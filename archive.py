@@ -0,0 +1,190 @@
+#!/usr/bin/env python3
+import argparse
+import bisect
+import os
+import re
+import sys
+from typing import Optional
+from account import Account
+from accountjournal import DELETE, PUT, parse_journal_record
+from money import format_amount
+from read import read_old_bank_accounts
+from write import format_account_line, write_new_current_accounts
+
+ARCHIVE_DIR = "accounts_archive"
+END_OF_FILE_NAME = "END_OF_FILE"
+# dayNNNN.base holds the first archived day as a plain accounts file;
+# dayNNNN.delta holds the records that changed on a later day, as
+# "P <record>" (added or changed) and "D NNNNN" (deleted) lines.
+BASE_SUFFIX = ".base"
+DELTA_SUFFIX = ".delta"
+_DAY_FILE = re.compile(r"day(\d+)(\.base|\.delta)$")
+
+
+def _day_file(directory: str, day: int, suffix: str) -> str:
+    return os.path.join(directory, f"day{day:04d}{suffix}")
+
+
+def _accounts_of(file_path: str) -> dict:
+    """Reads an accounts file into {account number: record}, without the END_OF_FILE marker."""
+    accounts = {}
+    for acc in read_old_bank_accounts(file_path):
+        if acc['account_number'] == '0' and acc['name'] == END_OF_FILE_NAME:
+            continue
+        accounts[acc['account_number']] = acc
+    return accounts
+
+
+class AccountsArchive:
+    """
+    Day-by-day history of a Current Bank Accounts File, stored as one base
+    snapshot plus, for each later day, only the records that changed, so the
+    archive grows with the amount of change rather than with the number of
+    accounts.
+
+    Opening the archive builds an index holding, for every account, the days
+    its record changed and the record from that day on (None once deleted).
+    A point-in-time lookup is a bisect over one account's days, and a whole
+    day is rebuilt by looking every account up. Reconstructed snapshots list
+    the accounts in the order they first appeared in the archive.
+    """
+
+    def __init__(self, directory: str = ARCHIVE_DIR):
+        self.directory = directory
+        self._days = []
+        self._history = {}
+        if os.path.isdir(directory):
+            self._load()
+
+    def _load(self) -> None:
+        files = []
+        for name in os.listdir(self.directory):
+            match = _DAY_FILE.match(name)
+            if match:
+                files.append((int(match.group(1)), match.group(2), os.path.join(self.directory, name)))
+        for day, suffix, path in sorted(files):
+            if suffix == BASE_SUFFIX:
+                if self._days:
+                    raise ValueError(f"Archive {self.directory} has more than one base snapshot")
+                changes = _accounts_of(path)
+            else:
+                if not self._days:
+                    raise ValueError(f"Archive {self.directory} has a delta before its base snapshot")
+                changes = self._read_delta(path)
+            self._apply(day, changes)
+
+    @staticmethod
+    def _read_delta(path: str) -> dict:
+        changes = {}
+        with open(path, 'r') as file:
+            for line_num, line in enumerate(file, 1):
+                line = line.rstrip('\n')
+                if line[:2] == PUT + " " and len(line) == 47:
+                    record = parse_journal_record(line[2:])
+                    changes[record['account_number']] = record
+                elif line[:2] == DELETE + " " and len(line) == 7 and line[2:].isdigit():
+                    changes[line[2:].lstrip('0') or '0'] = None
+                else:
+                    raise ValueError(f"{path} line {line_num}: invalid delta record")
+        return changes
+
+    def _apply(self, day: int, changes: dict) -> None:
+        for key, record in changes.items():
+            days, records = self._history.setdefault(key, ([], []))
+            days.append(day)
+            records.append(record)
+        self._days.append(day)
+
+    def days(self) -> list:
+        return list(self._days)
+
+    def record(self, account_number: str, day: int) -> Optional[Account]:
+        """Returns an account's record as it was at the close of `day`, or None."""
+        history = self._history.get(account_number.lstrip('0') or '0')
+        if history is None:
+            return None
+        days, records = history
+        index = bisect.bisect_right(days, day)
+        return records[index - 1] if index else None
+
+    def balance(self, account_number: str, day: int) -> Optional[int]:
+        """Returns an account's balance in cents at the close of `day`, or None."""
+        record = self.record(account_number, day)
+        return None if record is None else record['balance']
+
+    def snapshot(self, day: int) -> list:
+        """Rebuilds the list of account records as it was at the close of `day`."""
+        return [record for record in (self.record(key, day) for key in self._history) if record is not None]
+
+    def restore(self, day: int, file_path: str) -> None:
+        """Writes the accounts file as it was at the close of `day`."""
+        write_new_current_accounts(self.snapshot(day), file_path)
+
+    def add_day(self, day: int, accounts_path: str) -> int:
+        """
+        Archives the accounts file as the state at the close of `day`, which
+        must come after every archived day. The first day becomes the base
+        snapshot; later days store only their changes. Returns the number of
+        records written.
+        """
+        if self._days and day <= self._days[-1]:
+            raise ValueError(f"Day {day} is not after the last archived day ({self._days[-1]})")
+        accounts = _accounts_of(accounts_path)
+        os.makedirs(self.directory, exist_ok=True)
+        if not self._days:
+            write_new_current_accounts(list(accounts.values()), _day_file(self.directory, day, BASE_SUFFIX))
+            self._apply(day, accounts)
+            return len(accounts)
+
+        latest = self._days[-1]
+        changes = {}
+        for key, (_days, records) in self._history.items():
+            if records[-1] is not None and key not in accounts:
+                changes[key] = None
+        for key, acc in accounts.items():
+            previous = self.record(key, latest)
+            if previous is None or format_account_line(previous) != format_account_line(acc):
+                changes[key] = acc
+        lines = [f"{PUT} {format_account_line(acc)}" if acc is not None else f"{DELETE} {key.zfill(5)}\n"
+                 for key, acc in changes.items()]
+        path = _day_file(self.directory, day, DELTA_SUFFIX)
+        with open(f"{path}.tmp", 'w') as file:
+            file.writelines(lines)
+        os.replace(f"{path}.tmp", path)
+        self._apply(day, changes)
+        return len(changes)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Archive daily accounts files as base snapshot plus deltas.")
+    parser.add_argument("--archive", default=ARCHIVE_DIR, help="archive directory")
+    commands = parser.add_subparsers(dest="command", required=True)
+    add = commands.add_parser("add", help="archive an accounts file as the state at the close of a day")
+    add.add_argument("day", type=int)
+    add.add_argument("accounts")
+    balance = commands.add_parser("balance", help="print an account's balance at the close of a day")
+    balance.add_argument("account")
+    balance.add_argument("day", type=int)
+    restore = commands.add_parser("restore", help="write the accounts file of a day")
+    restore.add_argument("day", type=int)
+    restore.add_argument("output")
+    args = parser.parse_args(argv)
+
+    archive = AccountsArchive(args.archive)
+    if args.command == "add":
+        count = archive.add_day(args.day, args.accounts)
+        print(f"Archived day {args.day} ({count} records written).")
+    elif args.command == "balance":
+        record = archive.record(args.account, args.day)
+        if record is None:
+            print(f"ERROR: Account {args.account} did not exist at the close of day {args.day}")
+            return 1
+        print(f"{record['account_number']} {record['name']} {format_amount(record['balance'])}")
+    else:
+        archive.restore(args.day, args.output)
+        print(f"Restored day {args.day} to {args.output}.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
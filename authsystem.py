@@ -1,32 +1,78 @@
 from transactionlogger import TransactionLogger
 from typing import Optional
+import instrumentation
 
-def login(account_number: str, name: str, active_required: bool = True) -> Optional[dict]:
-    # (Existing code – unchanged)
-    from read import read_old_bank_accounts
+ADMIN_ROLE = 'admin'
+BASIC_ROLE = 'basic'
+
+class Capabilities:
+    """
+    Privileges of one account, resolved from its record once and cached in
+    the AccountStore (see capabilities()); the store drops the entry when the
+    account's status or name changes or the account is removed.
+    """
+    __slots__ = ('account_number', 'role', 'active')
+
+    def __init__(self, account_number: str, role: str, active: bool):
+        self.account_number = account_number
+        self.role = role
+        self.active = active
+
+    @property
+    def is_admin(self) -> bool:
+        return self.role == ADMIN_ROLE
+
+    @property
+    def can_administer(self) -> bool:
+        """True for an admin account that is still active."""
+        return self.is_admin and self.active
+
+def capabilities(account_number: str, store=None) -> Optional[Capabilities]:
+    """Returns the cached Capabilities of an account, resolving them on first use."""
+    from accountstore import get_account_store, normalize_account_number
+    if store is None:
+        store = get_account_store()
+    key = normalize_account_number(account_number)
+    caps = store.capabilities.get(key)
+    if caps is None:
+        acc = store.get(key)
+        if acc is None:
+            return None
+        admin = acc["account_number"] == "1" and acc.get("name") == "Admin"
+        caps = store.capabilities[key] = Capabilities(key, ADMIN_ROLE if admin else BASIC_ROLE,
+                                                      acc.get("status", "A") == "A")
+    return caps
+
+@instrumentation.instrumented
+def login(account_number: str, name: str, active_required: bool = True, store=None) -> Optional[dict]:
+    """
+    Looks the account up in the shared AccountStore (O(1) per call) and returns
+    a copy of its record with 'account_type' set to the role of its cached
+    Capabilities, 'admin' or 'basic'.
+    """
+    from accountstore import get_account_store, normalize_account_number
     from print_error import log_constraint_error
-    normalized = account_number.lstrip('0') or '0'
-    accounts = read_old_bank_accounts("currentaccounts.txt")
-    for acc in accounts:
-        if acc["account_number"] == normalized and acc["name"] == name:
-            if active_required and acc["status"] != "A":
-                log_constraint_error("Authentication", f"Account {account_number} is not active.")
-                return None
-            from authsystem import is_admin
-            acc['account_type'] = 'admin' if is_admin(normalized) else 'basic'
-            return acc
+    if store is None:
+        store = get_account_store()
+    acc = store.get(normalize_account_number(account_number))
+    if acc is not None and acc["name"] == name:
+        if active_required and acc["status"] != "A":
+            log_constraint_error("Authentication", f"Account {account_number} is not active.")
+            return None
+        user = acc.copy()
+        user['account_type'] = capabilities(account_number, store).role
+        return user
     log_constraint_error("Authentication", f"Account {account_number} not found or name mismatch.")
     return None
 
-def is_admin(account_number: str) -> bool:
-    from read import read_old_bank_accounts
-    normalized = account_number.lstrip('0') or '0'
-    accounts = read_old_bank_accounts("currentaccounts.txt")
-    for acc in accounts:
-        if acc["account_number"] == normalized:
-            if normalized == "1" and acc.get("name") == "Admin":
-                return True
-    return False
+@instrumentation.instrumented
+def is_admin(account_number: str, store=None) -> bool:
+    """
+    True if the account may act as an administrator (Capabilities.can_administer);
+    the admin gates of the front end, AccountManager and the server check this.
+    """
+    caps = capabilities(account_number, store)
+    return caps is not None and caps.can_administer
 
 def logout() -> None:
     # Finalize the transaction log file (simulate download)
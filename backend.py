@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+import os
+import sys
+from read import read_old_bank_accounts
+from write import format_account_line, END_OF_FILE_LINE
+from print_error import log_constraint_error
+from money import MAX_BALANCE_CENTS
+from logreader import END_OF_SESSION, iter_log
+from transactionlogger import TRANSFER_CREDIT
+from accountstore import compact_journal
+
+OLD_ACCOUNTS_PATH = "currentaccounts.txt"
+MERGED_LOG_PATH = "merged_daily_transactions.txt"
+NEW_ACCOUNTS_PATH = "currentaccounts.txt"
+
+# Per-transaction fee, in cents, charged on withdrawals, transfers, bill
+# payments and deposits according to the account's payment plan.
+PLAN_FEES = {"SP": 5, "NP": 10}
+FEE_CODES = frozenset(("01", "02", "03", "04"))
+
+TRANSACTION_NAMES = {
+    "01": "Withdraw",
+    "02": "Transfer",
+    "03": "Pay Bill",
+    "04": "Deposit",
+    "05": "Create Account",
+    "06": "Delete Account",
+    "07": "Disable Account",
+    "08": "Change Plan",
+}
+
+
+def load_master(file_path):
+    """
+    Reads the old master accounts file into a dict keyed by normalized account
+    number. Balances are integer cents, as read_old_bank_accounts returns them.
+    """
+    master = {}
+    for acc in read_old_bank_accounts(file_path):
+        if acc['account_number'] == '0' and acc['name'] == 'END_OF_FILE':
+            continue
+        master[acc['account_number']] = acc
+    return master
+
+
+def apply_transaction(master, code, name, account_number, amount, misc, line_num):
+    """
+    Applies one logged transaction to the master accounts. Returns True if it
+    was applied; constraint failures are reported and the record is skipped.
+    """
+    context = TRANSACTION_NAMES.get(code)
+    if context is None:
+        log_constraint_error("Backend", f"Line {line_num}: Unknown transaction code '{code}'")
+        return False
+
+    acc = master.get(account_number)
+    if code == "05":
+        if acc is not None:
+            log_constraint_error(context, f"Line {line_num}: Account {account_number} already exists")
+            return False
+        if len(account_number) > 5:
+            log_constraint_error(context, f"Line {line_num}: Account number exceeds 5 digits: {account_number}")
+            return False
+        if amount > MAX_BALANCE_CENTS:
+            log_constraint_error(context, f"Line {line_num}: Initial balance exceeds $99999.99")
+            return False
+        master[account_number] = {
+            'account_number': account_number,
+            'name': name,
+            'status': 'A',
+            'balance': amount,
+            'total_transactions': 1,
+            'plan': misc if misc in PLAN_FEES else 'NP'
+        }
+        return True
+
+    if acc is None:
+        log_constraint_error(context, f"Line {line_num}: Account {account_number} not found")
+        return False
+    if acc['name'][:10].rstrip() != name:
+        log_constraint_error(context, f"Line {line_num}: Account holder's name does not match account {account_number}")
+        return False
+
+    if code == "06":
+        del master[account_number]
+        return True
+    if acc['status'] != 'A':
+        log_constraint_error(context, f"Line {line_num}: Account {account_number} is not active")
+        return False
+
+    if code in FEE_CODES:
+        fee = PLAN_FEES[acc['plan']]
+        if code == "02" and misc == TRANSFER_CREDIT:
+            # The destination side of a transfer; the fee is charged once,
+            # on the source side.
+            balance = acc['balance'] + amount
+        elif code == "04":
+            balance = acc['balance'] + amount - fee
+        else:
+            balance = acc['balance'] - amount - fee
+        if balance < 0:
+            log_constraint_error(context, f"Line {line_num}: Insufficient funds in account {account_number}")
+            return False
+        if balance > MAX_BALANCE_CENTS:
+            log_constraint_error(context, f"Line {line_num}: Balance of account {account_number} would exceed $99999.99")
+            return False
+        acc['balance'] = balance
+    elif code == "07":
+        acc['status'] = 'D'
+    elif code == "08":
+        acc['plan'] = misc if misc in PLAN_FEES else 'NP'
+    acc['total_transactions'] += 1
+    return True
+
+
+def apply_transactions(master, log_file):
+    """
+    Streams the merged transaction file, applying each record in order.
+    Only the master dict is held in memory, so memory use does not grow with
+    the number of log lines. A transfer credit that directly follows its
+    rejected debit is rejected too, so no money is credited that was not
+    taken from the source. Returns (applied, rejected) counts.
+    """
+    applied = rejected = 0
+    malformed = []
+    rejected_debit = None
+    for line_num, record in iter_log(log_file, malformed):
+        code, _name, _number, amount, misc = record
+        if code == END_OF_SESSION:
+            continue
+        if code == "02" and misc == TRANSFER_CREDIT and rejected_debit == amount:
+            log_constraint_error(TRANSACTION_NAMES[code], f"Line {line_num}: Source side of the transfer was rejected")
+            ok = False
+        else:
+            ok = apply_transaction(master, *record, line_num)
+        rejected_debit = amount if code == "02" and misc != TRANSFER_CREDIT and not ok else None
+        if ok:
+            applied += 1
+        else:
+            rejected += 1
+    return applied, rejected + len(malformed)
+
+
+def write_master(master, file_path):
+    """
+    Writes the new master accounts file next to the target and renames it
+    into place, so a failure never leaves a half-written accounts file.
+    """
+    temp_path = f"{file_path}.tmp"
+    with open(temp_path, 'w') as file:
+        for acc in master.values():
+            file.write(format_account_line(acc))
+        file.write(END_OF_FILE_LINE)
+    os.replace(temp_path, file_path)
+
+
+def run_backend(old_accounts=OLD_ACCOUNTS_PATH, log_file=MERGED_LOG_PATH, new_accounts=NEW_ACCOUNTS_PATH):
+    """Applies one day's merged transactions to the old master accounts file."""
+    # Day close: changes a journal-mode front end still holds in
+    # <accounts>.journal go into the file before it is read.
+    compact_journal(old_accounts)
+    master = load_master(old_accounts)
+    applied, rejected = apply_transactions(master, log_file)
+    write_master(master, new_accounts)
+    print(f"Back end applied {applied} transactions ({rejected} rejected) to {len(master)} accounts.")
+    return applied, rejected
+
+
+if __name__ == "__main__":
+    run_backend(*sys.argv[1:4])
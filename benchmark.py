@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+from read import read_old_bank_accounts
+from write import write_new_current_accounts
+from authsystem import login, is_admin
+from accountstore import AccountStore
+from transactionlogger import TransactionLogger
+
+DEFAULT_SIZES = (10, 100, 1000, 10000, 99999)
+DEFAULT_REPEATS = 20
+DEFAULT_WARMUP = 3
+
+
+def generate_accounts(count):
+    """
+    Builds `count` valid account records: account 00001 is the Admin account,
+    the rest are numbered consecutively with alternating plans and statuses.
+    """
+    accounts = [{'account_number': '1', 'name': 'Admin', 'status': 'A', 'balance': 1000000,
+                 'total_transactions': 0, 'plan': 'NP'}]
+    for number in range(2, count + 1):
+        accounts.append({
+            'account_number': str(number),
+            'name': f"User{number}",
+            'status': 'D' if number % 10 == 0 else 'A',
+            'balance': number * 37 % 9999999,
+            'total_transactions': number % 10000,
+            'plan': 'SP' if number % 2 else 'NP'
+        })
+    return accounts
+
+
+def generate_accounts_file(file_path, count):
+    write_new_current_accounts(generate_accounts(count), file_path)
+
+
+def percentile(sorted_values, fraction):
+    """Nearest-rank percentile of an already sorted list."""
+    index = min(len(sorted_values) - 1, max(0, int(round(fraction * (len(sorted_values) - 1)))))
+    return sorted_values[index]
+
+
+def time_operation(operation, repeats=DEFAULT_REPEATS, warmup=DEFAULT_WARMUP):
+    """Calls `operation` warmup + repeats times and summarizes the timed calls."""
+    for _ in range(warmup):
+        operation()
+    samples = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        operation()
+        samples.append(time.perf_counter() - start)
+    samples.sort()
+    total = sum(samples)
+    return {
+        'repeats': repeats,
+        'ops_per_sec': (repeats / total) if total else None,
+        'p50_ms': percentile(samples, 0.50) * 1000,
+        'p99_ms': percentile(samples, 0.99) * 1000,
+        'mean_ms': total / repeats * 1000,
+    }
+
+
+def benchmark_size(count, directory, repeats=DEFAULT_REPEATS, warmup=DEFAULT_WARMUP):
+    """Times every hot path against a synthetic accounts file of `count` records."""
+    accounts_path = os.path.join(directory, f"accounts_{count}.txt")
+    output_path = os.path.join(directory, f"written_{count}.txt")
+    log_path = os.path.join(directory, f"log_{count}.txt")
+    generate_accounts_file(accounts_path, count)
+    accounts = read_old_bank_accounts(accounts_path)
+    last = accounts[count - 1]
+    warm_store = AccountStore(accounts_path, mode="rewrite")
+    logger = TransactionLogger(log_path)
+
+    results = {
+        'read_old_bank_accounts': time_operation(
+            lambda: read_old_bank_accounts(accounts_path), repeats, warmup),
+        # A cold login is what every new front-end process pays: load + lookup.
+        'login_cold': time_operation(
+            lambda: login(last['account_number'], last['name'], active_required=False,
+                          store=AccountStore(accounts_path, mode="rewrite")), repeats, warmup),
+        'login_warm': time_operation(
+            lambda: login(last['account_number'], last['name'], active_required=False,
+                          store=warm_store), repeats, warmup),
+        'is_admin_warm': time_operation(lambda: is_admin("00001", warm_store), repeats, warmup),
+        'write_new_current_accounts': time_operation(
+            lambda: write_new_current_accounts(accounts, output_path), repeats, warmup),
+        'log_transaction': time_operation(
+            lambda: logger.log_transaction("01", last['name'], last['account_number'], 1234, "SP"),
+            repeats, warmup),
+    }
+    logger.close()
+    return results
+
+
+def run_benchmarks(sizes=DEFAULT_SIZES, repeats=DEFAULT_REPEATS, warmup=DEFAULT_WARMUP):
+    """Returns a JSON-serializable report of every hot path at every size."""
+    report = {
+        'python': sys.version.split()[0],
+        'repeats': repeats,
+        'warmup': warmup,
+        'results': {},
+    }
+    with tempfile.TemporaryDirectory() as directory:
+        for count in sizes:
+            report['results'][str(count)] = benchmark_size(count, directory, repeats, warmup)
+    return report
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the accounts read/login/transact/write hot paths.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=list(DEFAULT_SIZES),
+                        help="account file sizes to benchmark (1-99999)")
+    parser.add_argument("--repeats", type=int, default=DEFAULT_REPEATS)
+    parser.add_argument("--warmup", type=int, default=DEFAULT_WARMUP)
+    parser.add_argument("--output", help="write the JSON report here instead of stdout")
+    args = parser.parse_args(argv)
+    if any(not 1 <= size <= 99999 for size in args.sizes):
+        parser.error("sizes must be between 1 and 99999")
+
+    report = json.dumps(run_benchmarks(args.sizes, args.repeats, args.warmup), indent=2)
+    if args.output:
+        with open(args.output, 'w') as file:
+            file.write(report + "\n")
+    else:
+        print(report)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,174 @@
+try:
+    import numpy as np
+except ImportError:  # NumPy is optional; only the columnar loader needs it.
+    np = None
+
+LINE_LENGTH = 45
+RECORD_LENGTH = LINE_LENGTH + 1
+
+# Field layout of a fixed-width record: NNNNN AAAAAAAAAAAAAAAAAAAA S PPPPPPPP TTTT PP
+NUMBER = slice(0, 5)
+NAME = slice(6, 26)
+STATUS = 27
+BALANCE = slice(29, 37)
+TRANSACTIONS = slice(38, 42)
+PLAN = slice(43, 45)
+
+# Failure codes in the order read_old_bank_accounts checks them; a record
+# is reported under the first check it fails.
+(VALID, BAD_NUMBER, BAD_STATUS, NEGATIVE_BALANCE,
+ BAD_BALANCE, BAD_TRANSACTIONS, BAD_PLAN) = range(7)
+
+
+def _require_numpy():
+    if np is None:
+        raise ImportError("The columnar accounts loader requires NumPy (pip install numpy)")
+
+
+def _records(data: bytes):
+    """
+    Returns a (records, line_numbers, errors) triple: a uint8 array with one
+    45-byte row per line of the right length, the 1-based line number of
+    each row, and the length errors of every other line.
+    """
+    size = len(data)
+    if size % RECORD_LENGTH == 0:
+        buffer = np.frombuffer(data, dtype=np.uint8).reshape(-1, RECORD_LENGTH)
+        if (buffer[:, LINE_LENGTH] == ord('\n')).all():
+            # Well-formed file: the records are a zero-copy view of the buffer.
+            return buffer[:, :LINE_LENGTH], np.arange(1, len(buffer) + 1), []
+
+    lines = data.split(b'\n')
+    if lines and lines[-1] == b'':
+        lines.pop()
+    errors = []
+    good = []
+    line_numbers = []
+    for line_num, line in enumerate(lines, 1):
+        if len(line) != LINE_LENGTH:
+            errors.append((line_num, f"Invalid length ({len(line)} chars, expected {LINE_LENGTH})"))
+        else:
+            good.append(line)
+            line_numbers.append(line_num)
+    records = np.frombuffer(b''.join(good), dtype=np.uint8).reshape(-1, LINE_LENGTH)
+    return records, np.array(line_numbers, dtype=np.int64), errors
+
+
+def _is_digit(block):
+    return ((block >= ord('0')) & (block <= ord('9'))).all(axis=1)
+
+
+def _to_int(block):
+    """Converts rows of ASCII digits to integers."""
+    weights = 10 ** np.arange(block.shape[1] - 1, -1, -1, dtype=np.int64)
+    return (block.astype(np.int64) - ord('0')) @ weights
+
+
+def _text(records, columns, line):
+    return records[line, columns].tobytes().decode('ascii', errors='replace')
+
+
+def _message(code, records, row):
+    if code == BAD_NUMBER:
+        return "Account number must be 5 digits"
+    if code == BAD_STATUS:
+        return f"Invalid status '{_text(records, STATUS, row)}'. Must be 'A' or 'D'"
+    if code == NEGATIVE_BALANCE:
+        return f"Negative balance detected: {_text(records, BALANCE, row)}"
+    if code == BAD_BALANCE:
+        return f"Invalid balance format. Expected XXXXX.XX, got {_text(records, BALANCE, row)}"
+    if code == BAD_TRANSACTIONS:
+        return "Transaction count must be 4 digits"
+    return f"Invalid plan type '{_text(records, PLAN, row)}'. Must be SP or NP"
+
+
+def validate_records(records):
+    """
+    Runs every check of read_old_bank_accounts over a (n, 45) uint8 array
+    at once. Returns an int8 array holding the first failure code of each
+    record, VALID for records that pass.
+    """
+    _require_numpy()
+    status = records[:, STATUS]
+    balance = records[:, BALANCE]
+    plan = records[:, PLAN]
+    plan_ok = (((plan[:, 0] == ord('S')) | (plan[:, 0] == ord('N')))
+               & (plan[:, 1] == ord('P')))
+    balance_ok = (_is_digit(balance[:, :5]) & (balance[:, 5] == ord('.'))
+                  & _is_digit(balance[:, 6:]))
+    failures = [
+        ~_is_digit(records[:, NUMBER]),
+        (status != ord('A')) & (status != ord('D')),
+        balance[:, 0] == ord('-'),
+        ~balance_ok,
+        ~_is_digit(records[:, TRANSACTIONS]),
+        ~plan_ok,
+    ]
+    codes = np.full(len(records), VALID, dtype=np.int8)
+    # Assign in reverse so the earliest failing check wins.
+    for code in range(len(failures), 0, -1):
+        codes[failures[code - 1]] = code
+    return codes
+
+
+def load_accounts_columnar(file_path):
+    """
+    Columnar counterpart of read_old_bank_accounts for reporting and back-end
+    runs. The file is read as one byte buffer and validated with vectorized
+    checks instead of line by line.
+
+    Returns (columns, errors). columns maps field name to a NumPy array with
+    one entry per valid record, in file order:
+      - account_number: int64
+      - name: str, surrounding spaces stripped
+      - status, plan: str
+      - balance: int64 cents
+      - total_transactions: int64
+    errors is a list of (line_number, message) pairs using the same messages
+    read_old_bank_accounts prints.
+    """
+    _require_numpy()
+    with open(file_path, 'rb') as file:
+        data = file.read()
+
+    records, line_numbers, errors = _records(data)
+    codes = validate_records(records)
+    for row in np.flatnonzero(codes):
+        errors.append((int(line_numbers[row]), _message(codes[row], records, row)))
+    errors.sort()
+
+    valid = records[codes == VALID]
+    balance = valid[:, BALANCE]
+    cents = _to_int(balance[:, :5]) * 100 + _to_int(balance[:, 6:])
+    columns = {
+        'account_number': _to_int(valid[:, NUMBER]),
+        'name': np.char.strip(np.ascontiguousarray(valid[:, NAME]).view('S20').ravel().astype('U20')),
+        'status': np.ascontiguousarray(valid[:, STATUS]).view('S1').astype('U1'),
+        'balance': cents,
+        'total_transactions': _to_int(valid[:, TRANSACTIONS]),
+        'plan': np.ascontiguousarray(valid[:, PLAN]).view('S2').ravel().astype('U2'),
+    }
+    return columns, errors
+
+
+def columns_to_accounts(columns):
+    """Converts columnar arrays back into read_old_bank_accounts-style dicts."""
+    return [
+        {
+            'account_number': str(number),
+            'name': str(name),
+            'status': str(status),
+            'balance': int(balance),
+            'total_transactions': int(transactions),
+            'plan': str(plan),
+        }
+        for number, name, status, balance, transactions, plan in zip(
+            columns['account_number'], columns['name'], columns['status'],
+            columns['balance'], columns['total_transactions'], columns['plan'])
+    ]
+
+
+def print_errors(errors):
+    """Prints loader errors in read_old_bank_accounts' format."""
+    for line_num, message in errors:
+        print(f"ERROR: Fatal error - Line {line_num}: {message}")
@@ -4,17 +4,26 @@ set -euo pipefail
 # Clean up any old artifacts
 rm -f transactions_day_session*.txt merged_daily_transactions.txt
 
-# Replay each of the 9 transaction sessions
-for i in {1..9}; do
-  session="session${i}.txt"
-  out="transactions_day_session${i}.txt"
-  echo "→ Running session $i from $session"
-  python3 frontend.py < "$session"
-  mv transaction_log.txt "$out"
-done
+if [ "${DAILY_PARALLEL:-0}" = 1 ]; then
+  # Replay every session in parallel against private copies of the
+  # start-of-day accounts file; the logs are merged into
+  # merged_daily_transactions.txt, ordered by account number, with one
+  # end-of-session trailer
+  echo "→ Replaying sessions in parallel"
+  python3 replay.py --accounts currentaccounts.txt --merged merged_daily_transactions.txt \
+    --terminators single --by-account session*.txt
 
-# Merge all 9 into one file
-echo "→ Merging into merged_daily_transactions.txt"
-cat transactions_day_session*.txt > merged_daily_transactions.txt
+  # The copies are discarded: only what the back end rebuilds from the
+  # merged log (plan fees included) reaches currentaccounts.txt
+  echo "→ Applying merged transactions to currentaccounts.txt"
+  python3 backend.py currentaccounts.txt merged_daily_transactions.txt currentaccounts.txt
+else
+  # Replay the sessions in order against currentaccounts.txt itself, each
+  # seeing the previous sessions' changes, and concatenate their logs into
+  # merged_daily_transactions.txt
+  echo "→ Replaying sessions"
+  python3 replay.py --serial --accounts currentaccounts.txt --merged merged_daily_transactions.txt \
+    session*.txt
+fi
 
 echo "=== Daily run complete ==="
@@ -3,13 +3,17 @@ import sys
 from accountmanagement import AccountManager
 from transactionsystem import TransactionSystem
 from authsystem import login, is_admin
-from read import read_old_bank_accounts
 from transactionlogger import TransactionLogger
+from accountstore import get_account_store
+from money import format_account
 
 FILE_PATH = "currentaccounts.txt"
+LOG_FILE = "transaction_log.txt"
 
-def clear_data():
-    open(FILE_PATH, 'w').close()
+def clear_data(store=None):
+    if store is None:
+        store = get_account_store(FILE_PATH)
+    store.clear()
 
 def welcome():
     print("=" * 40)
@@ -19,7 +23,7 @@ def welcome():
     print("Default Admin:    number=00001, name=Admin")
     print("Default Standard: number=00002, name=Standard\n")
 
-def prompt_login():
+def prompt_login(store=None):
     # pick role
     while True:
         role = input("Login as (admin/standard)? ").strip().lower()
@@ -30,48 +34,57 @@ def prompt_login():
     while True:
         acc_num = input("Account Number: ").strip()
         name    = input("Account Name  : ").strip()
-        user = login(acc_num, name, active_required=True)
-        if user and (role == "standard" or is_admin(acc_num)):
+        user = login(acc_num, name, active_required=True, store=store)
+        if user and (role == "standard" or is_admin(acc_num, store)):
             print(f"\n✔ Logged in as {name} ({role.capitalize()})\n")
             return user
         print("❌ Login failed or insufficient privileges. Try again.\n")
 
-def print_menu(is_admin_user):
-    print("Select an operation:")
-    menu_items = [
-        ("1", "Create New Account",      True),
-        ("2", "Delete Existing Account", True),
-        ("3", "Disable Account",         True),
-        ("4", "Withdraw Money",          False),
-        ("5", "Deposit Money",           False),
-        ("6", "Transfer Money",          False),
-        ("7", "Pay Bill",                False),
-        ("8", "Change Payment Plan",     True),
-        ("9", "View All Accounts",       False),
-        ("0", "Exit",                    False),
-    ]
-    for code, label, admin_only in menu_items:
+MENU_ITEMS = [
+    ("1", "Create New Account",      True),
+    ("2", "Delete Existing Account", True),
+    ("3", "Disable Account",         True),
+    ("4", "Withdraw Money",          False),
+    ("5", "Deposit Money",           False),
+    ("6", "Transfer Money",          False),
+    ("7", "Pay Bill",                False),
+    ("8", "Change Payment Plan",     True),
+    ("9", "View All Accounts",       False),
+    ("0", "Exit",                    False),
+]
+
+def menu_lines(is_admin_user):
+    lines = ["Select an operation:"]
+    for code, label, admin_only in MENU_ITEMS:
         if not admin_only or is_admin_user:
-            print(f"  {code}. {label}")
+            lines.append(f"  {code}. {label}")
+    return lines
+
+def print_menu(is_admin_user):
+    for line in menu_lines(is_admin_user):
+        print(line)
     return input("Enter choice: ").strip()
 
-def main():
+def main(log_file=LOG_FILE, store=None):
     batch = not sys.stdin.isatty()
+    logger = TransactionLogger(log_file)
+    if store is None:
+        store = get_account_store(FILE_PATH)
 
     if not batch:
         # interactive (or first run in shell): reset + seed
-        clear_data()
-        am = AccountManager()
+        clear_data(store)
+        am = AccountManager(store, logger)
         am.create_sample_account()
         welcome()
-        user = prompt_login()
+        user = prompt_login(store)
     else:
         # batch mode: do _not_ clear or reseed
-        user = prompt_login()
-        am = AccountManager()
+        user = prompt_login(store)
+        am = AccountManager(store, logger)
 
-    ts = TransactionSystem()
-    admin_flag = is_admin(user['account_number'])
+    ts = TransactionSystem(store, logger)
+    admin_flag = user['account_type'] == 'admin'
 
     while True:
         choice = print_menu(admin_flag)
@@ -94,8 +107,8 @@ def main():
             ts.interactive_change_plan()
         elif choice == "9":
             print("\nCurrent Accounts:")
-            for acc in read_old_bank_accounts(FILE_PATH):
-                print(acc)
+            for acc in store.accounts():
+                print(format_account(acc))
         elif choice == "0":
             break
         else:
@@ -103,10 +116,10 @@ def main():
 
     # End of session
     print("\n--- Final Account List ---")
-    for acc in read_old_bank_accounts(FILE_PATH):
-        print(acc)
+    for acc in store.accounts():
+        print(format_account(acc))
     print("\n--- Ending Session ---")
-    TransactionLogger().end_session()
+    logger.end_session()
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,78 @@
+import functools
+import os
+import time
+
+# Read once at import: when instrumentation is off, instrumented() hands back
+# the undecorated function and the explicit record() calls are skipped behind
+# an `if ENABLED` check, so the hot paths pay nothing.
+ENABLED = os.environ.get("BANK_INSTRUMENT", "") not in ("", "0")
+
+STAT_FIELDS = ("calls", "wall_time", "bytes_read", "bytes_written", "file_opens", "records")
+
+_stats = {}
+
+
+def _stats_for(operation):
+    stats = _stats.get(operation)
+    if stats is None:
+        stats = _stats[operation] = dict.fromkeys(STAT_FIELDS, 0)
+    return stats
+
+
+def record(operation, calls=0, wall_time=0.0, bytes_read=0, bytes_written=0, file_opens=0, records=0):
+    """Adds counters to an operation's totals."""
+    stats = _stats_for(operation)
+    stats["calls"] += calls
+    stats["wall_time"] += wall_time
+    stats["bytes_read"] += bytes_read
+    stats["bytes_written"] += bytes_written
+    stats["file_opens"] += file_opens
+    stats["records"] += records
+
+
+def operation_name(func):
+    return f"{func.__module__}.{func.__qualname__}"
+
+
+def instrumented(func):
+    """
+    Decorator that counts calls and wall time of `func` under its qualified
+    name. Returns `func` itself when instrumentation is disabled.
+    """
+    if not ENABLED:
+        return func
+    name = operation_name(func)
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            record(name, calls=1, wall_time=time.perf_counter() - start)
+    return wrapper
+
+
+def summary():
+    """Returns a copy of the per-operation totals."""
+    return {operation: dict(stats) for operation, stats in _stats.items()}
+
+
+def reset():
+    _stats.clear()
+
+
+def format_summary():
+    lines = ["--- Instrumentation Summary ---"]
+    for operation in sorted(_stats):
+        stats = _stats[operation]
+        lines.append(f"{operation}: calls={stats['calls']} wall={stats['wall_time'] * 1000:.3f}ms "
+                     f"read={stats['bytes_read']}B written={stats['bytes_written']}B "
+                     f"opens={stats['file_opens']} records={stats['records']}")
+    return "\n".join(lines)
+
+
+def dump_summary():
+    """Prints the summary when instrumentation is enabled."""
+    if ENABLED:
+        print(format_summary())
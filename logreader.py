@@ -0,0 +1,180 @@
+try:
+    import numpy as np
+except ImportError:  # NumPy is optional; only aggregate_log_columnar needs it.
+    np = None
+
+from transactionlogger import TRANSFER_CREDIT
+
+END_OF_SESSION = "00"
+INVALID_RECORD = "Invalid transaction record"
+
+# Fixed-width record written by TransactionLogger: CC_AAAAAAAAAA_NNNNNN_PPPPPP_MM
+LINE_LENGTH = 30
+RECORD_LENGTH = LINE_LENGTH + 1
+CODE = slice(0, 2)
+NUMBER = slice(14, 20)
+AMOUNT = slice(21, 27)
+MISC = slice(28, 30)
+SEPARATORS = (2, 13, 20, 27)
+
+# Effect of each transaction code's amount on the account balance, before
+# plan fees: withdrawals, transfers and bill payments take money out,
+# deposits and new accounts' initial balances put it in.
+BALANCE_SIGNS = {"01": -1, "02": -1, "03": -1, "04": 1, "05": 1}
+
+
+def balance_sign(code, misc):
+    """Sign of a record's amount in its account's balance (see BALANCE_SIGNS)."""
+    if code == "02" and misc == TRANSFER_CREDIT:
+        return 1
+    return BALANCE_SIGNS.get(code, 0)
+
+
+def _ascii_digits(text):
+    return text.isascii() and text.isdigit()
+
+
+def parse_log_line(line):
+    """
+    Splits a CC_AAAAAAAAAA_NNNNNN_PPPPPP_MM record into
+    (code, name, account_number, amount_cents, misc).
+    Returns None if the record is malformed. The amount must be zero-padded
+    to six ASCII digits, as TransactionLogger writes it; only amounts of
+    1000000 cents and more take the extra width they need.
+    """
+    fields = line.rstrip('\n').rsplit('_', 3)
+    if len(fields) != 4:
+        return None
+    head, number, amount, misc = fields
+    code = head[0:2]
+    if (len(head) != 13 or head[2] != '_' or len(number) != 6 or len(misc) != 2
+            or not _ascii_digits(code + number) or not _ascii_digits(amount)
+            or amount != f"{int(amount):06d}"):
+        return None
+    return code, head[3:].rstrip(), number.lstrip('0') or '0', int(amount), misc
+
+
+def iter_log(file_path, errors=None):
+    """
+    Lazily yields (line_number, record) for every well-formed record of a
+    transaction log, record being parse_log_line's tuple. Malformed lines are
+    reported in read_old_bank_accounts' fatal error format and skipped; when
+    an `errors` list is given, their (line_number, message) pairs are also
+    appended to it.
+    """
+    with open(file_path, 'r') as file:
+        for line_num, line in enumerate(file, 1):
+            record = parse_log_line(line)
+            if record is None:
+                print(f"ERROR: Fatal error - Line {line_num}: {INVALID_RECORD}")
+                if errors is not None:
+                    errors.append((line_num, INVALID_RECORD))
+                continue
+            yield line_num, record
+
+
+def _add(table, key, amount, net):
+    totals = table.get(key)
+    if totals is None:
+        totals = table[key] = {'count': 0, 'total': 0, 'net': 0}
+    totals['count'] += 1
+    totals['total'] += amount
+    totals['net'] += net
+
+
+def aggregate_records(records):
+    """
+    Aggregates parse_log_line tuples in one pass. Returns a dict with:
+      - records: number of transactions aggregated
+      - accounts: {account number: totals}
+      - codes: {transaction code: totals}
+    where totals is {'count', 'total' (amount cents), 'net' (balance delta
+    cents, see balance_sign; plan fees are not included)}. End-of-session
+    records are skipped.
+    """
+    accounts = {}
+    codes = {}
+    count = 0
+    for code, _name, account_number, amount, misc in records:
+        if code == END_OF_SESSION:
+            continue
+        net = balance_sign(code, misc) * amount
+        _add(accounts, account_number, amount, net)
+        _add(codes, code, amount, net)
+        count += 1
+    return {'records': count, 'accounts': accounts, 'codes': codes}
+
+
+def aggregate_log(file_path, errors=None):
+    """Streams a transaction log through aggregate_records (see iter_log for `errors`)."""
+    return aggregate_records(record for _line_num, record in iter_log(file_path, errors))
+
+
+def _require_numpy():
+    if np is None:
+        raise ImportError("The columnar log aggregation requires NumPy (pip install numpy)")
+
+
+def _is_digit(block):
+    return ((block >= ord('0')) & (block <= ord('9'))).all(axis=1)
+
+
+def _to_int(block):
+    weights = 10 ** np.arange(block.shape[1] - 1, -1, -1, dtype=np.int64)
+    return (block.astype(np.int64) - ord('0')) @ weights
+
+
+def _group_totals(keys, amounts, nets):
+    unique, inverse = np.unique(keys, return_inverse=True)
+    counts = np.bincount(inverse, minlength=len(unique))
+    totals = np.bincount(inverse, weights=amounts, minlength=len(unique))
+    net = np.bincount(inverse, weights=nets, minlength=len(unique))
+    return unique, counts, totals, net
+
+
+def aggregate_log_columnar(file_path, errors=None):
+    """
+    Vectorized aggregate_log for large merged logs: a log made only of
+    fixed-width records is viewed as one (n, 31) uint8 array, validated and
+    grouped with NumPy. Any other log (a malformed line, an amount wider than
+    six digits) falls back to the streaming aggregate_log, so both return
+    the same result and report the same errors.
+    """
+    _require_numpy()
+    with open(file_path, 'rb') as file:
+        data = file.read()
+    if len(data) % RECORD_LENGTH:
+        return aggregate_log(file_path, errors)
+    rows = np.frombuffer(data, dtype=np.uint8).reshape(-1, RECORD_LENGTH)
+    well_formed = ((rows[:, LINE_LENGTH] == ord('\n')).all() and (rows < 128).all()
+                   and (rows[:, MISC] != ord('_')).all())
+    for column in SEPARATORS:
+        well_formed = well_formed and (rows[:, column] == ord('_')).all()
+    if not (well_formed and _is_digit(rows[:, CODE]).all() and _is_digit(rows[:, NUMBER]).all()
+            and _is_digit(rows[:, AMOUNT]).all()):
+        return aggregate_log(file_path, errors)
+
+    codes = _to_int(rows[:, CODE])
+    keep = codes != int(END_OF_SESSION)
+    codes = codes[keep]
+    numbers = _to_int(rows[keep][:, NUMBER])
+    amounts = _to_int(rows[keep][:, AMOUNT])
+    signs = np.zeros(100, dtype=np.int64)
+    for code, sign in BALANCE_SIGNS.items():
+        signs[int(code)] = sign
+    nets = signs[codes] * amounts
+    misc = rows[keep][:, MISC]
+    credits = ((codes == 2) & (misc[:, 0] == ord(TRANSFER_CREDIT[0]))
+               & (misc[:, 1] == ord(TRANSFER_CREDIT[1])))
+    nets[credits] = -nets[credits]
+
+    def grouped(keys, name):
+        unique, counts, totals, net = _group_totals(keys, amounts, nets)
+        return {name(key): {'count': int(c), 'total': int(t), 'net': int(n)}
+                for key, c, t, n in zip(unique.tolist(), counts, totals, net)}
+
+    return {
+        'records': int(len(codes)),
+        'accounts': grouped(numbers, str),
+        'codes': grouped(codes, lambda code: f"{code:02d}"),
+    }
@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+import argparse
+import csv
+import sys
+from money import parse_amount
+
+# Fields of one manifest entry for each bulk AccountManager operation and
+# for TransactionSystem.pay_bills ("pay").
+MANIFEST_FIELDS = {
+    "create": ("account_number", "name", "acc_type", "balance"),
+    "disable": ("account_number", "name"),
+    "delete": ("account_number", "name"),
+    "pay": ("account_number", "name", "company", "amount"),
+}
+# Fields holding a dollar amount, converted to integer cents.
+AMOUNT_FIELDS = ("balance", "amount")
+# Fixed-width manifest lines: NNNNN AAAAAAAAAAAAAAAAAAAA TTTTT BBBBBBBB
+# (account number, holder name, then for "create" the account type and the
+# initial balance in dollars), or NNNNN AAAAAAAAAAAAAAAAAAAA CC BBBBBBBB for
+# "pay" (company code and amount); CSV manifests list the same fields in order.
+FIXED_COLUMNS = {
+    "account_number": slice(0, 5),
+    "name": slice(6, 26),
+    "acc_type": slice(27, 32),
+    "balance": slice(33, 41),
+    "company": slice(27, 29),
+    "amount": slice(30, 38),
+}
+
+
+def _rows(file_path: str, fields):
+    with open(file_path, 'r', newline='') as file:
+        lines = file.read().splitlines()
+    text = [line for line in lines if line.strip()]
+    if text and ',' in text[0]:
+        for line_num, row in enumerate(csv.reader(lines), 1):
+            if row and any(cell.strip() for cell in row):
+                yield line_num, [cell.strip() for cell in row]
+        return
+    for line_num, line in enumerate(lines, 1):
+        if line.strip():
+            yield line_num, [line[FIXED_COLUMNS[field]].strip() for field in fields]
+
+
+def read_manifest(file_path: str, action: str):
+    """
+    Reads a CSV or fixed-width manifest for a bulk "create", "disable",
+    "delete" or "pay" run and returns (entries, errors): one dict per valid
+    line, with balances and amounts in integer cents, and (line_number,
+    message) pairs for the others. A CSV header row naming the fields is skipped.
+    """
+    fields = MANIFEST_FIELDS[action]
+    entries = []
+    errors = []
+    for line_num, row in _rows(file_path, fields):
+        if [cell.lower() for cell in row] == list(fields) and not entries and not errors:
+            continue
+        if len(row) != len(fields):
+            errors.append((line_num, f"Expected {len(fields)} fields ({', '.join(fields)}), got {len(row)}"))
+            continue
+        entry = dict(zip(fields, row))
+        try:
+            for field in AMOUNT_FIELDS:
+                if field in entry:
+                    entry[field] = parse_amount(entry[field])
+        except ValueError:
+            errors.append((line_num, f"Invalid {field} amount '{entry[field]}'"))
+            continue
+        entries.append(entry)
+    return entries, errors
+
+
+def main(argv=None):
+    from accountmanagement import AccountManager
+    from accountlock import StaleSnapshotError
+    from accountstore import AccountStore
+    from money import format_amount
+    from print_error import log_constraint_error
+    from transactionlogger import TransactionLogger
+    from transactionsystem import TransactionSystem
+    parser = argparse.ArgumentParser(description="Create, disable or delete accounts or pay bills listed in a manifest.")
+    parser.add_argument("action", choices=sorted(MANIFEST_FIELDS), help="bulk operation to run")
+    parser.add_argument("manifest", help="CSV or fixed-width manifest file")
+    parser.add_argument("--accounts", default="currentaccounts.txt", help="accounts file")
+    parser.add_argument("--log", default="transaction_log.txt", help="transaction log to append to")
+    args = parser.parse_args(argv)
+
+    entries, errors = read_manifest(args.manifest, args.action)
+    for line_num, message in errors:
+        log_constraint_error("Manifest", f"Line {line_num}: {message}")
+    if errors:
+        return 1
+    logger = TransactionLogger(args.log)
+    store = AccountStore(args.accounts)
+    if args.action == "pay":
+        operation = TransactionSystem(store, logger).pay_bills
+    else:
+        manager = AccountManager(store, logger)
+        operation = {"create": manager.create_accounts, "disable": manager.disable_accounts,
+                     "delete": manager.delete_accounts}[args.action]
+    try:
+        result = operation(entries)
+    except (OSError, ValueError, StaleSnapshotError) as e:
+        log_constraint_error("Manifest", f"Bulk {args.action} not applied: {e}")
+        return 1
+    finally:
+        logger.close()
+    # A False result was already reported by the operation.
+    if args.action != "pay" or not result:
+        return 0 if result else 1
+    for code, totals in result["settlement"].items():
+        print(f"Settlement {code}: {totals['count']} payments, {format_amount(totals['total'])}")
+    return 0 if not result["rejected"] else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,104 @@
+import mmap
+from typing import Optional
+import instrumentation
+import accountcache
+from money import MAX_BALANCE_CENTS, format_amount, format_balance_field
+
+# Every record written by write_new_current_accounts is 45 characters plus '\n':
+# NNNNN AAAAAAAAAAAAAAAAAAAA S PPPPPPPP TTTT PP
+RECORD_LENGTH = 46
+STATUS_OFFSET = 27
+BALANCE_OFFSET = 29
+BALANCE_WIDTH = 8
+TRANSACTIONS_OFFSET = 38
+TRANSACTIONS_WIDTH = 4
+
+
+class MappedAccountsFile:
+    """
+    Memory-mapped view of the Current Bank Accounts File for in-place updates.
+
+    Opening the file builds an index from normalized account number to the
+    byte offset of its record. The balance, transaction count and status
+    fields can then be overwritten in place, so an update costs the same
+    regardless of how many accounts the file holds. set_record() replaces a
+    whole record with another line of the same account number.
+    """
+
+    def __init__(self, file_path: str):
+        self.file_path = file_path
+        self._file = open(file_path, 'r+b')
+        self._map = None
+        self._offsets = {}
+        size = self._file.seek(0, 2)
+        if size % RECORD_LENGTH != 0:
+            self._file.close()
+            raise ValueError(f"{file_path} is not a fixed-width accounts file "
+                             f"({size} bytes is not a multiple of {RECORD_LENGTH})")
+        if size:
+            self._map = mmap.mmap(self._file.fileno(), 0)
+            for offset in range(0, size, RECORD_LENGTH):
+                number = self._map[offset:offset + 5].decode('ascii')
+                self._offsets.setdefault(number.lstrip('0') or '0', offset)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def __contains__(self, account_number: str) -> bool:
+        return account_number in self._offsets
+
+    def offset_of(self, account_number: str) -> Optional[int]:
+        """Returns the byte offset of a record keyed by normalized account number."""
+        return self._offsets.get(account_number)
+
+    def _write_field(self, account_number: str, field_offset: int, value: str) -> None:
+        offset = self._offsets.get(account_number)
+        if offset is None:
+            raise KeyError(f"Account {account_number} is not in {self.file_path}")
+        start = offset + field_offset
+        self._map[start:start + len(value)] = value.encode('ascii')
+        if instrumentation.ENABLED:
+            instrumentation.record("mappedaccounts.MappedAccountsFile.write_field",
+                                   calls=1, bytes_written=len(value), records=1)
+
+    def set_balance(self, account_number: str, balance: int) -> None:
+        if balance < 0:
+            raise ValueError(f"Negative balance detected: {format_amount(balance)}")
+        if balance > MAX_BALANCE_CENTS:
+            raise ValueError(f"Balance exceeds maximum $99999.99: {format_amount(balance)}")
+        self._write_field(account_number, BALANCE_OFFSET, format_balance_field(balance))
+
+    def set_transactions(self, account_number: str, count: int) -> None:
+        if not 0 <= count <= 9999:
+            raise ValueError(f"Transaction count must fit in 4 digits, got {count}")
+        self._write_field(account_number, TRANSACTIONS_OFFSET, f"{count:04d}")
+
+    def set_status(self, account_number: str, status: str) -> None:
+        if status not in ('A', 'D'):
+            raise ValueError(f"Invalid status '{status}'. Must be 'A' or 'D'")
+        self._write_field(account_number, STATUS_OFFSET, status)
+
+    def set_record(self, account_number: str, line: str) -> None:
+        """Overwrites a record with a line produced by format_account_line."""
+        if len(line) != RECORD_LENGTH or line[-1] != '\n':
+            raise ValueError(f"Record must be {RECORD_LENGTH - 1} characters plus a newline")
+        if (line[0:5].lstrip('0') or '0') != account_number:
+            raise ValueError(f"Record is for account {line[0:5]}, not {account_number}")
+        self._write_field(account_number, 0, line)
+
+    def flush(self) -> None:
+        if self._map is not None:
+            self._map.flush()
+            # Writes through the map need not update the file's mtime, so the
+            # parsed snapshot cannot be trusted to notice them.
+            accountcache.invalidate(self.file_path)
+
+    def close(self) -> None:
+        if self._map is not None:
+            self._map.flush()
+            self._map.close()
+            self._map = None
+        self._file.close()
@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+import argparse
+import heapq
+import itertools
+import os
+import sys
+import tempfile
+from logreader import END_OF_SESSION, parse_log_line
+
+MERGED_LOG_PATH = "merged_daily_transactions.txt"
+# The record TransactionLogger.end_session() writes.
+END_OF_SESSION_LINE = f"{END_OF_SESSION}_{'END_OF_SE':<10}_{0:06d}_{0:06d}_ES\n"
+
+# What happens to the sessions' end-of-session records:
+#   "keep"   - copied through, one per session (plain concatenation)
+#   "strip"  - dropped
+#   "single" - dropped, and one END_OF_SESSION_LINE closes the merged log
+TERMINATOR_POLICIES = ("keep", "strip", "single")
+# Lines sorted in memory at a time when ordering by account number.
+RUN_LINES = 100_000
+
+
+def _is_terminator(line):
+    return line.startswith(END_OF_SESSION + "_")
+
+
+def account_key(line):
+    """
+    Sort key ordering records by account number; malformed records sort
+    after every account so the back end still reports them.
+    """
+    record = parse_log_line(line)
+    if record is None:
+        return (1, 0)
+    return (0, int(record[2]))
+
+
+def _session_lines(log_paths, keep_terminators):
+    for log_path in log_paths:
+        if not os.path.exists(log_path):
+            continue
+        with open(log_path, 'r') as log:
+            for line in log:
+                if not line.endswith('\n'):
+                    line += '\n'
+                if keep_terminators or not _is_terminator(line):
+                    yield line
+
+
+def _sorted_runs(lines, run_dir, run_lines):
+    """
+    Splits the stream into sorted runs of at most run_lines lines, spilled to
+    files in run_dir, and returns the run file paths in stream order.
+    """
+    runs = []
+    while True:
+        chunk = list(itertools.islice(lines, run_lines))
+        if not chunk:
+            return runs
+        chunk.sort(key=account_key)
+        path = os.path.join(run_dir, f"run{len(runs)}.txt")
+        with open(path, 'w') as run:
+            run.writelines(chunk)
+        runs.append(path)
+
+
+def merge_logs(log_paths, merged_path=MERGED_LOG_PATH, terminators="keep", by_account=False,
+               run_lines=RUN_LINES):
+    """
+    Merges session logs, taken in the given order, into one transaction log
+    with memory bounded by run_lines whatever the size of the inputs.
+    Missing logs are skipped and a last line without its newline gets one.
+
+    terminators selects a TERMINATOR_POLICIES entry; the default, "keep",
+    matches plain concatenation and replay.py. With by_account the records
+    are ordered by account number, as the back end's merge-join against the
+    accounts file needs: sorted runs are merged k-way, and because the sort
+    and the merge are both stable, each account's records keep their
+    session order and their order within a session. Returns the
+    number of records written, trailer included.
+    """
+    if terminators not in TERMINATOR_POLICIES:
+        raise ValueError(f"Invalid terminator policy '{terminators}'. Must be one of {', '.join(TERMINATOR_POLICIES)}")
+    lines = _session_lines(log_paths, terminators == "keep")
+    count = 0
+    temp_path = f"{merged_path}.tmp"
+    with tempfile.TemporaryDirectory(prefix="mergelogs_") as run_dir:
+        run_files = []
+        try:
+            if by_account:
+                run_files = [open(path, 'r') for path in _sorted_runs(lines, run_dir, run_lines)]
+                lines = heapq.merge(*run_files, key=account_key)
+            with open(temp_path, 'w') as merged:
+                for line in lines:
+                    merged.write(line)
+                    count += 1
+                if terminators == "single":
+                    merged.write(END_OF_SESSION_LINE)
+                    count += 1
+        finally:
+            for run in run_files:
+                run.close()
+    os.replace(temp_path, merged_path)
+    return count
+
+
+def main(argv=None):
+    from replay import session_sort_key
+    parser = argparse.ArgumentParser(description="Merge per-session transaction logs.")
+    parser.add_argument("logs", nargs="+", help="session log files (merged in natural name order)")
+    parser.add_argument("-o", "--output", default=MERGED_LOG_PATH, help="merged transaction log to write")
+    parser.add_argument("--terminators", choices=TERMINATOR_POLICIES, default="keep",
+                        help="what to do with the sessions' end-of-session records")
+    parser.add_argument("--by-account", action="store_true", help="order the records by account number")
+    args = parser.parse_args(argv)
+
+    count = merge_logs(sorted(args.logs, key=session_sort_key), args.output, args.terminators, args.by_account)
+    print(f"Merged {len(args.logs)} session logs into {args.output} ({count} records).")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
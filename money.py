@@ -0,0 +1,43 @@
+# Money is held as integer cents everywhere: account balances, transaction
+# amounts, session limits and log records. These helpers convert between
+# cents and the text forms used by the accounts file and user input without
+# going through float.
+
+MAX_BALANCE_CENTS = 9999999
+
+
+def parse_balance_field(text: str) -> int:
+    """Parses an already validated fixed-width XXXXX.XX balance field."""
+    return int(text[:5]) * 100 + int(text[6:8])
+
+
+def parse_amount(text: str) -> int:
+    """
+    Parses a user-entered dollar amount ("300", "12.5", "800.00") to cents.
+    Raises ValueError for anything that is not a plain unsigned decimal with
+    at most two decimal places.
+    """
+    text = text.strip()
+    dollars, _, cents = text.partition('.')
+    if not (dollars or cents) or len(cents) > 2:
+        raise ValueError(f"Invalid amount: {text}")
+    if (dollars and not dollars.isdigit()) or (cents and not cents.isdigit()):
+        raise ValueError(f"Invalid amount: {text}")
+    return int(dollars or '0') * 100 + int(cents.ljust(2, '0'))
+
+
+def format_balance_field(cents: int) -> str:
+    """Formats cents as the fixed-width XXXXX.XX balance field."""
+    return f"{cents // 100:05d}.{cents % 100:02d}"
+
+
+def format_amount(cents: int) -> str:
+    """Formats cents as a plain dollar amount for messages, e.g. 1250 -> 12.50."""
+    sign = '-' if cents < 0 else ''
+    cents = abs(cents)
+    return f"{sign}{cents // 100}.{cents % 100:02d}"
+
+
+def format_account(acc) -> str:
+    """Formats an account record for listings: its fields, balance in dollars."""
+    return repr({**acc, 'balance': format_amount(acc['balance'])})
@@ -1,12 +1,40 @@
 import unittest
-from unittest.mock import patch, mock_open
+from unittest.mock import MagicMock, patch, mock_open
 from io import StringIO
 from accountmanagement import AccountManager
 from print_error import log_constraint_error
 from read import read_old_bank_accounts
 from write import write_new_current_accounts
-from authsystem import login, is_admin
+from authsystem import login, is_admin, capabilities
 from transactionsystem import TransactionSystem
+from transactionlogger import TransactionLogger
+from accountstore import AccountStore, reset_account_stores
+from mappedaccounts import MappedAccountsFile
+from accountjournal import journal_path
+from backend import run_backend
+from replay import replay_sessions, session_sort_key
+from sessionengine import SessionEngine, parse_session_script
+from benchmark import generate_accounts, generate_accounts_file, run_benchmarks
+from server import BankServer, AccountLocks
+from accountlock import StaleSnapshotError
+from concurrent.futures import ProcessPoolExecutor
+from read import iter_accounts, find_account
+from account import Account
+from logreader import iter_log, aggregate_log, parse_log_line
+import logreader
+import rollup
+from archive import AccountsArchive
+import accountcache
+from manifest import read_manifest, main as manifest_main
+from mergelogs import merge_logs, END_OF_SESSION_LINE
+from money import parse_amount, parse_balance_field, format_account, format_amount, format_balance_field
+import columnar
+import instrumentation
+import read
+import write
+import asyncio
+import os
+import tempfile
 
 
 def build_account_line(account_number, name, status, balance, txns="00000"):
@@ -50,19 +78,19 @@ class TestRead(unittest.TestCase):
 class TestWrite(unittest.TestCase):
     def test_invalid_account_number(self):
         accounts = [{'account_number': 'abcde', 'name': 'User', 'status': 'A',
-                     'balance': 100.0, 'total_transactions': 0}]
+                     'balance': 10000, 'total_transactions': 0}]
         with self.assertRaises(ValueError):
             write_new_current_accounts(accounts, "file.txt")
 
     def test_name_too_long(self):
         accounts = [{'account_number': '12345', 'name': 'A'*25, 'status': 'A',
-                     'balance': 100.0, 'total_transactions': 0}]
+                     'balance': 10000, 'total_transactions': 0}]
         with self.assertRaises(ValueError):
             write_new_current_accounts(accounts, "file.txt")
 
     def test_invalid_status(self):
         accounts = [{'account_number': '12345', 'name': 'User', 'status': 'Z',
-                     'balance': 100.0, 'total_transactions': 0}]
+                     'balance': 10000, 'total_transactions': 0}]
         with self.assertRaises(ValueError):
             write_new_current_accounts(accounts, "file.txt")
 
@@ -74,60 +102,73 @@ class TestWrite(unittest.TestCase):
 
     def test_balance_out_of_range(self):
         accounts = [{'account_number': '12345', 'name': 'User', 'status': 'A',
-                     'balance': 100000.0, 'total_transactions': 0}]
+                     'balance': 10000000, 'total_transactions': 0}]
         with self.assertRaises(ValueError):
             write_new_current_accounts(accounts, "file.txt")
 
+    def test_open_error_is_not_hidden(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            with self.assertRaises(FileNotFoundError) as raised:
+                write_new_current_accounts([], os.path.join(tmp, "missing", "accounts.txt"))
+            # The open error itself, not one raised while cleaning up after it.
+            self.assertIsNone(raised.exception.__context__)
+
 class TestAuthSystem(unittest.TestCase):
-    @patch('read.read_old_bank_accounts')
+    def setUp(self):
+        reset_account_stores()
+
+    @patch('accountstore.read_old_bank_accounts')
     def test_login_success(self, mock_read):
         mock_read.return_value = [{'account_number': '1', 'name': 'Admin', 'status': 'A'}]
         self.assertIsNotNone(login('00001', 'Admin'))
 
-    @patch('read.read_old_bank_accounts')
+    @patch('accountstore.read_old_bank_accounts')
     def test_login_fail_name(self, mock_read):
         mock_read.return_value = [{'account_number': '1', 'name': 'Admin', 'status': 'A'}]
         self.assertIsNone(login('00001', 'WrongName'))
 
-    @patch('read.read_old_bank_accounts')
+    @patch('accountstore.read_old_bank_accounts')
     def test_login_inactive(self, mock_read):
         mock_read.return_value = [{'account_number': '1', 'name': 'Admin', 'status': 'D'}]
         self.assertIsNone(login('00001', 'Admin'))
 
-    @patch('read.read_old_bank_accounts')
+    @patch('accountstore.read_old_bank_accounts')
     def test_is_admin_true(self, mock_read):
         mock_read.return_value = [{'account_number': '1', 'name': 'Admin'}]
         self.assertTrue(is_admin('00001'))
 
-    @patch('read.read_old_bank_accounts')
+    @patch('accountstore.read_old_bank_accounts')
     def test_is_admin_false(self, mock_read):
         mock_read.return_value = [{'account_number': '2', 'name': 'User'}]
         self.assertFalse(is_admin('00002'))
 
 class TestTransactionSystem(unittest.TestCase):
+    def setUp(self):
+        reset_account_stores()
+
     @patch("transactionsystem.input")
     @patch("transactionsystem.login")
-    @patch("transactionsystem.read_old_bank_accounts")
-    @patch("transactionsystem.write_new_current_accounts")
+    @patch("accountstore.read_old_bank_accounts")
+    @patch("accountstore.write_new_current_accounts")
     def test_interactive_withdraw_success(self, mock_write, mock_read, mock_login, mock_input):
         ts = TransactionSystem()
         mock_input.side_effect = ['n', 'User', '12345', '100']
-        mock_login.return_value = {'account_number': '12345','name':'User','status':'A','balance':200,'account_type':'basic'}
-        mock_read.return_value = [{'account_number': '12345', 'balance': 200}]
+        mock_login.return_value = {'account_number': '12345','name':'User','status':'A','balance':20000,'account_type':'basic'}
+        mock_read.return_value = [{'account_number': '12345', 'balance': 20000}]
         result = ts.interactive_withdraw()
         self.assertTrue(result)
         mock_write.assert_called_once()
         written_accounts = mock_write.call_args[0][0]
-        self.assertEqual(written_accounts[0]['balance'], 100.0)
+        self.assertEqual(written_accounts[0]['balance'], 10000)
 
     @patch("transactionsystem.input")
     @patch("transactionsystem.login")
     def test_interactive_transfer_success(self, mock_login, mock_input):
         ts = TransactionSystem()
         mock_input.side_effect = ['n', 'User', '12345', '67890', '50']
-        mock_login.return_value = {'account_number':'12345','name':'User','status':'A','balance':200,'account_type':'basic'}
-        with patch("transactionsystem.read_old_bank_accounts", return_value=[{'account_number':'12345','balance':200},{'account_number':'67890','balance':100}]):
-            with patch("transactionsystem.write_new_current_accounts"):
+        mock_login.return_value = {'account_number':'12345','name':'User','status':'A','balance':20000,'account_type':'basic'}
+        with patch("accountstore.read_old_bank_accounts", return_value=[{'account_number':'12345','balance':20000},{'account_number':'67890','balance':10000}]):
+            with patch("accountstore.write_new_current_accounts"):
                 self.assertTrue(ts.interactive_transfer())
 
     @patch("transactionsystem.input")
@@ -135,9 +176,9 @@ class TestTransactionSystem(unittest.TestCase):
     def test_interactive_pay_bill_success(self, mock_login, mock_input):
         ts = TransactionSystem()
         mock_input.side_effect = ['n','User','12345','Fast Internet, Inc. (FI)','100']
-        mock_login.return_value = {'account_number':'12345','name':'User','status':'A','balance':200,'account_type':'basic'}
-        with patch("transactionsystem.read_old_bank_accounts", return_value=[{'account_number':'12345','balance':200}]):
-            with patch("transactionsystem.write_new_current_accounts"):
+        mock_login.return_value = {'account_number':'12345','name':'User','status':'A','balance':20000,'account_type':'basic'}
+        with patch("accountstore.read_old_bank_accounts", return_value=[{'account_number':'12345','balance':20000}]):
+            with patch("accountstore.write_new_current_accounts"):
                 self.assertTrue(ts.interactive_pay_bill())
 
     @patch("transactionsystem.input")
@@ -146,8 +187,8 @@ class TestTransactionSystem(unittest.TestCase):
         ts = TransactionSystem()
         mock_input.side_effect = ['y','User','12345']
         mock_login.return_value = {'account_number':'12345','name':'User','status':'A','account_type':'SP'}
-        with patch("transactionsystem.read_old_bank_accounts", return_value=[{'account_number':'12345','account_type':'SP'}]):
-            with patch("transactionsystem.write_new_current_accounts"):
+        with patch("accountstore.read_old_bank_accounts", return_value=[{'account_number':'12345','account_type':'SP'}]):
+            with patch("accountstore.write_new_current_accounts"):
                 self.assertTrue(ts.interactive_change_plan())
 
     @patch("transactionsystem.input")
@@ -159,100 +200,112 @@ class TestTransactionSystem(unittest.TestCase):
         self.assertTrue(ts.interactive_deposit())
 
 class TestTransactionSystemEdgeCases(unittest.TestCase):
+    def setUp(self):
+        reset_account_stores()
+
     @patch("transactionsystem.input")
     @patch("transactionsystem.login")
-    @patch("transactionsystem.read_old_bank_accounts")
-    @patch("transactionsystem.write_new_current_accounts")
+    @patch("accountstore.read_old_bank_accounts")
+    @patch("accountstore.write_new_current_accounts")
     def test_withdraw_exceeds_session_limit(self, mock_write, mock_read, mock_login, mock_input):
         ts = TransactionSystem()
-        ts.session_withdraw_total = 450
+        ts.session_withdraw_total = 450_00
         mock_input.side_effect = ['n','User','12345','100']
-        mock_login.return_value = {'account_number':'12345','name':'User','status':'A','balance':1000,'account_type':'basic'}
-        mock_read.return_value = [{'account_number':'12345','balance':1000}]
+        mock_login.return_value = {'account_number':'12345','name':'User','status':'A','balance':1000_00,'account_type':'basic'}
+        mock_read.return_value = [{'account_number':'12345','balance':1000_00}]
         result = ts.interactive_withdraw()
         self.assertFalse(result)
+        self.assertEqual(ts.last_error, "Withdraw: Exceeds maximum withdrawal limit for this session ($500.00)")
 
     @patch("transactionsystem.input")
     @patch("transactionsystem.login")
-    @patch("transactionsystem.read_old_bank_accounts")
-    @patch("transactionsystem.write_new_current_accounts")
+    @patch("accountstore.read_old_bank_accounts")
+    @patch("accountstore.write_new_current_accounts")
     def test_transfer_exceeds_session_limit(self, mock_write, mock_read, mock_login, mock_input):
         ts = TransactionSystem()
-        ts.session_transfer_total = 900
+        ts.session_transfer_total = 900_00
         mock_input.side_effect = ['n','User','12345','67890','200']
-        mock_login.return_value = {'account_number':'12345','name':'User','status':'A','balance':1000,'account_type':'basic'}
-        mock_read.return_value = [{'account_number':'12345','balance':1000},{'account_number':'67890','balance':500}]
+        mock_login.return_value = {'account_number':'12345','name':'User','status':'A','balance':1000_00,'account_type':'basic'}
+        mock_read.return_value = [{'account_number':'12345','balance':1000_00},{'account_number':'67890','balance':500_00}]
         result = ts.interactive_transfer()
         self.assertFalse(result)
+        self.assertEqual(ts.last_error, "Transfer: Exceeds maximum transfer limit for this session ($1000.00)")
 
     @patch("transactionsystem.input")
     @patch("transactionsystem.login")
-    @patch("transactionsystem.read_old_bank_accounts")
-    @patch("transactionsystem.write_new_current_accounts")
+    @patch("accountstore.read_old_bank_accounts")
+    @patch("accountstore.write_new_current_accounts")
     def test_pay_bill_exceeds_session_limit(self, mock_write, mock_read, mock_login, mock_input):
         ts = TransactionSystem()
-        ts.session_bill_total = 1900
+        ts.session_bill_total = 1900_00
         mock_input.side_effect = ['n','User','12345','Fast Internet, Inc. (FI)','200']
-        mock_login.return_value = {'account_number':'12345','name':'User','status':'A','balance':5000,'account_type':'basic'}
-        mock_read.return_value = [{'account_number':'12345','balance':5000}]
+        mock_login.return_value = {'account_number':'12345','name':'User','status':'A','balance':5000_00,'account_type':'basic'}
+        mock_read.return_value = [{'account_number':'12345','balance':5000_00}]
         result = ts.interactive_pay_bill()
         self.assertFalse(result)
+        self.assertEqual(ts.last_error, "Pay Bill: Exceeds maximum bill payment limit for this session ($2000.00)")
 
 class TestTransactionSystemAdminLimits(unittest.TestCase):
+    def setUp(self):
+        reset_account_stores()
+
     @patch("transactionsystem.input")
     @patch("transactionsystem.login")
-    @patch("transactionsystem.read_old_bank_accounts")
-    @patch("transactionsystem.write_new_current_accounts")
+    @patch("accountstore.read_old_bank_accounts")
+    @patch("accountstore.write_new_current_accounts")
     def test_withdraw_admin_no_limit(self, mock_write, mock_read, mock_login, mock_input):
         ts = TransactionSystem()
         mock_input.side_effect = ['n','AdminUser','12345','600']
-        mock_login.return_value = {'account_number':'12345','name':'AdminUser','status':'A','balance':1000,'account_type':'admin'}
-        mock_read.return_value = [{'account_number':'12345','balance':1000}]
+        mock_login.return_value = {'account_number':'12345','name':'AdminUser','status':'A','balance':100000,'account_type':'admin'}
+        mock_read.return_value = [{'account_number':'12345','balance':100000}]
         result = ts.interactive_withdraw()
         self.assertTrue(result)
         mock_write.assert_called_once()
         written_accounts = mock_write.call_args[0][0]
-        self.assertEqual(written_accounts[0]['balance'], 400.0)
+        self.assertEqual(written_accounts[0]['balance'], 40000)
 
     @patch("transactionsystem.input")
     @patch("transactionsystem.login")
-    @patch("transactionsystem.read_old_bank_accounts")
-    @patch("transactionsystem.write_new_current_accounts")
+    @patch("accountstore.read_old_bank_accounts")
+    @patch("accountstore.write_new_current_accounts")
     def test_transfer_admin_no_limit(self, mock_write, mock_read, mock_login, mock_input):
         ts = TransactionSystem()
         mock_input.side_effect = ['n','AdminUser','12345','54321','1500']
-        mock_login.return_value = {'account_number':'12345','name':'AdminUser','status':'A','balance':2000,'account_type':'admin'}
-        mock_read.return_value = [{'account_number':'12345','balance':2000},{'account_number':'54321','balance':500}]
+        mock_login.return_value = {'account_number':'12345','name':'AdminUser','status':'A','balance':200000,'account_type':'admin'}
+        mock_read.return_value = [{'account_number':'12345','balance':200000},{'account_number':'54321','balance':50000}]
         result = ts.interactive_transfer()
         self.assertTrue(result)
         mock_write.assert_called_once()
         written_accounts = mock_write.call_args[0][0]
         src = next(a for a in written_accounts if a['account_number']=='12345')
         dst = next(a for a in written_accounts if a['account_number']=='54321')
-        self.assertEqual(src['balance'], 2000.0)
-        self.assertEqual(dst['balance'], 2000.0)
+        self.assertEqual(src['balance'], 50000)
+        self.assertEqual(dst['balance'], 200000)
 
     @patch("transactionsystem.input")
     @patch("transactionsystem.login")
-    @patch("transactionsystem.read_old_bank_accounts")
-    @patch("transactionsystem.write_new_current_accounts")
+    @patch("accountstore.read_old_bank_accounts")
+    @patch("accountstore.write_new_current_accounts")
     def test_pay_bill_admin_no_limit(self, mock_write, mock_read, mock_login, mock_input):
         ts = TransactionSystem()
         mock_input.side_effect = ['n','AdminUser','12345','Fast Internet, Inc. (FI)','3000']
-        mock_login.return_value = {'account_number':'12345','name':'AdminUser','status':'A','balance':5000,'account_type':'admin'}
-        mock_read.return_value = [{'account_number':'12345','balance':5000}]
+        mock_login.return_value = {'account_number':'12345','name':'AdminUser','status':'A','balance':500000,'account_type':'admin'}
+        mock_read.return_value = [{'account_number':'12345','balance':500000}]
         result = ts.interactive_pay_bill()
         self.assertTrue(result)
         mock_write.assert_called_once()
         written_accounts = mock_write.call_args[0][0]
-        self.assertEqual(written_accounts[0]['balance'], 2000.0)
+        self.assertEqual(written_accounts[0]['balance'], 200000)
 
 class TestAccountManagement(unittest.TestCase):
+    def setUp(self):
+        reset_account_stores()
+
     @patch("accountmanagement.input")
     @patch("accountmanagement.login")
     @patch("accountmanagement.is_admin", return_value=True)
-    @patch("accountmanagement.read_old_bank_accounts")
-    @patch("accountmanagement.write_new_current_accounts")
+    @patch("accountstore.read_old_bank_accounts")
+    @patch("accountstore.write_new_current_accounts")
     def test_create_account_success(self, mock_write, mock_read, mock_is_admin, mock_login, mock_input):
         am = AccountManager()
         mock_input.side_effect = ['y','00001','Admin','Test User','12345','basic','1000.00']
@@ -263,8 +316,8 @@ class TestAccountManagement(unittest.TestCase):
     @patch("accountmanagement.input")
     @patch("accountmanagement.login")
     @patch("accountmanagement.is_admin", return_value=True)
-    @patch("accountmanagement.read_old_bank_accounts")
-    @patch("accountmanagement.write_new_current_accounts")
+    @patch("accountstore.read_old_bank_accounts")
+    @patch("accountstore.write_new_current_accounts")
     def test_delete_account_success(self, mock_write, mock_read, mock_is_admin, mock_login, mock_input):
         am = AccountManager()
         mock_input.side_effect = ['y','00001','Admin','CorrectName','12345']
@@ -275,8 +328,8 @@ class TestAccountManagement(unittest.TestCase):
     @patch("accountmanagement.input")
     @patch("accountmanagement.login")
     @patch("accountmanagement.is_admin", return_value=True)
-    @patch("accountmanagement.read_old_bank_accounts")
-    @patch("accountmanagement.write_new_current_accounts")
+    @patch("accountstore.read_old_bank_accounts")
+    @patch("accountstore.write_new_current_accounts")
     def test_disable_account_success(self, mock_write, mock_read, mock_is_admin, mock_login, mock_input):
         am = AccountManager()
         mock_input.side_effect = ['y','00001','Admin','TargetUser','12345']
@@ -284,5 +337,1161 @@ class TestAccountManagement(unittest.TestCase):
         mock_login.return_value = {'account_number':'00001','name':'Admin','status':'A','account_type':'admin'}
         self.assertTrue(am.disable_account())
 
+class TestAccountStore(unittest.TestCase):
+    @patch("accountstore.read_old_bank_accounts")
+    def test_loads_once_and_indexes_normalized(self, mock_read):
+        mock_read.return_value = [
+            {'account_number': '1', 'name': 'Admin', 'status': 'A', 'balance': 1000},
+            {'account_number': '0', 'name': 'END_OF_FILE', 'status': 'A', 'balance': 0},
+        ]
+        store = AccountStore("fake.txt")
+        self.assertEqual(store.get('1')['name'], 'Admin')
+        self.assertIsNone(store.get('00001'))
+        self.assertNotIn('0', store)
+        self.assertTrue(is_admin('00001', store))
+        self.assertIsNotNone(login('00001', 'Admin', store=store))
+        mock_read.assert_called_once_with("fake.txt")
+
+    @patch("accountstore.read_old_bank_accounts", return_value=[])
+    @patch("accountstore.write_new_current_accounts")
+    def test_commit_writes_once(self, mock_write, mock_read):
+        store = AccountStore("fake.txt")
+        store.add({'account_number': '00042', 'name': 'New', 'balance': 500, 'account_type': 'basic'})
+        store.increment_transactions('42')
+        store.commit()
+        mock_write.assert_called_once()
+        written = mock_write.call_args[0][0]
+        self.assertEqual(written, [{'account_number': '42', 'name': 'New', 'status': 'A',
+                                    'balance': 500, 'total_transactions': 1, 'plan': 'NP'}])
+
+def write_sample_accounts(directory):
+    path = os.path.join(directory, "accounts.txt")
+    write_new_current_accounts([
+        {'account_number': '1', 'name': 'Admin', 'status': 'A', 'balance': 1000000, 'total_transactions': 1, 'plan': 'NP'},
+        {'account_number': '2', 'name': 'Standard', 'status': 'A', 'balance': 500000, 'total_transactions': 0, 'plan': 'SP'},
+    ], path)
+    return path
+
+class TestMappedAccounts(unittest.TestCase):
+    def test_set_fields_in_place(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = write_sample_accounts(tmp)
+            with MappedAccountsFile(path) as mapped:
+                self.assertEqual(mapped.offset_of('2'), 46)
+                mapped.set_balance('2', 490050)
+                mapped.set_transactions('2', 12)
+                mapped.set_status('2', 'D')
+                with self.assertRaises(ValueError):
+                    mapped.set_balance('2', 10000000)
+            with open(path) as f:
+                self.assertEqual(f.read().splitlines()[1], "00002 Standard             D 04900.50 0012 SP")
+
+    def test_store_commits_in_place(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = write_sample_accounts(tmp)
+            store = AccountStore(path, mode="mmap")
+            store.update('1', balance=900000)
+            store.increment_transactions('1')
+            with patch("accountstore.write_new_current_accounts") as mock_write:
+                store.commit()
+                mock_write.assert_not_called()
+            store.invalidate()
+            self.assertEqual(store.get('1')['balance'], 900000)
+            self.assertEqual(store.get('1')['total_transactions'], 2)
+
+class TestTransactionLogger(unittest.TestCase):
+    def test_buffers_until_end_of_session(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "log.txt")
+            logger = TransactionLogger(path, max_delay=60)
+            logger.log_transaction("01", "Standard", "00002", 10000, "SP")
+            TransactionLogger(path).log_transaction("04", "Standard", "00002", 2550, "SP")
+            self.assertFalse(os.path.exists(path))
+            with patch("sys.stdout", new=StringIO()):
+                logger.end_session()
+            with open(path) as f:
+                self.assertEqual(f.read(), "01_Standard  _000002_010000_SP\n"
+                                           "04_Standard  _000002_002550_SP\n"
+                                           "00_END_OF_SE _000000_000000_ES\n")
+
+    def test_size_threshold_and_fsync_policy(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "log.txt")
+            logger = TransactionLogger(path, max_buffer_bytes=62, durability="fsync", fsync_every=2)
+            with patch("transactionlogger.os.fsync") as mock_fsync:
+                logger.log_transaction("01", "A", "1", 100, "SP")
+                self.assertFalse(os.path.exists(path))
+                logger.log_transaction("01", "A", "1", 100, "SP")
+                mock_fsync.assert_called_once()
+                logger.close()
+            with open(path) as f:
+                self.assertEqual(len(f.readlines()), 2)
+
+    def test_invalid_durability(self):
+        with self.assertRaises(ValueError):
+            TransactionLogger("log.txt", durability="sometimes")
+
+class TestBackend(unittest.TestCase):
+    def test_parse_log_line(self):
+        self.assertEqual(parse_log_line("05_Admin     _000001_1000000_SP\n"),
+                         ("05", "Admin", "1", 1000000, "SP"))
+        self.assertIsNone(parse_log_line("05_Admin_000001_1000000_SP\n"))
+        self.assertIsNone(parse_log_line("garbage\n"))
+        for bad in ("01_Name      _000001__SP\n", "01_Name      _000001_1_S\n",
+                    "01_Name      _000001_000001_S\n", "01_Name      _000001_0000001_SP\n",
+                    "01_Name      _000001_00\u0660001_SP\n", "0\u0661_Name      _000001_000001_SP\n"):
+            self.assertIsNone(parse_log_line(bad), bad)
+
+    def test_empty_amount_is_reported_not_raised(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            old_path = write_sample_accounts(tmp)
+            log_path = os.path.join(tmp, "merged.txt")
+            with open(log_path, "w") as f:
+                f.write("01_Standard  _000002__SP\n00_END_OF_SE _000000_000000_ES\n")
+            with patch("sys.stdout", new=StringIO()) as fake_out:
+                self.assertEqual(run_backend(old_path, log_path, os.path.join(tmp, "new.txt")), (0, 1))
+            self.assertIn("Line 1: Invalid transaction record", fake_out.getvalue())
+
+    def test_applies_transactions_with_plan_fees(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            old_path = write_sample_accounts(tmp)
+            log_path = os.path.join(tmp, "merged.txt")
+            new_path = os.path.join(tmp, "new.txt")
+            with open(log_path, "w") as f:
+                f.write("01_Admin     _000001_010000_SP\n"
+                        "04_Standard  _000002_002000_SP\n"
+                        "03_Standard  _000002_999999_SP\n"
+                        "00_END_OF_SE _000000_000000_ES\n"
+                        "05_NewUser1  _030001_100000_SP\n"
+                        "07_Standard  _000002_000000_SP\n"
+                        "08_Admin     _000001_000000_NP\n")
+            with patch("sys.stdout", new=StringIO()) as fake_out:
+                self.assertEqual(run_backend(old_path, log_path, new_path), (5, 1))
+                self.assertIn("Insufficient funds", fake_out.getvalue())
+            with open(new_path) as f:
+                self.assertEqual(f.read(),
+                                 "00001 Admin                A 09899.90 0003 NP\n"
+                                 "00002 Standard             D 05019.95 0002 SP\n"
+                                 "30001 NewUser1             A 01000.00 0001 SP\n"
+                                 "00000 END_OF_FILE          A 00000.00 0000 NP\n")
+
+    def test_applies_both_sides_of_a_transfer(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            old_path = write_sample_accounts(tmp)
+            live = os.path.join(tmp, "live")
+            os.mkdir(live)
+            log_path = os.path.join(tmp, "merged.txt")
+            logger = TransactionLogger(log_path)
+            with patch("sys.stdout", new=StringIO()):
+                self.assertTrue(TransactionSystem(AccountStore(write_sample_accounts(live)), logger)
+                                .transfer("00002", "1", 15000, "Standard"))
+            logger.close()
+            with open(log_path) as f:
+                self.assertEqual(f.read(), "02_Standard  _000002_015000_SP\n02_Admin     _000001_015000_CR\n")
+            with open(log_path, "a") as f:
+                f.write("02_Standard  _000002_485000_SP\n02_Admin     _000001_485000_CR\n")
+            new_path = os.path.join(tmp, "new.txt")
+            with patch("sys.stdout", new=StringIO()) as fake_out:
+                self.assertEqual(run_backend(old_path, log_path, new_path), (2, 2))
+            self.assertIn("Line 4: Source side of the transfer was rejected", fake_out.getvalue())
+            with open(new_path) as f:
+                self.assertEqual(f.read(),
+                                 "00001 Admin                A 10150.00 0002 NP\n"
+                                 "00002 Standard             A 04849.95 0001 SP\n"
+                                 "00000 END_OF_FILE          A 00000.00 0000 NP\n")
+
+    def test_created_account_matches_front_end(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            old_path = write_sample_accounts(tmp)
+            live = os.path.join(tmp, "live")
+            os.mkdir(live)
+            live_path = write_sample_accounts(live)
+            log_path = os.path.join(tmp, "merged.txt")
+            logger = TransactionLogger(log_path)
+            am = AccountManager(AccountStore(live_path), logger)
+            with patch("sys.stdout", new=StringIO()):
+                self.assertFalse(am.create_new_account("30002", "LongHolderName", "basic", 1000))
+                self.assertTrue(am.create_new_account("30001", "Ten Chars!", "basic", 100000))
+            logger.close()
+            with open(log_path) as f:
+                self.assertEqual(f.read(), "05_Ten Chars!_030001_100000_NP\n")
+            new_path = os.path.join(tmp, "new.txt")
+            with patch("sys.stdout", new=StringIO()):
+                self.assertEqual(run_backend(old_path, log_path, new_path), (1, 0))
+            with open(new_path) as new, open(live_path) as front_end:
+                self.assertEqual(new.read(), front_end.read())
+
+class TestReplay(unittest.TestCase):
+    def test_session_sort_is_natural(self):
+        self.assertEqual(sorted(["session10.txt", "session2.txt", "session1.txt"], key=session_sort_key),
+                         ["session1.txt", "session2.txt", "session10.txt"])
+
+    def test_replays_sessions_with_separate_logs(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            accounts = write_sample_accounts(tmp)
+            sessions = []
+            for i, script in ((2, "standard\n00002\nStandard\n5\nn\nStandard\n00002\n20.00\n0\n"),
+                              (10, "admin\n00001\nAdmin\n4\ny\nAdmin\n00001\n50.00\n0\n")):
+                sessions.append(os.path.join(tmp, f"session{i}.txt"))
+                with open(sessions[-1], "w") as f:
+                    f.write(script)
+            merged = os.path.join(tmp, "merged.txt")
+            with patch("sys.stdout", new=StringIO()):
+                statuses = replay_sessions(sessions[::-1], accounts, tmp, merged, workers=2)
+            self.assertEqual([status for _, status in statuses], [0, 0])
+            with open(os.path.join(tmp, "transactions_day_session10.txt")) as f:
+                self.assertEqual(f.readline(), "01_Admin     _000001_005000_SP\n")
+            with open(merged) as f:
+                self.assertEqual([line[:2] for line in f], ["04", "00", "01", "00"])
+
+class TestSessionEngine(unittest.TestCase):
+    def test_sessions_share_state_in_process(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            accounts = write_sample_accounts(tmp)
+            log_path = os.path.join(tmp, "log.txt")
+            engine = SessionEngine(accounts)
+            withdraw = parse_session_script("standard\n00002\nStandard\n4\nn\nStandard\n00002\n100.00\n0\n")
+            status, output = engine.run(withdraw, log_path)
+            self.assertEqual(status, 0)
+            self.assertIn("SUCCESS: Withdraw", output)
+            status, output = engine.run(parse_session_script("standard\n00002\nStandard\n0\n"), log_path)
+            self.assertIn("'balance': '4900.00'", output)
+            with open(log_path) as f:
+                self.assertEqual(f.read(), "01_Standard  _000002_010000_SP\n"
+                                           "00_END_OF_SE _000000_000000_ES\n"
+                                           "00_END_OF_SE _000000_000000_ES\n")
+
+    def test_script_running_out_of_input_fails(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            engine = SessionEngine(write_sample_accounts(tmp))
+            status, output = engine.run(["standard", "00002", "Wrong"], os.path.join(tmp, "log.txt"))
+            self.assertEqual(status, 1)
+            self.assertIn("EOFError", output)
+
+class TestProgrammaticApi(unittest.TestCase):
+    def setUp(self):
+        reset_account_stores()
+
+    @patch("accountstore.write_new_current_accounts")
+    @patch("accountstore.read_old_bank_accounts")
+    def test_submit_batch_commits_once(self, mock_read, mock_write):
+        mock_read.return_value = [
+            {'account_number': '1', 'name': 'Admin', 'status': 'A', 'balance': 100000, 'total_transactions': 0, 'plan': 'NP'},
+            {'account_number': '2', 'name': 'Standard', 'status': 'A', 'balance': 30000, 'total_transactions': 0, 'plan': 'NP'},
+        ]
+        ts = TransactionSystem(AccountStore("fake.txt"))
+        with patch("sys.stdout", new=StringIO()):
+            results = ts.submit_batch([
+                {"op": "withdraw", "account_number": "00002", "name": "Standard", "amount": 20000},
+                {"op": "transfer", "from_account": "00002", "to_account": "1", "amount": 5000, "name": "Standard"},
+                {"op": "withdraw", "account_number": "00002", "name": "Standard", "amount": 10000},
+                {"op": "deposit", "account_number": "00002", "name": "Standard", "amount": 500},
+                {"op": "close", "account_number": "00002"},
+                {"op": "withdraw", "account_number": "00002"},
+            ])
+        self.assertEqual([r["success"] for r in results], [True, True, False, True, False, False])
+        self.assertEqual(results[2]["error"], "Withdraw: Insufficient funds in account")
+        self.assertEqual(results[4]["error"], "Batch: Unknown operation 'close'")
+        mock_write.assert_called_once()
+        balances = {a['account_number']: a['balance'] for a in mock_write.call_args[0][0]}
+        self.assertEqual(balances, {'1': 105000, '2': 5000})
+
+    @patch("accountstore.write_new_current_accounts")
+    @patch("accountstore.read_old_bank_accounts", return_value=[])
+    def test_account_manager_programmatic_create(self, mock_read, mock_write):
+        am = AccountManager(AccountStore("fake.txt"))
+        with patch("sys.stdout", new=StringIO()):
+            self.assertTrue(am.create_new_account("12345", "New User", "basic", 1000))
+            self.assertFalse(am.create_new_account("12345", "Other", "basic", 1000))
+            self.assertTrue(am.disable_existing_account("12345", "New User"))
+        self.assertEqual(am.store.get("12345")['status'], 'D')
+        self.assertEqual(am.last_error, "Create Account: Account number 12345 already exists.")
+
+    @patch("accountstore.write_new_current_accounts")
+    @patch("accountstore.read_old_bank_accounts")
+    def test_create_rejects_zero_padded_duplicate(self, mock_read, mock_write):
+        mock_read.return_value = [
+            {'account_number': '2', 'name': 'Standard', 'status': 'A', 'balance': 30000, 'total_transactions': 0, 'plan': 'NP'},
+        ]
+        am = AccountManager(AccountStore("fake.txt"))
+        with patch("sys.stdout", new=StringIO()):
+            self.assertFalse(am.create_new_account("00002", "Intruder", "basic", 1000))
+            self.assertTrue(am.create_new_account("00042", "New User", "basic", 1000))
+        self.assertEqual(am.store.get("2")['name'], 'Standard')
+        self.assertEqual(am.new_accounts, {"42"})
+
+    def test_failed_batch_commit_logs_nothing(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = write_sample_accounts(tmp)
+            log = os.path.join(tmp, "log.txt")
+            ts = TransactionSystem(AccountStore(path), TransactionLogger(log))
+            ops = [{"op": "withdraw", "account_number": "00002", "name": "Standard", "amount": 10000}]
+            with patch("sys.stdout", new=StringIO()):
+                with patch("accountstore.write_new_current_accounts", side_effect=OSError("disk full")):
+                    with self.assertRaises(OSError):
+                        ts.submit_batch(ops)
+                self.assertEqual(ts.session_withdraw_total, 0)
+                self.assertEqual(ts.store.get("2")['balance'], 500000)
+                ts.logger.close()
+                self.assertFalse(os.path.exists(log))
+                self.assertTrue(ts.submit_batch(ops)[0]["success"])
+            ts.logger.close()
+            with open(log) as f:
+                self.assertEqual([line[:2] for line in f], ["01"])
+            self.assertEqual(ts.session_withdraw_total, 10000)
+
+    def test_zero_padded_lookups(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = write_sample_accounts(tmp)
+            store = AccountStore(path)
+            logger = TransactionLogger(os.path.join(tmp, "log.txt"))
+            ts = TransactionSystem(store, logger)
+            am = AccountManager(store, logger)
+            with patch("sys.stdout", new=StringIO()):
+                self.assertTrue(ts.transfer("00002", "00001", 1000, "Standard"))
+                self.assertTrue(am.disable_existing_account("00002", "Standard"))
+                self.assertTrue(am.delete_existing_account("00002", "Standard"))
+            logger.close()
+            self.assertEqual(store.get("1")['balance'], 1001000)
+            self.assertNotIn("2", store)
+
+    @patch("accountstore.write_new_current_accounts")
+    @patch("accountstore.read_old_bank_accounts", return_value=[])
+    def test_create_validates_number_and_balance(self, mock_read, mock_write):
+        am = AccountManager(AccountStore("fake.txt"))
+        with patch("sys.stdout", new=StringIO()):
+            self.assertFalse(am.create_new_account("abc", "User", "basic", 1000))
+            self.assertFalse(am.create_new_account("123456", "User", "basic", 1000))
+            self.assertFalse(am.create_new_account("12345", "User", "basic", -1))
+            self.assertFalse(am.create_new_account("12345", "User", "basic", 10.5))
+        self.assertEqual(len(am.store), 0)
+        mock_write.assert_not_called()
+
+    @patch("accountstore.write_new_current_accounts")
+    @patch("accountstore.read_old_bank_accounts")
+    def test_non_positive_amounts_rejected(self, mock_read, mock_write):
+        mock_read.return_value = [
+            {'account_number': '1', 'name': 'Admin', 'status': 'A', 'balance': 100000, 'total_transactions': 0, 'plan': 'NP'},
+            {'account_number': '2', 'name': 'Standard', 'status': 'A', 'balance': 30000, 'total_transactions': 0, 'plan': 'NP'},
+        ]
+        ts = TransactionSystem(AccountStore("fake.txt"))
+        with patch("sys.stdout", new=StringIO()):
+            self.assertFalse(ts.withdraw("00002", "Standard", -10000))
+            self.assertFalse(ts.pay_bill("00002", "Standard", "Fast Internet, Inc. (FI)", 0))
+            results = ts.submit_batch([
+                {"op": "transfer", "from_account": "00002", "to_account": "1", "amount": -5000, "name": "Standard"},
+            ])
+        self.assertFalse(results[0]["success"])
+        self.assertEqual(results[0]["error"], "Transfer: Amount must be positive")
+        self.assertEqual(ts.store.get("2")['balance'], 30000)
+        mock_write.assert_not_called()
+
+class TestBenchmark(unittest.TestCase):
+    def test_generated_file_is_valid(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "accounts.txt")
+            generate_accounts_file(path, 50)
+            with patch("sys.stdout", new=StringIO()) as fake_out:
+                accounts = read_old_bank_accounts(path)
+                self.assertEqual(fake_out.getvalue(), "")
+            self.assertEqual(len(accounts), 51)
+            self.assertTrue(is_admin("00001", AccountStore(path)))
+
+    def test_report_shape(self):
+        report = run_benchmarks(sizes=(10,), repeats=2, warmup=0)
+        paths = report['results']['10']
+        self.assertEqual(set(paths), {'read_old_bank_accounts', 'login_cold', 'login_warm',
+                                      'is_admin_warm', 'write_new_current_accounts', 'log_transaction'})
+        for stats in paths.values():
+            self.assertLessEqual(stats['p50_ms'], stats['p99_ms'])
+
+class TestInstrumentation(unittest.TestCase):
+    def setUp(self):
+        instrumentation.reset()
+
+    def tearDown(self):
+        instrumentation.reset()
+
+    def test_disabled_returns_function_unchanged(self):
+        def operation():
+            return 1
+        with patch("instrumentation.ENABLED", False):
+            self.assertIs(instrumentation.instrumented(operation), operation)
+
+    def test_enabled_counts_calls_and_io(self):
+        with patch("instrumentation.ENABLED", True):
+            wrapped = instrumentation.instrumented(lambda x: x * 2)
+            self.assertEqual(wrapped(2), 4)
+            self.assertEqual(wrapped(3), 6)
+        name = instrumentation.operation_name(wrapped)
+        instrumentation.record(name, bytes_read=100, file_opens=1, records=2)
+        stats = instrumentation.summary()[name]
+        self.assertEqual(stats['calls'], 2)
+        self.assertEqual((stats['bytes_read'], stats['file_opens'], stats['records']), (100, 1, 2))
+        self.assertIn(f"{name}: calls=2", instrumentation.format_summary())
+
+    def test_summary_printed_only_when_enabled(self):
+        instrumentation.record("read.read_old_bank_accounts", calls=1)
+        with patch("sys.stdout", new=StringIO()) as fake_out:
+            with patch("instrumentation.ENABLED", False):
+                instrumentation.dump_summary()
+            self.assertEqual(fake_out.getvalue(), "")
+            with patch("instrumentation.ENABLED", True):
+                instrumentation.dump_summary()
+            self.assertIn("read.read_old_bank_accounts: calls=1", fake_out.getvalue())
+
+@unittest.skipIf(columnar.np is None, "NumPy is not installed")
+class TestColumnarLoader(unittest.TestCase):
+    def test_matches_read_old_bank_accounts(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "accounts.txt")
+            generate_accounts_file(path, 200)
+            columns, errors = columnar.load_accounts_columnar(path)
+            with patch("sys.stdout", new=StringIO()):
+                expected = read_old_bank_accounts(path)
+        self.assertEqual(errors, [])
+        self.assertEqual(columnar.columns_to_accounts(columns), expected)
+
+    def test_reports_same_errors_as_reader(self):
+        lines = ["00001 Admin                A 10000.00 0001 NP",
+                 "0000a Bad                  A 00001.00 0001 NP",
+                 "00003 BadStatus            X 00001.00 0001 NP",
+                 "00004 Negative             A -0001.00 0001 NP",
+                 "short",
+                 "00006 BadPlan              A 00001.00 0001 XX"]
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "accounts.txt")
+            with open(path, "w") as f:
+                f.write("\n".join(lines) + "\n")
+            columns, errors = columnar.load_accounts_columnar(path)
+            with patch("sys.stdout", new=StringIO()) as expected_out:
+                read_old_bank_accounts(path)
+        self.assertEqual([line_num for line_num, _ in errors], [2, 3, 4, 5, 6])
+        self.assertEqual(list(columns['account_number']), [1])
+        with patch("sys.stdout", new=StringIO()) as fake_out:
+            columnar.print_errors(errors)
+        self.assertEqual(fake_out.getvalue(), expected_out.getvalue())
+
+class TestMoney(unittest.TestCase):
+    def test_parse_and_format_balance_field(self):
+        self.assertEqual(parse_balance_field("04900.50"), 490050)
+        self.assertEqual(format_balance_field(490050), "04900.50")
+        self.assertEqual(format_balance_field(0), "00000.00")
+
+    def test_parse_amount(self):
+        self.assertEqual(parse_amount("300"), 30000)
+        self.assertEqual(parse_amount(" 800.00"), 80000)
+        self.assertEqual(parse_amount("12.5"), 1250)
+        self.assertEqual(parse_amount(".07"), 7)
+        for bad in ("", ".", "1.005", "abc", "1e3", "1.2.3", "-5", "+5", "-0.50"):
+            with self.assertRaises(ValueError):
+                parse_amount(bad)
+
+    def test_float_drift_does_not_occur(self):
+        # Ten 0.10 withdrawals leave exactly $0.00 of a $1.00 balance.
+        balance = parse_amount("1.00")
+        for _ in range(10):
+            balance -= parse_amount("0.10")
+        self.assertEqual(balance, 0)
+        self.assertEqual(format_amount(123456), "1234.56")
+
+    def test_format_account_shows_dollars(self):
+        self.assertEqual(format_account(Account('2', 'Standard', balance=490005)),
+                         "{'account_number': '2', 'name': 'Standard', 'status': 'A', 'balance': '4900.05', "
+                         "'total_transactions': 0, 'plan': 'NP'}")
+
+    def test_write_rejects_float_balance(self):
+        accounts = [{'account_number': '12345', 'name': 'User', 'status': 'A',
+                     'balance': 100.0, 'total_transactions': 0}]
+        with self.assertRaises(ValueError):
+            write_new_current_accounts(accounts, "file.txt")
+
+class TestAccountJournal(unittest.TestCase):
+    def test_commits_append_and_reload_overlays(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = write_sample_accounts(tmp)
+            with open(path) as f:
+                base = f.read()
+            store = AccountStore(path, mode="journal")
+            store.update('2', balance=490000)
+            store.add({'account_number': '00042', 'name': 'New', 'balance': 500})
+            store.commit()
+            store.remove('1')
+            store.commit()
+            with open(path) as f:
+                self.assertEqual(f.read(), base)
+            with open(journal_path(path)) as f:
+                self.assertEqual(len(f.readlines()), 5)
+            reloaded = AccountStore(path, mode="journal")
+            self.assertEqual(sorted(a['account_number'] for a in reloaded.accounts()), ['2', '42'])
+            self.assertEqual(reloaded.get('2')['balance'], 490000)
+
+    def test_torn_batch_is_ignored(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = write_sample_accounts(tmp)
+            store = AccountStore(path, mode="journal")
+            store.update('2', balance=400000)
+            store.commit()
+            with open(journal_path(path), "a") as f:
+                f.write("P 00002 Standard             A 00001.00 0000 SP\nD 000")
+            reloaded = AccountStore(path, mode="journal")
+            self.assertEqual(reloaded.get('2')['balance'], 400000)
+            reloaded.update('1', balance=1)
+            reloaded.commit()
+            self.assertEqual(AccountStore(path, mode="journal").get('1')['balance'], 1)
+
+    def test_compact_renames_new_base_and_drops_journal(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = write_sample_accounts(tmp)
+            store = AccountStore(path, mode="journal")
+            with patch("accountstore.JOURNAL_COMPACT_ENTRIES", 2):
+                store.update('2', balance=100)
+                store.commit()
+                self.assertTrue(os.path.exists(journal_path(path)))
+                store.update('1', balance=200)
+                store.commit()
+            self.assertFalse(os.path.exists(journal_path(path)))
+            with patch("sys.stdout", new=StringIO()):
+                balances = [a['balance'] for a in read_old_bank_accounts(path)]
+            self.assertEqual(balances, [200, 100, 0])
+
+    def test_compact_drops_cached_snapshot(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = write_sample_accounts(tmp)
+            with patch("sys.stdout", new=StringIO()):
+                accountcache.read_accounts(path)
+            self.assertTrue(os.path.exists(accountcache.cache_path(path)))
+            store = AccountStore(path, mode="journal", cache=True)
+            store.update('2', balance=100)
+            store.commit()
+            store.compact()
+            self.assertFalse(os.path.exists(accountcache.cache_path(path)))
+            self.assertEqual(AccountStore(path, cache=True).get('2')['balance'], 100)
+
+    def test_backend_folds_journal_at_day_close(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = write_sample_accounts(tmp)
+            log = os.path.join(tmp, "merged.txt")
+            with open(log, "w") as f:
+                f.write(END_OF_SESSION_LINE)
+            store = AccountStore(path, mode="journal")
+            store.update('2', balance=400000)
+            store.commit()
+            store.invalidate()
+            with patch("sys.stdout", new=StringIO()):
+                run_backend(path, log, path)
+                balances = [a['balance'] for a in read_old_bank_accounts(path)]
+            self.assertFalse(os.path.exists(journal_path(path)))
+            self.assertEqual(balances, [1000000, 400000, 0])
+
+class TestDirtyTracking(unittest.TestCase):
+    def test_changes_coalesce_per_account(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            store = AccountStore(write_sample_accounts(tmp))
+            store.update('2', balance=400000)
+            store.increment_transactions('2')
+            store.update('2', balance=300000)
+            self.assertEqual(store.dirty_accounts(), {'2': {'balance', 'total_transactions'}})
+            store.commit()
+            self.assertEqual(store.dirty_accounts(), {})
+
+    def test_only_changed_records_are_revalidated(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = write_sample_accounts(tmp)
+            store = AccountStore(path)
+            store.update('1', balance=100)
+            store.commit()
+            with patch("write.format_account_line", wraps=write.format_account_line) as mock_format:
+                store.update('2', plan='NP')
+                store.commit()
+                self.assertEqual([c.args[0]['account_number'] for c in mock_format.call_args_list], ['2'])
+                store.commit()
+                self.assertEqual(mock_format.call_count, 1)
+            with open(path) as f:
+                self.assertEqual(f.read().splitlines()[:2],
+                                 ["00001 Admin                A 00001.00 0001 NP",
+                                  "00002 Standard             A 05000.00 0000 NP"])
+
+    def test_mmap_writes_changed_record_in_place(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = write_sample_accounts(tmp)
+            store = AccountStore(path, mode="mmap")
+            store.update('2', name='Student', plan='NP')
+            with patch("accountstore.write_new_current_accounts") as mock_write:
+                store.commit()
+                mock_write.assert_not_called()
+            store.invalidate()
+            self.assertEqual((store.get('2')['name'], store.get('2')['plan']), ('Student', 'NP'))
+
+class TestServer(unittest.TestCase):
+    async def _run_clients(self, server, scripts):
+        ready = asyncio.get_running_loop().create_future()
+        serving = asyncio.create_task(server.serve("127.0.0.1", 0, ready=ready))
+        port = (await ready).sockets[0].getsockname()[1]
+
+        async def client(script):
+            reader, writer = await asyncio.open_connection("127.0.0.1", port)
+            writer.write(script.encode())
+            output = await reader.read()
+            writer.close()
+            return output.decode()
+
+        outputs = await asyncio.gather(*(client(script) for script in scripts))
+        serving.cancel()
+        with self.assertRaises(asyncio.CancelledError):
+            await serving
+        return outputs
+
+    def test_concurrent_sessions_share_ledger(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = write_sample_accounts(tmp)
+            log_path = os.path.join(tmp, "log.txt")
+            server = BankServer(path, log_path, flush_interval=0.05, store=AccountStore(path))
+            withdraw = "standard\n00002\nStandard\n4\nn\nStandard\n00002\n1.00\n0\n"
+            outputs = asyncio.run(self._run_clients(server, [withdraw] * 20 + ["admin\n00001\nAdmin\n9\n0\n"]))
+            self.assertTrue(all("SUCCESS: Withdraw: 1.00 withdrawn" in out for out in outputs[:20]))
+            self.assertIn("  1. Create New Account", outputs[20])
+            with patch("sys.stdout", new=StringIO()):
+                balances = {a['account_number']: a['balance'] for a in read_old_bank_accounts(path)}
+            self.assertEqual(balances['2'], 500000 - 20 * 100)
+            with open(log_path) as f:
+                codes = [line[:2] for line in f]
+            self.assertEqual((codes.count("01"), codes.count("00")), (20, 21))
+
+    def test_invalid_create_rejected_before_ledger_changes(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = write_sample_accounts(tmp)
+            server = BankServer(path, os.path.join(tmp, "log.txt"), flush_interval=0.05, store=AccountStore(path))
+            create = "admin\n00001\nAdmin\n1\ny\n00001\nAdmin\nBad\n12a45\nbasic\n10\n0\n"
+            outputs = asyncio.run(self._run_clients(server, [create]))
+            self.assertIn("Account number must be up to 5 digits", outputs[0])
+            self.assertNotIn("SUCCESS: Create Account", outputs[0])
+            with patch("sys.stdout", new=StringIO()):
+                self.assertEqual(len(read_old_bank_accounts(path)), 3)
+
+    def test_failed_flush_is_reported_and_retried(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = write_sample_accounts(tmp)
+            with open(path) as f:
+                before = f.read()
+            store = AccountStore(path)
+            log = os.path.join(tmp, "log.txt")
+            server = BankServer(path, log, store=store)
+            with store.deferred_commits():
+                store.add({"account_number": "12a45", "name": "Bad", "balance": 0})
+                store.commit()
+                server.logger.log_transaction("05", "Bad", "12a45", 0, "NP")
+                with patch("sys.stdout", new=StringIO()) as fake_out:
+                    self.assertFalse(server.flush())
+                self.assertIn("Ledger changes not written", fake_out.getvalue())
+                with open(path) as f:
+                    self.assertEqual(f.read(), before)
+                self.assertFalse(os.path.exists(path + ".tmp"))
+                self.assertFalse(os.path.exists(log))
+                store.remove("12a45")
+                store.update("2", balance=400000)
+                self.assertTrue(server.flush())
+                with patch("sys.stdout", new=StringIO()):
+                    self.assertEqual(read_old_bank_accounts(path)[1]['balance'], 400000)
+            server.logger.close()
+            with open(log) as f:
+                self.assertEqual(len(f.readlines()), 1)
+
+    def test_stale_flush_reloads_instead_of_looping(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = write_sample_accounts(tmp)
+            log = os.path.join(tmp, "log.txt")
+            store = AccountStore(path, locking=True)
+            server = BankServer(path, log, store=store)
+            other = AccountStore(path, locking=True)
+            with store.deferred_commits():
+                store.update("2", balance=1)
+                store.commit()
+                server.logger.log_transaction("01", "Standard", "2", 499999, "SP")
+                other.update("1", balance=2)
+                other.commit()
+                with patch("sys.stdout", new=StringIO()) as fake_out:
+                    self.assertFalse(server.flush())
+                self.assertIn("1 unsaved log records dropped", fake_out.getvalue())
+                self.assertEqual((store.get("1")['balance'], store.get("2")['balance']), (2, 500000))
+                store.update("2", balance=400000)
+                store.commit()
+                self.assertTrue(server.flush())
+            server.logger.close()
+            self.assertEqual(AccountStore(path).get("2")['balance'], 400000)
+            self.assertFalse(os.path.exists(log))
+
+    def test_locks_taken_in_sorted_order(self):
+        async def scenario():
+            locks = AccountLocks()
+            async with locks.hold("00002", "1"):
+                self.assertTrue(locks.lock("2").locked())
+                self.assertTrue(locks.lock("00001").locked())
+            self.assertFalse(locks.lock("2").locked())
+        asyncio.run(scenario())
+
+def _locked_withdrawals(path, count):
+    ts = TransactionSystem(AccountStore(path, mode="rewrite", locking=True),
+                           TransactionLogger(path + ".log"))
+    with patch("sys.stdout", new=StringIO()):
+        done = sum(ts.withdraw("00002", "Standard", 100) for _ in range(count))
+    ts.logger.close()
+    return done
+
+class TestFileLocking(unittest.TestCase):
+    def test_stale_snapshot_is_detected(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = write_sample_accounts(tmp)
+            first = AccountStore(path, locking=True)
+            second = AccountStore(path, locking=True)
+            first.update('2', balance=1)
+            second.update('1', balance=2)
+            first.commit()
+            with self.assertRaises(StaleSnapshotError):
+                second.commit()
+            second.invalidate()
+            self.assertEqual(second.get('2')['balance'], 1)
+
+    def test_transaction_retries_on_stale_snapshot(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = write_sample_accounts(tmp)
+            other = AccountStore(path, locking=True)
+            ts = TransactionSystem(AccountStore(path, locking=True), TransactionLogger(os.path.join(tmp, "log.txt")))
+            ts.store.get('2')
+            other.update('2', balance=400000)
+            other.commit()
+            with patch("sys.stdout", new=StringIO()):
+                self.assertTrue(ts.withdraw("00002", "Standard", 100))
+            ts.logger.close()
+            self.assertEqual(AccountStore(path).get('2')['balance'], 399900)
+
+    def test_concurrent_processes_do_not_lose_updates(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = write_sample_accounts(tmp)
+            with ProcessPoolExecutor(4) as pool:
+                done = sum(pool.map(_locked_withdrawals, [path] * 4, [10] * 4))
+            self.assertEqual(done, 40)
+            self.assertEqual(AccountStore(path).get('2')['balance'], 500000 - 40 * 100)
+
+class TestIterAccounts(unittest.TestCase):
+    def test_filters(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "accounts.txt")
+            generate_accounts_file(path, 100)
+            disabled = [a['account_number'] for a in iter_accounts(path, status='D')]
+            self.assertEqual(disabled, [str(n) for n in range(10, 101, 10)])
+            student = list(iter_accounts(path, plan='SP', min_balance=1000, max_balance=2000))
+            self.assertTrue(student)
+            self.assertTrue(all(a['plan'] == 'SP' and 1000 <= a['balance'] <= 2000 for a in student))
+
+    def test_find_account_stops_at_match(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "accounts.txt")
+            generate_accounts_file(path, 1000)
+            with patch("read._parse_account_line", wraps=read._parse_account_line) as mock_parse:
+                self.assertEqual(find_account(path, "00005")['name'], "User5")
+                self.assertEqual(mock_parse.call_count, 5)
+            self.assertIsNone(find_account(path, "99999"))
+
+    def test_early_stop_is_instrumented(self):
+        instrumentation.reset()
+        self.addCleanup(instrumentation.reset)
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "accounts.txt")
+            generate_accounts_file(path, 10)
+            with patch("instrumentation.ENABLED", True):
+                find_account(path, "00005")
+            stats = instrumentation.summary()["read.iter_accounts"]
+            self.assertEqual((stats['file_opens'], stats['records']), (1, 5))
+            self.assertGreater(stats['bytes_read'], 0)
+
+class TestAccountRecord(unittest.TestCase):
+    def setUp(self):
+        self.record = {'account_number': '42', 'name': 'Jane', 'status': 'A',
+                       'balance': 12345, 'total_transactions': 3, 'plan': 'SP'}
+
+    def test_behaves_like_dict(self):
+        acc = Account('42', 'Jane', 'A', 12345, 3, 'SP')
+        self.assertEqual(acc, self.record)
+        self.assertEqual(dict(acc), self.record)
+        self.assertEqual(repr(acc), repr(self.record))
+        self.assertNotIn('account_type', acc)
+        self.assertEqual(acc.get('account_type', 'basic'), 'basic')
+        acc.update(balance=100, account_type='admin')
+        self.assertEqual(acc['balance'], 100)
+        self.assertEqual(list(acc)[-1], 'account_type')
+        with self.assertRaises(KeyError):
+            acc['nickname'] = 'J'
+
+    def test_copy_is_independent_and_compact(self):
+        acc = Account.from_mapping(self.record)
+        clone = acc.copy()
+        clone['balance'] = 0
+        self.assertEqual(acc['balance'], 12345)
+        self.assertFalse(hasattr(acc, '__dict__'))
+
+    def test_reader_produces_accounts(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "accounts.txt")
+            generate_accounts_file(path, 10)
+            accounts = read_old_bank_accounts(path)
+            self.assertTrue(all(isinstance(acc, Account) for acc in accounts))
+            out = os.path.join(tmp, "copy.txt")
+            write_new_current_accounts(accounts, out)
+            self.assertEqual(read_old_bank_accounts(out)[:-1], accounts)
+
+class TestLogReader(unittest.TestCase):
+    LOG = ("01_Admin     _000001_010000_SP\n"
+           "04_Standard  _000002_002000_SP\n"
+           "garbage\n"
+           "04_Admin     _000001_000500_SP\n"
+           "02_Standard  _000002_000300_SP\n"
+           "02_Admin     _000001_000300_CR\n"
+           "00_END_OF_SE _000000_000000_ES\n"
+           "05_NewUser1  _030001_100000_SP\n")
+
+    def write_log(self, tmp, text):
+        path = os.path.join(tmp, "merged.txt")
+        with open(path, "w") as f:
+            f.write(text)
+        return path
+
+    def test_iter_log_reports_malformed_lines(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = self.write_log(tmp, self.LOG)
+            errors = []
+            with patch("sys.stdout", new=StringIO()) as fake_out:
+                records = list(iter_log(path, errors))
+            self.assertEqual([line_num for line_num, _ in records], [1, 2, 4, 5, 6, 7, 8])
+            self.assertEqual(errors, [(3, "Invalid transaction record")])
+            self.assertIn("Line 3: Invalid transaction record", fake_out.getvalue())
+
+    def test_aggregate_log(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = self.write_log(tmp, self.LOG)
+            with patch("sys.stdout", new=StringIO()):
+                summary = aggregate_log(path)
+            self.assertEqual(summary['records'], 6)
+            self.assertEqual(summary['accounts']['1'], {'count': 3, 'total': 10800, 'net': -9200})
+            self.assertEqual(summary['accounts']['2'], {'count': 2, 'total': 2300, 'net': 1700})
+            self.assertEqual(summary['codes']['02'], {'count': 2, 'total': 600, 'net': 0})
+            self.assertEqual(summary['accounts']['30001'], {'count': 1, 'total': 100000, 'net': 100000})
+            self.assertEqual(summary['codes']['04'], {'count': 2, 'total': 2500, 'net': 2500})
+            self.assertNotIn('00', summary['codes'])
+
+    @unittest.skipIf(logreader.np is None, "NumPy is not installed")
+    def test_columnar_matches_streaming(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            good = self.write_log(tmp, self.LOG.replace("garbage\n", ""))
+            self.assertEqual(logreader.aggregate_log_columnar(good), aggregate_log(good))
+            bad = self.write_log(tmp, self.LOG)
+            with patch("sys.stdout", new=StringIO()):
+                self.assertEqual(logreader.aggregate_log_columnar(bad), aggregate_log(bad))
+
+class TestMergeLogs(unittest.TestCase):
+    SESSIONS = ("04_Standard  _000002_002000_SP\n01_Admin     _000001_001000_SP\n"
+                "00_END_OF_SE _000000_000000_ES\n",
+                "01_Standard  _000002_000500_SP\n05_NewUser1  _000003_100000_SP\n"
+                "00_END_OF_SE _000000_000000_ES")
+
+    def merge(self, **options):
+        with tempfile.TemporaryDirectory() as tmp:
+            paths = []
+            for i, text in enumerate(self.SESSIONS, 1):
+                paths.append(os.path.join(tmp, f"session{i}.txt"))
+                with open(paths[-1], "w") as f:
+                    f.write(text)
+            paths.append(os.path.join(tmp, "missing.txt"))
+            merged = os.path.join(tmp, "merged.txt")
+            count = merge_logs(paths, merged, **options)
+            with open(merged) as f:
+                lines = f.readlines()
+            self.assertEqual(count, len(lines))
+            return [line[:2] + line[19] for line in lines]
+
+    def test_terminator_policies(self):
+        self.assertEqual(self.merge(), ["042", "011", "000", "012", "053", "000"])
+        self.assertEqual(self.merge(terminators="strip"), ["042", "011", "012", "053"])
+        self.assertEqual(self.merge(terminators="single"), ["042", "011", "012", "053", "000"])
+        with self.assertRaises(ValueError):
+            self.merge(terminators="drop")
+
+    def test_by_account_is_stable_across_runs(self):
+        self.assertEqual(self.merge(terminators="single", by_account=True, run_lines=1),
+                         ["011", "042", "012", "053", "000"])
+        self.assertEqual(END_OF_SESSION_LINE, "00_END_OF_SE _000000_000000_ES\n")
+
+class TestRollup(unittest.TestCase):
+    DAYS = ("04_Standard  _000002_002000_SP\n01_Admin     _000001_001000_SP\n00_END_OF_SE _000000_000000_ES\n",
+            "01_Standard  _000002_000500_SP\n00_END_OF_SE _000000_000000_ES\n")
+
+    def write_days(self, tmp):
+        paths = []
+        for day, text in enumerate(self.DAYS, 1):
+            paths.append(os.path.join(tmp, f"merged_transactions_day{day}.txt"))
+            with open(paths[-1], "w") as f:
+                f.write(text)
+        return paths
+
+    def test_combines_day_aggregates(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            paths = self.write_days(tmp)
+            summary = rollup.roll_up(paths)
+            self.assertTrue(os.path.exists(rollup.rollup_path(paths[0])))
+            self.assertEqual((summary['days'], summary['records']), (2, 3))
+            self.assertEqual(summary['accounts']['2'], {'count': 2, 'total': 2500, 'net': 1500})
+            self.assertEqual(summary['codes']['01'], {'count': 2, 'total': 1500, 'net': -1500})
+            self.assertEqual(rollup.roll_up(paths, last=1)['records'], 1)
+
+    def test_only_changed_days_are_recomputed(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            paths = self.write_days(tmp)
+            rollup.roll_up(paths)
+            os.utime(paths[0])
+            with patch("rollup.aggregate_log", wraps=rollup.aggregate_log) as mock_aggregate:
+                rollup.roll_up(paths)
+                mock_aggregate.assert_not_called()
+                with open(paths[1], "a") as f:
+                    f.write("04_Standard  _000002_000100_SP\n")
+                self.assertEqual(rollup.roll_up(paths)['records'], 4)
+                mock_aggregate.assert_called_once_with(paths[1])
+
+class TestAccountsArchive(unittest.TestCase):
+    def test_point_in_time_queries_and_restore(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            days = []
+            accounts = generate_accounts(50)
+            for day in range(1, 4):
+                if day == 2:
+                    accounts[1]['balance'] = 12345
+                    accounts.append({'account_number': '777', 'name': 'New', 'status': 'A',
+                                     'balance': 100, 'total_transactions': 1, 'plan': 'SP'})
+                if day == 3:
+                    del accounts[2]
+                days.append(os.path.join(tmp, f"day{day}.txt"))
+                write_new_current_accounts(accounts, days[-1])
+            archive = AccountsArchive(os.path.join(tmp, "archive"))
+            self.assertEqual([archive.add_day(day, path) for day, path in enumerate(days, 1)], [50, 2, 1])
+            with self.assertRaises(ValueError):
+                archive.add_day(3, days[-1])
+
+            reopened = AccountsArchive(os.path.join(tmp, "archive"))
+            self.assertEqual(reopened.days(), [1, 2, 3])
+            self.assertEqual(reopened.balance("00002", 1), 74)
+            self.assertEqual(reopened.balance("00002", 5), 12345)
+            self.assertIsNone(reopened.balance("777", 1))
+            self.assertIsNone(reopened.record("3", 3))
+            for day, path in enumerate(days, 1):
+                restored = os.path.join(tmp, "restored.txt")
+                reopened.restore(day, restored)
+                with open(restored) as f, open(path) as expected:
+                    self.assertEqual(f.read(), expected.read())
+
+class TestAccountCache(unittest.TestCase):
+    def test_snapshot_reused_until_file_changes(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "accounts.txt")
+            generate_accounts_file(path, 20)
+            expected = read_old_bank_accounts(path)
+            reader = MagicMock(wraps=read_old_bank_accounts)
+            self.assertEqual(accountcache.read_accounts(path, reader), expected)
+            self.assertTrue(os.path.exists(accountcache.cache_path(path)))
+            os.utime(path)
+            self.assertEqual(accountcache.read_accounts(path, reader), expected)
+            self.assertEqual(reader.call_count, 1)
+
+            write_new_current_accounts(expected[:5], path)
+            self.assertFalse(os.path.exists(accountcache.cache_path(path)))
+            self.assertEqual(accountcache.read_accounts(path, reader), read_old_bank_accounts(path))
+            self.assertEqual(reader.call_count, 2)
+
+    def test_files_with_errors_are_not_cached(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "accounts.txt")
+            generate_accounts_file(path, 3)
+            with open(path, "a") as f:
+                f.write("bad line\n")
+            with patch("sys.stdout", new=StringIO()):
+                accountcache.read_accounts(path)
+            self.assertFalse(os.path.exists(accountcache.cache_path(path)))
+
+    def test_store_sees_in_place_updates(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "accounts.txt")
+            generate_accounts_file(path, 20)
+            store = AccountStore(path, mode="mmap", cache=True)
+            store.update("2", balance=4242)
+            store.commit()
+            store.invalidate()
+            self.assertEqual(AccountStore(path, cache=True).get("2")['balance'], 4242)
+
+class TestCapabilities(unittest.TestCase):
+    def test_resolved_once_and_dropped_on_disable_or_delete(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "accounts.txt")
+            generate_accounts_file(path, 5)
+            store = AccountStore(path)
+            with patch.object(store, "get", wraps=store.get) as mock_get:
+                self.assertEqual(login("00001", "Admin", store=store)['account_type'], "admin")
+                for _ in range(3):
+                    self.assertTrue(is_admin("1", store))
+                self.assertFalse(is_admin("00002", store))
+                self.assertEqual(mock_get.call_count, 3)
+            self.assertTrue(capabilities("1", store).can_administer)
+
+            store.update("1", status="D")
+            self.assertTrue(capabilities("1", store).is_admin)
+            self.assertFalse(capabilities("1", store).can_administer)
+            self.assertFalse(is_admin("1", store))
+            store.update("1", balance=0)
+            self.assertIn("1", store.capabilities)
+            store.remove("1")
+            self.assertIsNone(capabilities("1", store))
+            self.assertFalse(is_admin("1", store))
+
+class TestBulkAccounts(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "accounts.txt")
+        self.log = os.path.join(self.tmp.name, "log.txt")
+        generate_accounts_file(self.path, 5)
+        self.am = AccountManager(AccountStore(self.path), TransactionLogger(self.log))
+
+    def tearDown(self):
+        self.am.logger.close()
+        self.tmp.cleanup()
+
+    def manifest(self, text):
+        path = os.path.join(self.tmp.name, "manifest.txt")
+        with open(path, "w") as f:
+            f.write(text)
+        return path
+
+    def test_read_csv_and_fixed_width_manifests(self):
+        csv_path = self.manifest("account_number,name,acc_type,balance\n00100,Ann,basic,12.50\n\n101,Bob,admin,x\n")
+        self.assertEqual(read_manifest(csv_path, "create"),
+                         ([{'account_number': '00100', 'name': 'Ann', 'acc_type': 'basic', 'balance': 1250}],
+                          [(4, "Invalid balance amount 'x'")]))
+        fixed_path = self.manifest("00002 User2               \n00003 User3\n")
+        self.assertEqual(read_manifest(fixed_path, "disable")[0],
+                         [{'account_number': '00002', 'name': 'User2'}, {'account_number': '00003', 'name': 'User3'}])
+
+    def test_create_accounts_is_all_or_nothing(self):
+        entries = [{'account_number': str(n), 'name': f"New{n}", 'acc_type': 'basic', 'balance': 100}
+                   for n in range(100, 105)]
+        with patch("sys.stdout", new=StringIO()) as fake_out:
+            self.assertFalse(self.am.create_accounts(entries + [dict(entries[0]), {**entries[0], 'account_number': '00002'}]))
+            self.assertIn("Entry 6: Account number 100 already exists.", fake_out.getvalue())
+            self.assertIn("Entry 7: Account number 00002 already exists.", fake_out.getvalue())
+            self.assertNotIn("100", self.am.store)
+            with patch.object(self.am.store, "commit", wraps=self.am.store.commit) as mock_commit:
+                self.assertTrue(self.am.create_accounts(entries))
+                mock_commit.assert_called_once()
+        self.am.logger.close()
+        self.assertEqual(read_old_bank_accounts(self.path)[-2]['name'], "New104")
+        with open(self.log) as f:
+            self.assertEqual([line[:2] for line in f], ["05"] * 5)
+
+    def test_create_accounts_checks_types(self):
+        entries = [{'account_number': '100', 'name': 'Ann', 'acc_type': 'basic', 'balance': 12.5},
+                   {'account_number': 101, 'name': 'Bob', 'acc_type': 'basic', 'balance': 100}]
+        with patch("sys.stdout", new=StringIO()) as fake_out:
+            self.assertFalse(self.am.create_accounts(entries))
+            self.assertTrue(self.am.create_new_account("102", "Cy", "basic", 100))
+        self.assertIn("Entry 1: Initial balance must be between $0.00 and $99999.99.", fake_out.getvalue())
+        self.assertIn("Entry 2: Account number must be up to 5 digits, got '101'.", fake_out.getvalue())
+        self.assertEqual(self.am.store.dirty_accounts(), {})
+
+    def test_disable_and_delete_accounts(self):
+        targets = [{'account_number': '00002', 'name': 'User2'}, {'account_number': '3', 'name': 'User3'}]
+        with patch("sys.stdout", new=StringIO()):
+            self.assertFalse(self.am.delete_accounts(targets + [{'account_number': '4', 'name': 'Wrong'}]))
+            self.assertTrue(self.am.disable_accounts(targets))
+            self.assertFalse(self.am.disable_accounts(targets[:1]))
+            self.assertTrue(self.am.delete_accounts(targets))
+        self.assertEqual(self.am.last_error, "Disable Accounts: Entry 1: Account 00002 is not active.")
+        self.am.logger.close()
+        self.assertEqual([acc['account_number'] for acc in read_old_bank_accounts(self.path)], ['1', '4', '5', '0'])
+        with open(self.log) as f:
+            self.assertEqual([line[:2] for line in f], ["07", "07", "06", "06"])
+
+class TestPayBills(unittest.TestCase):
+    def test_batch_run_with_settlement_totals(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "accounts.txt")
+            log = os.path.join(tmp, "log.txt")
+            write_new_current_accounts([
+                {'account_number': '1', 'name': 'Admin', 'status': 'A', 'balance': 900000, 'total_transactions': 0, 'plan': 'NP'},
+                {'account_number': '2', 'name': 'Ann', 'status': 'A', 'balance': 300000, 'total_transactions': 0, 'plan': 'NP'},
+                {'account_number': '3', 'name': 'Bob', 'status': 'D', 'balance': 300000, 'total_transactions': 0, 'plan': 'NP'},
+            ], path)
+            ts = TransactionSystem(AccountStore(path), TransactionLogger(log))
+            payments = [
+                {'account_number': '00002', 'name': 'Ann', 'company': 'EC', 'amount': 150000},
+                {'account_number': '00002', 'name': 'Ann', 'company': 'CQ', 'amount': 60000},
+                {'account_number': '00002', 'name': 'Ann', 'company': 'Fast Internet, Inc. (FI)', 'amount': 50000},
+                {'account_number': '00001', 'name': 'Admin', 'company': 'FI', 'amount': 500000},
+                {'account_number': '00003', 'name': 'Bob', 'company': 'EC', 'amount': 100},
+                {'account_number': '00001', 'name': 'Admin', 'company': 'XX', 'amount': 100},
+                {'account_number': '00001', 'name': 'Admin', 'company': 'EC', 'amount': 500000},
+            ]
+            with patch("sys.stdout", new=StringIO()):
+                with patch.object(ts.store, "commit", wraps=ts.store.commit) as mock_commit:
+                    result = ts.pay_bills(payments)
+                    mock_commit.assert_called_once()
+            ts.logger.close()
+            self.assertEqual(result["paid"], 3)
+            self.assertEqual([index for index, _ in result["rejected"]], [2, 5, 6, 7])
+            self.assertEqual(result["rejected"][0][1],
+                             "Pay Bills: Payment 2: Exceeds maximum bill payment limit for this session ($2000.00)")
+            self.assertEqual(result["rejected"][3][1], "Pay Bills: Payment 7: Insufficient funds in account")
+            self.assertEqual(result["settlement"], {'CQ': {'count': 0, 'total': 0},
+                                                    'EC': {'count': 1, 'total': 150000},
+                                                    'FI': {'count': 2, 'total': 550000}})
+            balances = {acc['account_number']: acc['balance'] for acc in read_old_bank_accounts(path)}
+            self.assertEqual((balances['1'], balances['2']), (400000, 100000))
+            with open(log) as f:
+                self.assertEqual(f.read().count("03_"), 3)
+            self.assertEqual(ts.session_bill_total, 700000)
+
+    def test_session_limit_and_stale_snapshot(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = write_sample_accounts(tmp)
+            other = AccountStore(path, locking=True)
+            ts = TransactionSystem(AccountStore(path, locking=True), TransactionLogger(os.path.join(tmp, "log.txt")))
+            ts.session_bill_total = 150000
+            ts.store.get('2')
+            other.update('2', balance=400000)
+            other.commit()
+            payments = [
+                {'account_number': '00002', 'name': 'Standard', 'company': 'EC', 'amount': 60000},
+                {'account_number': '00002', 'name': 'Standard', 'company': 'CQ', 'amount': 50000},
+            ]
+            with patch("sys.stdout", new=StringIO()):
+                result = ts.pay_bills(payments)
+            ts.logger.close()
+            self.assertEqual([index for index, _ in result["rejected"]], [1])
+            self.assertEqual(ts.session_bill_total, 200000)
+            self.assertEqual(AccountStore(path).get('2')['balance'], 350000)
+
+    def test_pay_manifest(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "bills.txt")
+            with open(path, "w") as f:
+                f.write("00002 Ann                  EC 00012.50\n")
+            self.assertEqual(read_manifest(path, "pay"),
+                             ([{'account_number': '00002', 'name': 'Ann', 'company': 'EC', 'amount': 1250}], []))
+
+    def test_manifest_reports_failed_run(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "bills.txt")
+            with open(path, "w") as f:
+                f.write("00002 Standard             EC 00012.50\n")
+            argv = ["pay", path, "--accounts", write_sample_accounts(tmp), "--log", os.path.join(tmp, "log.txt")]
+            with patch("transactionsystem.TransactionSystem.pay_bills", side_effect=OSError("disk full")):
+                with patch("sys.stdout", new=StringIO()) as fake_out:
+                    self.assertEqual(manifest_main(argv), 1)
+            self.assertIn("ERROR: Bulk pay not applied: disk full: Manifest", fake_out.getvalue())
+
 if __name__ == "__main__":
     unittest.main()
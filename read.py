@@ -1,82 +1,128 @@
-def read_old_bank_accounts(file_path):
+import os
+import instrumentation
+from account import Account
+from money import parse_balance_field
+
+# Shared plan strings, so records do not each hold their own copy of the slice.
+_PLANS = {'SP': 'SP', 'NP': 'NP'}
+
+def _parse_account_line(line, line_num):
     """
-    Reads and validates the bank account file format with plan type (SP/NP)
-    Returns list of accounts and prints fatal errors for invalid format
+    Validates one line of the accounts file and returns its Account record
+    (balance in integer cents), or prints the fatal error and returns None.
     """
-    accounts = []
-    with open(file_path, 'r') as file:
-        for line_num, line in enumerate(file, 1):
-            clean_line = line.rstrip('\n')
-            
-            # Validate line length (now 44 chars to include plan type)
-            if len(clean_line) != 45:
-                print(f"ERROR: Fatal error - Line {line_num}: Invalid length ({len(clean_line)} chars, expected 45)")
-                continue
-
-            try:
-                # Extract fields with positional validation
-                account_number = clean_line[0:5]
-                name = clean_line[6:26]  
-                status = clean_line[27]
-                balance_str = clean_line[29:37]  # 8 characters
-                transactions_str = clean_line[38:42]  # 4 characters
-                plan_type = clean_line[43:45]  # 2 characters (SP/NP)
-
-                # Validate account number
-                if not account_number.isdigit():
-                    print(f"ERROR: Fatal error - Line {line_num}: Account number must be 5 digits")
-                    continue
+    clean_line = line.rstrip('\n')
 
-                # Validate status
-                if status not in ('A', 'D'):
-                    print(f"ERROR: Fatal error - Line {line_num}: Invalid status '{status}'. Must be 'A' or 'D'")
-                    continue
+    # Validate line length (now 44 chars to include plan type)
+    if len(clean_line) != 45:
+        print(f"ERROR: Fatal error - Line {line_num}: Invalid length ({len(clean_line)} chars, expected 45)")
+        return None
 
-                # Validate balance format with explicit negative check
-                if balance_str[0] == '-':
-                    print(f"ERROR: Fatal error - Line {line_num}: Negative balance detected: {balance_str}")
-                    continue
-                
-                if (len(balance_str) != 8 or 
-                    balance_str[5] != '.' or 
-                    not balance_str[:5].isdigit() or 
-                    not balance_str[6:].isdigit()):
-                    print(f"ERROR: Fatal error - Line {line_num}: Invalid balance format. Expected XXXXX.XX, got {balance_str}")
-                    continue
+    try:
+        # Extract fields with positional validation
+        account_number = clean_line[0:5]
+        name = clean_line[6:26]  
+        status = clean_line[27]
+        balance_str = clean_line[29:37]  # 8 characters
+        transactions_str = clean_line[38:42]  # 4 characters
+        plan_type = clean_line[43:45]  # 2 characters (SP/NP)
 
-                # Validate transaction count
-                if not transactions_str.isdigit():
-                    print(f"ERROR: Fatal error - Line {line_num}: Transaction count must be 4 digits")
-                    continue
+        # Validate account number
+        if not account_number.isdigit():
+            print(f"ERROR: Fatal error - Line {line_num}: Account number must be 5 digits")
+            return None
 
-                # Validate plan type
-                if plan_type not in ('SP', 'NP'):
-                    print(f"ERROR: Fatal error - Line {line_num}: Invalid plan type '{plan_type}'. Must be SP or NP")
-                    continue
+        # Validate status
+        if status not in ('A', 'D'):
+            print(f"ERROR: Fatal error - Line {line_num}: Invalid status '{status}'. Must be 'A' or 'D'")
+            return None
+
+        # Validate balance format with explicit negative check
+        if balance_str[0] == '-':
+            print(f"ERROR: Fatal error - Line {line_num}: Negative balance detected: {balance_str}")
+            return None
+        
+        if (len(balance_str) != 8 or 
+            balance_str[5] != '.' or 
+            not balance_str[:5].isdigit() or 
+            not balance_str[6:].isdigit()):
+            print(f"ERROR: Fatal error - Line {line_num}: Invalid balance format. Expected XXXXX.XX, got {balance_str}")
+            return None
+
+        # Validate transaction count
+        if not transactions_str.isdigit():
+            print(f"ERROR: Fatal error - Line {line_num}: Transaction count must be 4 digits")
+            return None
+
+        # Validate plan type
+        if plan_type not in ('SP', 'NP'):
+            print(f"ERROR: Fatal error - Line {line_num}: Invalid plan type '{plan_type}'. Must be SP or NP")
+            return None
+
+        # Convert values
+        balance = parse_balance_field(balance_str)
+        transactions = int(transactions_str)
 
-                # Convert values
-                balance = float(balance_str)
-                transactions = int(transactions_str)
+        # Business rule validation
+        if balance < 0:
+            print(f"ERROR: Fatal error - Line {line_num}: Negative balance detected")
+            return None
+        if transactions < 0:
+            print(f"ERROR: Fatal error - Line {line_num}: Negative transaction not allowed")
+            return None
 
-                # Business rule validation
-                if balance < 0:
-                    print(f"ERROR: Fatal error - Line {line_num}: Negative balance detected")
+        return Account(account_number.lstrip('0') or '0', name.strip(), status, balance, transactions,
+                       _PLANS[plan_type])
+
+    except Exception as e:
+        print(f"ERROR: Fatal error - Line {line_num}: Unexpected error - {str(e)}")
+        return None
+
+def iter_accounts(file_path, status=None, plan=None, min_balance=None, max_balance=None):
+    """
+    Lazily yields the validated records of the accounts file, one line at a
+    time, printing the same fatal errors as read_old_bank_accounts. Only
+    records matching every given filter are yielded: status ('A'/'D'), plan
+    ('SP'/'NP') and an inclusive balance range in cents. The file is closed
+    as soon as the caller stops iterating.
+    """
+    with open(file_path, 'r') as file:
+        records = 0
+        try:
+            for line_num, line in enumerate(file, 1):
+                acc = _parse_account_line(line, line_num)
+                if acc is None:
                     continue
-                if transactions < 0:
-                    print(f"ERROR: Fatal error - Line {line_num}: Negative transaction not allowed")
+                if status is not None and acc['status'] != status:
                     continue
+                if plan is not None and acc['plan'] != plan:
+                    continue
+                if min_balance is not None and acc['balance'] < min_balance:
+                    continue
+                if max_balance is not None and acc['balance'] > max_balance:
+                    continue
+                records += 1
+                yield acc
+        finally:
+            # Also runs when the caller stops early (find_account); the OS file
+            # position counts what was actually read, read-ahead included.
+            if instrumentation.ENABLED:
+                instrumentation.record("read.iter_accounts",
+                                       bytes_read=os.lseek(file.fileno(), 0, os.SEEK_CUR),
+                                       file_opens=1, records=records)
 
-                accounts.append({
-                    'account_number': account_number.lstrip('0') or '0',
-                    'name': name.strip(),
-                    'status': status,
-                    'balance': balance,
-                    'total_transactions': transactions,
-                    'plan': plan_type
-                })
-
-            except Exception as e:
-                print(f"ERROR: Fatal error - Line {line_num}: Unexpected error - {str(e)}")
-                continue
+def find_account(file_path, account_number):
+    """
+    Returns the first record whose (normalized) account number matches, or
+    None; the scan stops at the match.
+    """
+    key = account_number.lstrip('0') or '0'
+    return next((acc for acc in iter_accounts(file_path) if acc['account_number'] == key), None)
 
-    return accounts
+@instrumentation.instrumented
+def read_old_bank_accounts(file_path):
+    """
+    Reads and validates the bank account file format with plan type (SP/NP)
+    Returns list of Account records (balances in integer cents) and prints fatal errors for invalid format
+    """
+    return list(iter_accounts(file_path))
@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+import argparse
+import os
+import re
+import shutil
+import sys
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from sessionengine import SessionEngine
+from mergelogs import TERMINATOR_POLICIES, merge_logs
+
+ACCOUNTS_PATH = "currentaccounts.txt"
+MERGED_LOG_PATH = "merged_daily_transactions.txt"
+SESSION_LOG_TEMPLATE = "transactions_day_{name}.txt"
+
+
+def session_sort_key(path):
+    """Orders session scripts naturally, so session10.txt sorts after session2.txt."""
+    name = os.path.basename(path)
+    return [int(part) if part.isdigit() else part for part in re.split(r'(\d+)', name)]
+
+
+def session_log_path(session_path, output_dir="."):
+    name = os.path.splitext(os.path.basename(session_path))[0]
+    return os.path.abspath(os.path.join(output_dir, SESSION_LOG_TEMPLATE.format(name=name)))
+
+
+def run_session(session_path, accounts_path, log_path):
+    """
+    Replays one session script with a SessionEngine in the current process.
+
+    The session runs against a private copy of the start-of-day accounts
+    file, so sessions never see each other's changes and can run at the same
+    time. The copy is discarded afterwards: only the session's log reaches
+    the master file, through the back end at day close, so use
+    replay_sessions_serial where the accounts file itself must end up with
+    every session's changes. Returns (exit_status, captured_output).
+    """
+    if os.path.exists(log_path):
+        os.remove(log_path)
+    work_dir = tempfile.mkdtemp(prefix="session_")
+    try:
+        accounts_copy = os.path.join(work_dir, os.path.basename(accounts_path))
+        shutil.copyfile(accounts_path, accounts_copy)
+        engine = SessionEngine(accounts_copy)
+        try:
+            return engine.run_file(session_path, log_path)
+        finally:
+            engine.store.invalidate()
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+def _run_session_job(job):
+    return run_session(*job)
+
+
+def merge_session_logs(log_paths, merged_path=MERGED_LOG_PATH, terminators="keep", by_account=False):
+    """
+    Merges per-session logs in the given (deterministic) order; by default
+    they are concatenated as they are (see merge_logs for the options).
+    """
+    merge_logs(log_paths, merged_path, terminators, by_account)
+
+
+def replay_sessions(session_paths, accounts_path=ACCOUNTS_PATH, output_dir=".",
+                    merged_path=MERGED_LOG_PATH, workers=None, **merge_options):
+    """
+    Replays every session script in a process pool, each with its own log
+    file, then merges the logs in natural session order. Session output is
+    printed in that same order, so runs are reproducible whatever the
+    scheduling. Returns the list of (session_path, exit_status).
+    """
+    session_paths = sorted(session_paths, key=session_sort_key)
+    log_paths = [session_log_path(path, output_dir) for path in session_paths]
+    jobs = [(path, accounts_path, log_path) for path, log_path in zip(session_paths, log_paths)]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        results = list(pool.map(_run_session_job, jobs))
+    return _report(session_paths, log_paths, results, merged_path, merge_options)
+
+
+def replay_sessions_serial(session_paths, accounts_path=ACCOUNTS_PATH, output_dir=".",
+                           merged_path=MERGED_LOG_PATH, **merge_options):
+    """
+    Replays the session scripts one after another in this process against
+    the live accounts file, so each session sees the previous sessions'
+    changes (the behaviour of running frontend.py once per session).
+    """
+    session_paths = sorted(session_paths, key=session_sort_key)
+    log_paths = [session_log_path(path, output_dir) for path in session_paths]
+    engine = SessionEngine(accounts_path)
+    results = []
+    for path, log_path in zip(session_paths, log_paths):
+        if os.path.exists(log_path):
+            os.remove(log_path)
+        results.append(engine.run_file(path, log_path))
+    return _report(session_paths, log_paths, results, merged_path, merge_options)
+
+
+def _report(session_paths, log_paths, results, merged_path, merge_options):
+    statuses = []
+    for path, (status, output) in zip(session_paths, results):
+        print(f"→ Session {path}")
+        print(output, end="")
+        statuses.append((path, status))
+    merge_session_logs(log_paths, merged_path, **merge_options)
+    return statuses
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Replay front-end session scripts.")
+    parser.add_argument("sessions", nargs="+", help="session script files")
+    parser.add_argument("--accounts", default=ACCOUNTS_PATH, help="start-of-day accounts file")
+    parser.add_argument("--output-dir", default=".", help="directory for per-session logs")
+    parser.add_argument("--merged", default=MERGED_LOG_PATH, help="merged transaction log to write")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: CPU count)")
+    parser.add_argument("--serial", action="store_true",
+                        help="run sessions in order in one process against the live accounts file")
+    parser.add_argument("--terminators", choices=TERMINATOR_POLICIES, default="keep",
+                        help="what to do with the sessions' end-of-session records when merging")
+    parser.add_argument("--by-account", action="store_true", help="order the merged log by account number")
+    args = parser.parse_args(argv)
+
+    merge_options = {"terminators": args.terminators, "by_account": args.by_account}
+    if args.serial:
+        statuses = replay_sessions_serial(args.sessions, args.accounts, args.output_dir, args.merged,
+                                          **merge_options)
+    else:
+        statuses = replay_sessions(args.sessions, args.accounts, args.output_dir, args.merged, args.workers,
+                                   **merge_options)
+    failed = [path for path, status in statuses if status != 0]
+    for path in failed:
+        print(f"ERROR: Session {path} did not complete")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
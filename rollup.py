@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+import argparse
+import hashlib
+import json
+import os
+import sys
+from logreader import aggregate_log
+from money import format_amount
+
+ROLLUP_SUFFIX = ".rollup"
+HASH_CHUNK = 1 << 20
+
+
+def rollup_path(log_path: str) -> str:
+    return log_path + ROLLUP_SUFFIX
+
+
+def file_digest(file_path: str) -> str:
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as file:
+        for chunk in iter(lambda: file.read(HASH_CHUNK), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def load_rollup(log_path: str):
+    """Returns the saved aggregate of a day's log, or None if there is none."""
+    try:
+        with open(rollup_path(log_path), 'r') as file:
+            return json.load(file)
+    except (OSError, ValueError):
+        return None
+
+
+def _save_rollup(log_path: str, rollup: dict) -> None:
+    path = rollup_path(log_path)
+    temp_path = f"{path}.tmp"
+    with open(temp_path, 'w') as file:
+        json.dump(rollup, file, separators=(',', ':'))
+    os.replace(temp_path, path)
+
+
+def close_day(log_path: str, force: bool = False) -> dict:
+    """
+    Returns the aggregate (see logreader.aggregate_records) of one day's
+    merged transaction log, saved next to it in <log>.rollup.
+
+    The saved aggregate records the size, modification time and SHA-256 of
+    the log it was computed from. It is reused as long as size and mtime
+    match, or the content hash still matches after a touch; only a changed
+    log is aggregated again.
+    """
+    stat = os.stat(log_path)
+    rollup = None if force else load_rollup(log_path)
+    if rollup is not None and (rollup['size'], rollup['mtime_ns']) == (stat.st_size, stat.st_mtime_ns):
+        return rollup
+    digest = file_digest(log_path)
+    if rollup is None or rollup['size'] != stat.st_size or rollup['sha256'] != digest:
+        rollup = aggregate_log(log_path)
+    rollup.update(size=stat.st_size, mtime_ns=stat.st_mtime_ns, sha256=digest)
+    _save_rollup(log_path, rollup)
+    return rollup
+
+
+def combine(rollups) -> dict:
+    """Sums day aggregates into one aggregate of the same shape."""
+    combined = {'days': 0, 'records': 0, 'accounts': {}, 'codes': {}}
+    for rollup in rollups:
+        combined['days'] += 1
+        combined['records'] += rollup['records']
+        for table in ('accounts', 'codes'):
+            target = combined[table]
+            for key, totals in rollup[table].items():
+                current = target.get(key)
+                if current is None:
+                    target[key] = dict(totals)
+                else:
+                    for field, value in totals.items():
+                        current[field] += value
+    return combined
+
+
+def roll_up(log_paths, last=None) -> dict:
+    """
+    Brings the aggregate of every day's log up to date and combines the last
+    `last` days (all of them by default): last=7 gives the weekly summary,
+    the month's logs give the month-to-date one.
+    """
+    rollups = [close_day(path) for path in log_paths]
+    if last is not None:
+        rollups = rollups[-last:] if last else []
+    return combine(rollups)
+
+
+def format_summary(summary: dict) -> str:
+    lines = [f"{summary['days']} day(s), {summary['records']} transactions, "
+             f"{len(summary['accounts'])} accounts"]
+    for code in sorted(summary['codes']):
+        totals = summary['codes'][code]
+        lines.append(f"  {code}: {totals['count']:>8} transactions  total {format_amount(totals['total']):>12}"
+                     f"  net {format_amount(totals['net']):>12}")
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    from replay import session_sort_key
+    parser = argparse.ArgumentParser(description="Roll daily transaction logs up into summaries.")
+    parser.add_argument("logs", nargs="+", help="daily merged transaction logs (taken in natural name order)")
+    parser.add_argument("--last", type=int, default=None, help="only combine the last N days (7 for a week)")
+    args = parser.parse_args(argv)
+
+    print(format_summary(roll_up(sorted(args.logs, key=session_sort_key), args.last)))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,393 @@
+#!/usr/bin/env python3
+import argparse
+import asyncio
+import contextlib
+import io
+import math
+import sys
+import frontend
+from accountmanagement import AccountManager, NAME_TOO_LONG
+from transactionsystem import TransactionSystem, ALLOWED_COMPANIES
+from authsystem import login, is_admin
+from transactionlogger import LOG_NAME_WIDTH, TransactionLogger
+from accountstore import get_account_store, normalize_account_number
+from accountlock import StaleSnapshotError
+from money import format_account, parse_amount
+from print_error import log_constraint_error
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+DEFAULT_FLUSH_INTERVAL = 1.0
+LISTEN_BACKLOG = 1024
+
+
+class AccountLocks:
+    """One asyncio.Lock per account number, created on first use."""
+
+    def __init__(self):
+        self._locks = {}
+
+    def lock(self, account_number: str) -> asyncio.Lock:
+        key = normalize_account_number(account_number)
+        lock = self._locks.get(key)
+        if lock is None:
+            lock = self._locks[key] = asyncio.Lock()
+        return lock
+
+    @contextlib.asynccontextmanager
+    async def hold(self, *account_numbers):
+        """
+        Holds the locks of every given account. They are taken in sorted order
+        so two operations on the same pair of accounts cannot deadlock.
+        """
+        keys = sorted({normalize_account_number(n) for n in account_numbers})
+        async with contextlib.AsyncExitStack() as stack:
+            for key in keys:
+                await stack.enter_async_context(self.lock(key))
+            yield
+
+
+class ClientSession:
+    """
+    One teller session over a line-protocol connection. The dialogue is the
+    one frontend.main runs on a terminal: prompts are sent without a newline
+    and every answer is one line. Operations go through the programmatic
+    TransactionSystem/AccountManager API against the server's shared ledger.
+    """
+
+    def __init__(self, server, reader, writer):
+        self.server = server
+        self.reader = reader
+        self.writer = writer
+        self.ts = TransactionSystem(server.store, server.logger)
+        self.am = AccountManager(server.store, server.logger)
+
+    def say(self, text: str = "") -> None:
+        self.writer.write(f"{text}\n".encode())
+
+    async def ask(self, prompt: str) -> str:
+        self.writer.write(prompt.encode())
+        await self.writer.drain()
+        line = await self.reader.readline()
+        if not line:
+            raise EOFError("client disconnected")
+        return line.decode().strip()
+
+    def call(self, func, *args):
+        """
+        Runs a synchronous ledger operation and sends what it prints to the
+        client. Nothing awaits inside, so the output cannot mix with another
+        session's.
+        """
+        output = io.StringIO()
+        with contextlib.redirect_stdout(output):
+            result = func(*args)
+        self.writer.write(output.getvalue().encode())
+        return result
+
+    async def amount(self, context: str, prompt: str):
+        try:
+            return parse_amount(await self.ask(prompt))
+        except ValueError:
+            self.call(self.ts._fail, context, "Invalid amount entered")
+            return None
+
+    async def holder(self, admin_prompt: str) -> str:
+        admin_input = (await self.ask("Are you logged in as admin? (y/n): ")).lower()
+        return await self.ask(admin_prompt if admin_input == 'y' else "Enter your name: ")
+
+    async def run(self) -> None:
+        try:
+            user = await self.login()
+            admin_flag = user['account_type'] == 'admin'
+            while True:
+                for line in frontend.menu_lines(admin_flag):
+                    self.say(line)
+                choice = await self.ask("Enter choice: ")
+                self.say()
+                if choice == "0":
+                    break
+                handler = self.handlers(admin_flag).get(choice)
+                if handler is None:
+                    self.say("⚠ Invalid choice or insufficient privileges.\n")
+                else:
+                    await handler()
+            self.say("\n--- Final Account List ---")
+            self.print_accounts()
+            self.say("\n--- Ending Session ---")
+            self.call(self.server.logger.log_transaction, "00", "END_OF_SE", "000000", 0, "ES")
+            self.say(f"Session ended. Transaction log is available at: {self.server.logger.log_file}")
+            await self.writer.drain()
+        except (EOFError, ConnectionError):
+            pass
+
+    async def login(self) -> dict:
+        while True:
+            role = (await self.ask("Login as (admin/standard)? ")).lower()
+            if role in ("admin", "standard"):
+                break
+            self.say("Please enter 'admin' or 'standard'.")
+        while True:
+            acc_num = await self.ask("Account Number: ")
+            name = await self.ask("Account Name  : ")
+            user = self.call(login, acc_num, name, True, self.server.store)
+            if user and (role == "standard" or is_admin(acc_num, self.server.store)):
+                self.say(f"\n✔ Logged in as {name} ({role.capitalize()})\n")
+                return user
+            self.say("❌ Login failed or insufficient privileges. Try again.\n")
+
+    def handlers(self, admin_flag: bool) -> dict:
+        handlers = {
+            "4": self.withdraw,
+            "5": self.deposit,
+            "6": self.transfer,
+            "7": self.pay_bill,
+            "9": self.view_accounts,
+        }
+        if admin_flag:
+            handlers.update({"1": self.create_account, "2": self.delete_account,
+                             "3": self.disable_account, "8": self.change_plan})
+        return handlers
+
+    def print_accounts(self) -> None:
+        for acc in self.server.store.accounts():
+            self.say(format_account(acc))
+
+    async def view_accounts(self) -> None:
+        self.say("\nCurrent Accounts:")
+        self.print_accounts()
+
+    async def withdraw(self) -> None:
+        self.say("=== Withdraw Money ===")
+        name = await self.holder("Enter the account holder's name: ")
+        account_number = await self.ask("Enter the account number: ")
+        if self.call(self.ts._login, account_number, name) is None:
+            return
+        amount = await self.amount("Withdraw", "Enter the amount to withdraw: ")
+        if amount is not None:
+            async with self.server.locks.hold(account_number):
+                self.call(self.ts.withdraw, account_number, name, amount)
+
+    async def transfer(self) -> None:
+        self.say("=== Transfer Money ===")
+        name = await self.holder("Enter the account holder's name (for the source account): ")
+        from_account = await self.ask("Enter the source account number: ")
+        if self.call(self.ts._login, from_account, name) is None:
+            return
+        to_account = await self.ask("Enter the destination account number: ")
+        if self.server.store.get(normalize_account_number(to_account)) is None:
+            self.call(self.ts._fail, "Transfer", "Destination account not found")
+            return
+        amount = await self.amount("Transfer", "Enter the amount to transfer: ")
+        if amount is not None:
+            async with self.server.locks.hold(from_account, to_account):
+                self.call(self.ts.transfer, from_account, to_account, amount, name)
+
+    async def pay_bill(self) -> None:
+        self.say("=== Pay Bill ===")
+        name = await self.holder("Enter the account holder's name: ")
+        account_number = await self.ask("Enter the account number: ")
+        if self.call(self.ts._login, account_number, name) is None:
+            return
+        company = await self.ask("Enter the company to whom the bill is being paid: ")
+        if company not in ALLOWED_COMPANIES:
+            self.call(self.ts._fail, "Pay Bill",
+                      f"Invalid company. Allowed companies: {', '.join(ALLOWED_COMPANIES)}")
+            return
+        amount = await self.amount("Pay Bill", "Enter the amount to pay: ")
+        if amount is not None:
+            async with self.server.locks.hold(account_number):
+                self.call(self.ts.pay_bill, account_number, name, company, amount)
+
+    async def deposit(self) -> None:
+        self.say("=== Deposit Money ===")
+        name = await self.holder("Enter the account holder's name: ")
+        account_number = await self.ask("Enter the account number: ")
+        if self.call(self.ts._login, account_number, name) is None:
+            return
+        amount = await self.amount("Deposit", "Enter the amount to deposit: ")
+        if amount is not None:
+            async with self.server.locks.hold(account_number):
+                self.call(self.ts.deposit, account_number, name, amount)
+
+    async def change_plan(self) -> None:
+        self.say("=== Change Transaction Payment Plan ===")
+        if (await self.ask("Are you logged in as admin? (y/n): ")).lower() != 'y':
+            self.call(self.ts._fail, "Change Plan", "Change plan transaction requires admin privileges")
+            return
+        name = await self.ask("Enter the account holder's name: ")
+        account_number = await self.ask("Enter the account number: ")
+        async with self.server.locks.hold(account_number):
+            self.call(self.ts.change_plan, account_number, name)
+
+    async def admin_credentials(self, context: str, denied: str) -> bool:
+        if (await self.ask("Are you logged in as admin? (y/n): ")).lower() != 'y':
+            self.call(self.am._fail, context, denied)
+            return False
+        admin_acc = await self.ask("Enter your admin account number: ")
+        admin_name = await self.ask("Enter your admin account name: ")
+        admin_user = self.call(login, admin_acc, admin_name, True, self.server.store)
+        if admin_user is None or not is_admin(admin_acc, self.server.store):
+            self.call(self.am._fail, "Admin Authentication",
+                      "Invalid admin credentials or account is not an admin.")
+            return False
+        return True
+
+    async def create_account(self) -> None:
+        self.say("=== Create New Bank Account ===")
+        if not await self.admin_credentials("Create Account", "Account creation requires admin privileges."):
+            return
+        name = await self.ask(f"Enter the account holder's name (max {LOG_NAME_WIDTH} characters): ")
+        if len(name) > LOG_NAME_WIDTH:
+            self.call(self.am._fail, "Create Account", NAME_TOO_LONG)
+            return
+        account_number = await self.ask("Enter the new account number: ")
+        if normalize_account_number(account_number) in self.server.store:
+            self.call(self.am._fail, "Create Account", "Account number already exists.")
+            return
+        acc_type = (await self.ask("Enter account type (admin/basic): ")).lower()
+        if acc_type not in ("admin", "basic"):
+            self.call(self.am._fail, "Create Account", "Invalid account type. Must be 'admin' or 'basic'.")
+            return
+        try:
+            balance = parse_amount(await self.ask("Enter the initial balance (max $99999.99): "))
+        except ValueError:
+            self.call(self.am._fail, "Create Account", "Invalid balance amount entered.")
+            return
+        async with self.server.locks.hold(account_number):
+            if self.call(self.am.create_new_account, account_number, name, acc_type, balance):
+                self.say("Note: This account will not be available for transactions until the next session.")
+
+    async def delete_account(self) -> None:
+        self.say("=== Delete Bank Account ===")
+        if not await self.admin_credentials("Delete Account", "Deletion requires admin privileges."):
+            return
+        name = await self.ask("Enter the target account holder's name: ")
+        account_number = await self.ask("Enter the target account number: ")
+        async with self.server.locks.hold(account_number):
+            self.call(self.am.delete_existing_account, account_number, name)
+
+    async def disable_account(self) -> None:
+        self.say("=== Disable Bank Account ===")
+        if not await self.admin_credentials("Disable Account",
+                                            "Disabling an account requires admin privileges."):
+            return
+        name = await self.ask("Enter the target account holder's name: ")
+        account_number = await self.ask("Enter the target account number: ")
+        async with self.server.locks.hold(account_number):
+            self.call(self.am.disable_existing_account, account_number, name)
+
+
+class BankServer:
+    """
+    Serves many concurrent teller sessions from one process.
+
+    All sessions share one AccountStore (the in-memory ledger) and one
+    TransactionLogger. Ledger changes are not written per transaction:
+    commits are deferred and a background task persists the accumulated
+    changes, then flushes the buffered log records, every flush_interval
+    seconds and once more at shutdown. The logger never writes on its own,
+    so the log only holds transactions the accounts file has.
+    """
+
+    def __init__(self, accounts_path: str = frontend.FILE_PATH, log_file: str = frontend.LOG_FILE,
+                 flush_interval: float = DEFAULT_FLUSH_INTERVAL, store=None):
+        self.store = store if store is not None else get_account_store(accounts_path)
+        self.logger = TransactionLogger(log_file, max_buffer_bytes=sys.maxsize, max_delay=math.inf)
+        self.flush_interval = flush_interval
+        self.locks = AccountLocks()
+        self.active_sessions = 0
+        self.completed_sessions = 0
+
+    async def handle_client(self, reader, writer) -> None:
+        self.active_sessions += 1
+        try:
+            await ClientSession(self, reader, writer).run()
+        finally:
+            self.active_sessions -= 1
+            self.completed_sessions += 1
+            writer.close()
+            with contextlib.suppress(ConnectionError):
+                await writer.wait_closed()
+
+    def flush(self) -> bool:
+        """
+        Persists ledger changes now and, once they are written, the buffered
+        log records. Failures are reported instead of raised, so the periodic
+        flusher keeps running, and False is returned:
+          - a failed ledger write keeps the changes and their log records
+            pending, and the next flush retries them;
+          - a stale snapshot (another process wrote the accounts file) cannot
+            succeed on retry, so the store reloads the file and the
+            transactions since the last flush are dropped with their records.
+        """
+        try:
+            self.store.flush()
+        except StaleSnapshotError as e:
+            self.store.invalidate()
+            dropped = self.logger.discard()
+            log_constraint_error("Server Flush", f"{e}; accounts reloaded, {dropped} unsaved log records dropped")
+            return False
+        except (OSError, ValueError) as e:
+            log_constraint_error("Server Flush", f"Ledger changes not written: {e}")
+            return False
+        try:
+            self.logger.flush()
+        except OSError as e:
+            log_constraint_error("Server Flush", f"Log records not written: {e}")
+            return False
+        return True
+
+    async def _flush_periodically(self) -> None:
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            self.flush()
+
+    async def serve(self, host: str = DEFAULT_HOST, port: int = DEFAULT_PORT, unix_path: str = None,
+                    ready=None) -> None:
+        """
+        Accepts clients until cancelled. `ready`, if given, is an
+        asyncio.Future that receives the listening server once it is bound.
+        """
+        if unix_path:
+            server = await asyncio.start_unix_server(self.handle_client, unix_path, backlog=LISTEN_BACKLOG)
+        else:
+            server = await asyncio.start_server(self.handle_client, host, port, backlog=LISTEN_BACKLOG)
+        with self.store.deferred_commits():
+            flusher = asyncio.create_task(self._flush_periodically())
+            try:
+                async with server:
+                    if ready is not None:
+                        ready.set_result(server)
+                    await server.serve_forever()
+            finally:
+                flusher.cancel()
+                with contextlib.suppress(asyncio.CancelledError):
+                    await flusher
+                if not self.flush():
+                    # Never log what the accounts file does not have.
+                    self.logger.discard()
+        self.logger.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve concurrent SimpleBank teller sessions over a line protocol.")
+    parser.add_argument("--host", default=DEFAULT_HOST)
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--unix", help="listen on this Unix socket path instead of TCP")
+    parser.add_argument("--accounts", default=frontend.FILE_PATH)
+    parser.add_argument("--log", default=frontend.LOG_FILE)
+    parser.add_argument("--flush-interval", type=float, default=DEFAULT_FLUSH_INTERVAL,
+                        help="seconds between batched writes of the ledger and log")
+    args = parser.parse_args(argv)
+
+    server = BankServer(args.accounts, args.log, args.flush_interval)
+    try:
+        asyncio.run(server.serve(args.host, args.port, args.unix))
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,65 @@
+import contextlib
+import io
+import sys
+import traceback
+import frontend
+from accountstore import AccountStore, get_account_store
+from transactionlogger import TransactionLogger
+
+
+def parse_session_script(text):
+    """
+    Splits a session script (the contents of a sessionN.txt file) into the
+    token stream the front end reads, one token per input() call.
+    """
+    return text.splitlines()
+
+
+def load_session_script(path):
+    with open(path, 'r') as file:
+        return parse_session_script(file.read())
+
+
+class SessionEngine:
+    """
+    Runs scripted front-end sessions inside the current process.
+
+    Each session drives frontend.main (prompt_login, print_menu and the
+    TransactionSystem/AccountManager handlers) with its tokens fed through
+    stdin, exactly as if the script had been piped into `python3 frontend.py`.
+    The engine keeps one AccountStore for all of its sessions, so modules and
+    parsed accounts are loaded once and every session sees the changes made
+    by the ones before it.
+    """
+
+    def __init__(self, accounts_path=frontend.FILE_PATH, store=None):
+        if store is None:
+            store = (get_account_store(accounts_path) if accounts_path == frontend.FILE_PATH
+                     else AccountStore(accounts_path))
+        self.store = store
+
+    def run(self, tokens, log_file=frontend.LOG_FILE):
+        """
+        Replays one tokenized session script. Returns (exit_status, output),
+        where exit_status is 1 if the session ended with an exception (for
+        example a script that runs out of input), as the process would.
+        """
+        script = io.StringIO("".join(token + "\n" for token in tokens))
+        output = io.StringIO()
+        status = 0
+        original_stdin = sys.stdin
+        sys.stdin = script
+        try:
+            with contextlib.redirect_stdout(output):
+                try:
+                    frontend.main(log_file=log_file, store=self.store)
+                except Exception:
+                    print(traceback.format_exc(), end="")
+                    status = 1
+        finally:
+            sys.stdin = original_stdin
+            TransactionLogger(log_file).close()
+        return status, output.getvalue()
+
+    def run_file(self, session_path, log_file=frontend.LOG_FILE):
+        return self.run(load_session_script(session_path), log_file)
@@ -1,43 +1,192 @@
+import atexit
+import os
+import time
+import instrumentation
+
+# Durability policies for a group commit:
+#   "none"  - leave the records in the open file object's buffer
+#   "flush" - hand the records to the operating system
+#   "fsync" - also fsync the file once every `fsync_every` records
+DURABILITY_POLICIES = ("none", "flush", "fsync")
+# Width of a record's account holder field. A name must fit it for the back
+# end to create the account with the same name.
+LOG_NAME_WIDTH = 10
+# Misc field of the second "02" record of a transfer, the one logged for the
+# destination account; its amount is credited instead of debited.
+TRANSFER_CREDIT = "CR"
+
+
+class _LogChannel:
+    """Open handle and pending records shared by every logger of one log file."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.handle = None
+        self.pending = []
+        self.pending_bytes = 0
+        self.oldest_pending = 0.0
+        self.unsynced = 0
+
+
+_channels = {}
+
+
+def _channel_for(path: str) -> _LogChannel:
+    channel = _channels.get(path)
+    if channel is None:
+        channel = _channels[path] = _LogChannel(path)
+    return channel
+
+
+def flush_all_logs() -> None:
+    """Writes out and closes every open transaction log (run at interpreter exit)."""
+    for channel in list(_channels.values()):
+        _write_pending(channel, "flush", 1)
+        if channel.handle is not None:
+            channel.handle.close()
+            channel.handle = None
+
+
+atexit.register(flush_all_logs)
+
+
+def _write_pending(channel: _LogChannel, durability: str, fsync_every: int) -> None:
+    if channel.pending:
+        if channel.handle is None:
+            channel.handle = open(channel.path, "a")
+            if instrumentation.ENABLED:
+                instrumentation.record("transactionlogger.flush", file_opens=1)
+        data = "".join(channel.pending)
+        channel.handle.write(data)
+        if instrumentation.ENABLED:
+            instrumentation.record("transactionlogger.flush", calls=1, bytes_written=len(data),
+                                   records=len(channel.pending))
+        channel.unsynced += len(channel.pending)
+        channel.pending = []
+        channel.pending_bytes = 0
+    if channel.handle is None or durability == "none":
+        return
+    channel.handle.flush()
+    if durability == "fsync" and channel.unsynced >= fsync_every:
+        os.fsync(channel.handle.fileno())
+        channel.unsynced = 0
+
+
+def format_log_record(transaction_code: str, account_holder: str, account_number: str, amount: int, misc: str) -> str:
+    """Formats one CC_AAAAAAAAAA_NNNNNN_PPPPPP_MM log line (see log_transaction)."""
+    # Format the account holder's name to 10 characters (left-justified)
+    name_field = account_holder.ljust(LOG_NAME_WIDTH)[:LOG_NAME_WIDTH]
+    # Convert the account number to an integer and format as a 6-digit zero-padded string.
+    try:
+        num = int(account_number)
+    except ValueError:
+        num = 0
+    account_field = f"{num:06d}"
+    # Format the amount (in cents) as a 6-digit number.
+    amount_field = f"{amount:06d}"
+    # Format miscellaneous field to 2 characters.
+    misc_field = misc.ljust(2)[:2]
+
+    return f"{transaction_code}_{name_field}_{account_field}_{amount_field}_{misc_field}\n"
+
+
 class TransactionLogger:
-    def __init__(self, log_file: str = "transaction_log.txt"):
+    def __init__(self, log_file: str = "transaction_log.txt", max_buffer_bytes: int = 64 * 1024,
+                 max_delay: float = 1.0, durability: str = "flush", fsync_every: int = 1):
+        """
+        Records are buffered and written in groups through a file handle that
+        stays open; loggers created for the same log file share the buffer, so
+        records keep their logging order. A group is written when the buffer
+        reaches max_buffer_bytes, when the oldest buffered record is older
+        than max_delay seconds, on flush() and on end_session().
+        """
+        if durability not in DURABILITY_POLICIES:
+            raise ValueError(f"Invalid durability policy '{durability}'. Must be one of {', '.join(DURABILITY_POLICIES)}")
         self.log_file = log_file
+        self.max_buffer_bytes = max_buffer_bytes
+        self.max_delay = max_delay
+        self.durability = durability
+        self.fsync_every = fsync_every
+        self._channel = _channel_for(log_file)
 
-    def log_transaction(self, transaction_code: str, account_holder: str, account_number: str, amount: float, misc: str) -> None:
+    @instrumentation.instrumented
+    def log_transaction(self, transaction_code: str, account_holder: str, account_number: str, amount: int, misc: str) -> None:
         """
         Writes a transaction log line in the following fixed-width format:
-        
+
         CC_AAAAAAAAAA_NNNNNN_PPPPPP_MM
-        
+
         where:
           - CC is a 2-character transaction code (e.g. "01" for withdrawal)
           - AAAAAAAAAA is the account holder’s name (10 characters, left-justified)
           - NNNNNN is the bank account number (6 digits, zero-padded)
           - PPPPPP is the amount in cents (6 digits, zero-padded)
           - MM is miscellaneous info (2 characters)
+
+        The amount is given in integer cents.
         """
-        # Format the account holder's name to 10 characters (left-justified)
-        name_field = account_holder.ljust(10)[:10]
-        # Convert the account number to an integer and format as a 6-digit zero-padded string.
-        try:
-            num = int(account_number)
-        except ValueError:
-            num = 0
-        account_field = f"{num:06d}"
-        # Convert the amount (in dollars) to cents and format as a 6-digit number.
-        amount_cents = int(round(amount * 100))
-        amount_field = f"{amount_cents:06d}"
-        # Format miscellaneous field to 2 characters.
-        misc_field = misc.ljust(2)[:2]
-
-        line = f"{transaction_code}_{name_field}_{account_field}_{amount_field}_{misc_field}\n"
-        with open(self.log_file, "a") as f:
-            f.write(line)
+        self._buffer(format_log_record(transaction_code, account_holder, account_number, amount, misc))
+
+    @instrumentation.instrumented
+    def log_transactions(self, records) -> None:
+        """
+        Logs (transaction_code, account_holder, account_number, amount, misc)
+        tuples as one group: they are buffered together and written in a
+        single write, however many there are.
+        """
+        lines = [format_log_record(*record) for record in records]
+        if not lines:
+            return
+        channel = self._channel
+        if not channel.pending:
+            channel.oldest_pending = time.monotonic()
+        channel.pending.extend(lines)
+        channel.pending_bytes += sum(map(len, lines))
+        self.flush()
+
+    def _buffer(self, line: str) -> None:
+        channel = self._channel
+        now = time.monotonic()
+        if not channel.pending:
+            channel.oldest_pending = now
+        channel.pending.append(line)
+        channel.pending_bytes += len(line)
+        if (channel.pending_bytes >= self.max_buffer_bytes
+                or now - channel.oldest_pending >= self.max_delay):
+            self.flush()
+
+    def flush(self) -> None:
+        """Writes every buffered record and applies the durability policy."""
+        _write_pending(self._channel, self.durability, self.fsync_every)
+
+    def discard(self) -> int:
+        """Drops the buffered records that were not written yet and returns how many there were."""
+        channel = self._channel
+        count = len(channel.pending)
+        channel.pending = []
+        channel.pending_bytes = 0
+        return count
+
+    def close(self) -> None:
+        """Flushes buffered records and closes the log file handle."""
+        self.flush()
+        channel = self._channel
+        if channel.handle is not None:
+            if self.durability == "fsync" and channel.unsynced:
+                os.fsync(channel.handle.fileno())
+                channel.unsynced = 0
+            channel.handle.close()
+            channel.handle = None
 
     def end_session(self) -> None:
         """
         Writes an end-of-session record using transaction code "00" and prints a message.
+        Every buffered record of the session is written out and the log file is closed,
+        and the instrumentation summary is printed when BANK_INSTRUMENT is set.
         """
         # Here we use "END_OF_SE" for the account holder field (which will be truncated to 10 characters),
-        # "000000" for the account number, 0.0 for the amount, and "ES" for miscellaneous.
-        self.log_transaction("00", "END_OF_SE", "000000", 0.0, "ES")
+        # "000000" for the account number, 0 for the amount, and "ES" for miscellaneous.
+        self.log_transaction("00", "END_OF_SE", "000000", 0, "ES")
+        self.close()
         print(f"Session ended. Transaction log is available at: {self.log_file}")
+        instrumentation.dump_summary()
@@ -1,21 +1,324 @@
-from read import read_old_bank_accounts
-from write import write_new_current_accounts
+import inspect
+import instrumentation
+from accountlock import retry_on_stale
 from print_error import log_constraint_error
-from authsystem import login
-from transactionlogger import TransactionLogger
+from authsystem import capabilities, login
+from transactionlogger import TRANSFER_CREDIT, TransactionLogger
+from accountstore import get_account_store, normalize_account_number
+from money import MAX_BALANCE_CENTS, format_amount, parse_amount
 
 FILE_PATH = "currentaccounts.txt"
 
-class TransactionSystem:
+ALLOWED_COMPANIES = {
+    "The Bright Light Electric Company (EC)",
+    "Credit Card Company Q (CQ)",
+    "Fast Internet, Inc. (FI)"
+}
+
+# Allowed companies by the two-letter code in their name, the settlement
+# groups of pay_bills.
+COMPANY_CODES = {company[-3:-1]: company for company in ALLOWED_COMPANIES}
+
+# Operations accepted by submit_batch, by method name.
+BATCH_OPERATIONS = ("withdraw", "transfer", "pay_bill", "deposit", "change_plan")
+
+class _RecordBuffer:
+    """Holds the log records of a submit_batch run until its commit succeeds."""
+
     def __init__(self):
-        self.session_withdraw_total = 0.0
-        self.session_transfer_total = 0.0
-        self.session_bill_total = 0.0
-        self.logger = TransactionLogger() 
+        self.records = []
+
+    def log_transaction(self, *record) -> None:
+        self.records.append(record)
+
+    def log_transactions(self, records) -> None:
+        self.records.extend(records)
+
+class TransactionSystem:
+    def __init__(self, store=None, logger=None):
+        self.session_withdraw_total = 0
+        self.session_transfer_total = 0
+        self.session_bill_total = 0
+        self.logger = logger if logger is not None else TransactionLogger()
+        self.store = store if store is not None else get_account_store(FILE_PATH)
+        self.last_error = None
 
     def log_transaction(self, transaction_type, description):
         print(f"SUCCESS: {transaction_type}: {description}")
 
+    def _fail(self, context, message) -> bool:
+        log_constraint_error(context, message)
+        self.last_error = f"{context}: {message}"
+        return False
+
+    def _login(self, account_number, name):
+        user = login(account_number, name, active_required=True, store=self.store)
+        if user is None:
+            self.last_error = f"Authentication: Account {account_number} not found, not active or name mismatch."
+        return user
+
+    def _parse_amount(self, context, amount_str):
+        try:
+            return parse_amount(amount_str)
+        except ValueError:
+            self._fail(context, "Invalid amount entered")
+            return None
+
+    @staticmethod
+    def _valid_amount(amount) -> bool:
+        """True for a positive whole number of cents."""
+        return isinstance(amount, int) and amount > 0
+
+    # ----- Programmatic operations (amounts in integer cents) -----
+
+    @instrumentation.instrumented
+    @retry_on_stale
+    def withdraw(self, account_number: str, name: str, amount: int) -> bool:
+        """
+        Withdraws money from an account.
+          - Verifies the account holder with login().
+          - For basic accounts, cumulative withdrawals in the session cannot exceed $500.
+          - Ensures the account balance does not fall below $0.
+        """
+        if not self._valid_amount(amount):
+            return self._fail("Withdraw", "Amount must be positive")
+        user = self._login(account_number, name)
+        if user is None:
+            return False
+
+        if user.get("account_type", "basic") == "basic":
+            if self.session_withdraw_total + amount > 500_00:
+                return self._fail("Withdraw", "Exceeds maximum withdrawal limit for this session ($500.00)")
+
+        if user["balance"] < amount:
+            return self._fail("Withdraw", "Insufficient funds in account")
+
+        self.store.update(normalize_account_number(account_number), balance=user["balance"] - amount)
+        self.store.commit()
+        self.session_withdraw_total += amount
+        self.log_transaction("Withdraw", f"{format_amount(amount)} withdrawn from account {account_number}")
+        # Log the transaction with code "01" and misc "WD"
+        self.logger.log_transaction("01", name, account_number, amount, "SP")
+        return True
+
+    @instrumentation.instrumented
+    @retry_on_stale
+    def transfer(self, from_account: str, to_account: str, amount: int, name: str) -> bool:
+        """
+        Transfers money between two accounts.
+          - Verifies the source account holder with login().
+          - The destination account must exist.
+          - For basic accounts, cumulative transfers in the session cannot exceed $1000.
+          - Checks that the source account has sufficient funds.
+        """
+        if not self._valid_amount(amount):
+            return self._fail("Transfer", "Amount must be positive")
+        source_account = self._login(from_account, name)
+        if source_account is None:
+            return False
+
+        dest_account = self.store.get(normalize_account_number(to_account))
+        if dest_account is None:
+            return self._fail("Transfer", "Destination account not found")
+
+        if source_account.get("account_type", "basic") == "basic":
+            if self.session_transfer_total + amount > 1000_00:
+                return self._fail("Transfer", "Exceeds maximum transfer limit for this session ($1000.00)")
+
+        if source_account["balance"] < amount:
+            return self._fail("Transfer", "Insufficient funds in source account")
+
+        if dest_account["balance"] + amount > MAX_BALANCE_CENTS:
+            return self._fail("Transfer", "Destination balance would exceed $99999.99")
+
+        self.store.update(normalize_account_number(from_account), balance=source_account["balance"] - amount)
+        self.store.update(dest_account["account_number"], balance=dest_account["balance"] + amount)
+        self.store.commit()
+        self.session_transfer_total += amount
+        self.log_transaction("Transfer", f"{format_amount(amount)} transferred from account {from_account} to account {to_account}")
+        # Log both sides with code "02": the source debit, then the
+        # destination credit marked with misc "CR"
+        self.logger.log_transactions((("02", name, from_account, amount, "SP"),
+                                      ("02", dest_account.get("name", ""), dest_account["account_number"], amount,
+                                       TRANSFER_CREDIT)))
+        return True
+
+    @instrumentation.instrumented
+    @retry_on_stale
+    def pay_bill(self, account_number: str, name: str, company: str, amount: int) -> bool:
+        """
+        Pays a bill from an account.
+          - Verifies the account holder with login().
+          - The company must be one of the allowed companies.
+          - For basic accounts, cumulative bill payments in the session cannot exceed $2000.
+          - Checks that the account has sufficient funds.
+        """
+        if not self._valid_amount(amount):
+            return self._fail("Pay Bill", "Amount must be positive")
+        user = self._login(account_number, name)
+        if user is None:
+            return False
+
+        if company not in ALLOWED_COMPANIES:
+            return self._fail("Pay Bill", f"Invalid company. Allowed companies: {', '.join(ALLOWED_COMPANIES)}")
+
+        if user.get("account_type", "basic") == "basic":
+            if self.session_bill_total + amount > 2000_00:
+                return self._fail("Pay Bill", "Exceeds maximum bill payment limit for this session ($2000.00)")
+
+        if user["balance"] < amount:
+            return self._fail("Pay Bill", "Insufficient funds in account")
+
+        self.store.update(normalize_account_number(account_number), balance=user["balance"] - amount)
+        self.store.commit()
+        self.session_bill_total += amount
+        self.log_transaction("Pay Bill", f"Paid {format_amount(amount)} to {company} from account {account_number}")
+        # Log with code "03" and misc "PB"
+        self.logger.log_transaction("03", name, account_number, amount, "SP")
+        return True
+
+    @instrumentation.instrumented
+    @retry_on_stale
+    def deposit(self, account_number: str, name: str, amount: int) -> bool:
+        """
+        Records a deposit into an account.
+          - Verifies the account holder with login().
+          - The funds are not made available in the current session.
+        """
+        if not self._valid_amount(amount):
+            return self._fail("Deposit", "Amount must be positive")
+        if self._login(account_number, name) is None:
+            return False
+
+        self.log_transaction("Deposit", f"Recorded deposit of {format_amount(amount)} to account {account_number}. Funds will be available next session.")
+        # Log with code "04" and misc "DP"
+        self.logger.log_transaction("04", name, account_number, amount, "SP")
+        return True
+
+    @instrumentation.instrumented
+    @retry_on_stale
+    def change_plan(self, account_number: str, name: str) -> bool:
+        """
+        Changes an account's payment plan from student (SP) to non-student (NP).
+          - Verifies the account holder with login().
+          - Only allowed if the account is on a student plan (SP).
+          - Admin privileges are checked by the caller.
+        """
+        user = self._login(account_number, name)
+        if user is None:
+            return False
+
+        if user.get("account_type") != "SP":
+            return self._fail("Change Plan", "Account is not on a student plan (SP)")
+
+        self.store.update(normalize_account_number(account_number), plan="NP")
+        self.store.commit()
+        self.log_transaction("Change Plan", f"Account {account_number} payment plan changed to non-student (NP)")
+        # Log with code "08" and misc "CP"
+        self.logger.log_transaction("08", name, account_number, 0, "NP")
+        return True
+
+    @instrumentation.instrumented
+    def submit_batch(self, ops: list) -> list:
+        """
+        Validates and applies a list of operations against the loaded accounts
+        and commits them with a single write. Each operation is a dict naming
+        the method in "op" plus its keyword arguments, e.g.
+            {"op": "withdraw", "account_number": "00002", "name": "Standard", "amount": 10000}
+        Operations are applied in order, so later ones see earlier balances.
+        Returns one {"op", "success", "error"} dict per operation.
+
+        Log records and session totals only take effect once the single
+        commit succeeds. If it raises (a StaleSnapshotError with file locking
+        enabled, or a write error), the exception propagates to the caller
+        with none of the batch written or logged: the session totals are
+        restored and the store reloads the file on its next use.
+        """
+        results = []
+        totals = (self.session_withdraw_total, self.session_transfer_total, self.session_bill_total)
+        logger, self.logger = self.logger, _RecordBuffer()
+        try:
+            with self.store.deferred_commits():
+                for op in ops:
+                    params = dict(op)
+                    kind = params.pop("op", None)
+                    if kind not in BATCH_OPERATIONS:
+                        success = self._fail("Batch", f"Unknown operation '{kind}'")
+                    else:
+                        method = getattr(self, kind)
+                        try:
+                            inspect.signature(method).bind(**params)
+                        except TypeError as e:
+                            success = self._fail("Batch", f"Invalid arguments for {kind}: {e}")
+                        else:
+                            success = method(**params)
+                    results.append({"op": op, "success": success, "error": None if success else self.last_error})
+        except BaseException:
+            self.store.invalidate()
+            self.session_withdraw_total, self.session_transfer_total, self.session_bill_total = totals
+            raise
+        finally:
+            buffer, self.logger = self.logger, logger
+        self.logger.log_transactions(buffer.records)
+        return results
+
+    @instrumentation.instrumented
+    @retry_on_stale
+    def pay_bills(self, payments) -> dict:
+        """
+        Batch bill-payment run. Each payment is a {"account_number", "name",
+        "company", "amount"} dict, the company given by its code (EC, CQ, FI)
+        or full name. Payments are checked in order against balances held in
+        memory, as pay_bill would check them one by one: the holder must match
+        an active account, and a basic account's payment cannot take the
+        session's bill total past the $2000 limit. Failing payments are
+        reported and skipped; all accepted debits are committed at once and
+        their "03" records logged as one group.
+
+        Returns {"paid": count, "rejected": [(payment number, error)],
+        "settlement": {code: {"count", "total"}}} with totals in cents.
+        The session total only changes once the commit succeeded; a stale
+        snapshot reloads the store and reruns the whole batch.
+        """
+        settlement = {code: {"count": 0, "total": 0} for code in sorted(COMPANY_CODES)}
+        session_total = self.session_bill_total
+        records = []
+        rejected = []
+        for index, payment in enumerate(payments, 1):
+            key = normalize_account_number(payment["account_number"])
+            acc = self.store.get(key)
+            company = payment["company"]
+            code = next((code for code, full_name in COMPANY_CODES.items() if company in (code, full_name)), None)
+            amount = payment["amount"]
+            if acc is None or acc["name"] != payment["name"] or acc["status"] != "A":
+                problem = f"Account {payment['account_number']} not found, not active or name mismatch."
+            elif code is None:
+                problem = f"Invalid company '{company}'. Allowed companies: {', '.join(sorted(COMPANY_CODES))}"
+            elif not self._valid_amount(amount):
+                problem = "Amount must be positive"
+            elif not capabilities(key, self.store).is_admin and session_total + amount > 2000_00:
+                problem = "Exceeds maximum bill payment limit for this session ($2000.00)"
+            elif acc["balance"] < amount:
+                problem = "Insufficient funds in account"
+            else:
+                problem = None
+            if problem is not None:
+                self._fail("Pay Bills", f"Payment {index}: {problem}")
+                rejected.append((index, self.last_error))
+                continue
+            self.store.update(key, balance=acc["balance"] - amount)
+            session_total += amount
+            settlement[code]["count"] += 1
+            settlement[code]["total"] += amount
+            records.append(("03", payment["name"], payment["account_number"], amount, "SP"))
+        self.store.commit()
+        self.session_bill_total = session_total
+        self.log_transaction("Pay Bills", f"{len(records)} bills paid, {len(rejected)} rejected.")
+        self.logger.log_transactions(records)
+        return {"paid": len(records), "rejected": rejected, "settlement": settlement}
+
+    # ----- Interactive wrappers -----
+
     def interactive_withdraw(self) -> bool:
         """
         Withdraw money from an account.
@@ -27,43 +330,16 @@ class TransactionSystem:
         """
         print("=== Withdraw Money ===")
         admin_input = input("Are you logged in as admin? (y/n): ").strip().lower()
-        holder_name = (input("Enter the account holder's name: ").strip() 
+        holder_name = (input("Enter the account holder's name: ").strip()
                        if admin_input == 'y' else input("Enter your name: ").strip())
         account_number = input("Enter the account number: ").strip()
-        matching_account = login(account_number, holder_name, active_required=True)
-        if matching_account is None:
-            return False
-
-        amount_str = input("Enter the amount to withdraw: ").strip()
-        try:
-            amount = float(amount_str)
-        except ValueError:
-            log_constraint_error("Withdraw", "Invalid amount entered")
+        if self._login(account_number, holder_name) is None:
             return False
 
-        if matching_account.get("account_type", "basic") == "basic":
-            if self.session_withdraw_total + amount > 500.00:
-                log_constraint_error("Withdraw", "Exceeds maximum withdrawal limit for this session ($500.00)")
-                return False
-
-        if matching_account["balance"] < amount:
-            log_constraint_error("Withdraw", "Insufficient funds in account")
+        amount = self._parse_amount("Withdraw", input("Enter the amount to withdraw: ").strip())
+        if amount is None:
             return False
-
-        matching_account["balance"] -= amount
-        # Re-read full accounts list and update the balance for persistence.
-        accounts = read_old_bank_accounts(FILE_PATH)
-        normalized = account_number.lstrip('0') or '0'
-        for acc in accounts:
-            if acc["account_number"] == normalized:
-                acc["balance"] = matching_account["balance"]
-                break
-        write_new_current_accounts(accounts, FILE_PATH)
-        self.session_withdraw_total += amount
-        self.log_transaction("Withdraw", f"{amount} withdrawn from account {account_number}")
-        # Log the transaction with code "01" and misc "WD"
-        self.logger.log_transaction("01", holder_name, account_number, amount, "SP")
-        return True
+        return self.withdraw(account_number, holder_name, amount)
 
     def interactive_transfer(self) -> bool:
         """
@@ -79,45 +355,17 @@ class TransactionSystem:
         holder_name = (input("Enter the account holder's name (for the source account): ").strip()
                        if admin_input == 'y' else input("Enter your name: ").strip())
         from_account = input("Enter the source account number: ").strip()
-        source_account = login(from_account, holder_name, active_required=True)
-        if source_account is None:
+        if self._login(from_account, holder_name) is None:
             return False
 
         to_account = input("Enter the destination account number: ").strip()
-        accounts = read_old_bank_accounts(FILE_PATH)
-        dest_account = None
-        for acc in accounts:
-            if acc["account_number"] == to_account:
-                dest_account = acc
-                break
-        if dest_account is None:
-            log_constraint_error("Transfer", "Destination account not found")
-            return False
+        if self.store.get(normalize_account_number(to_account)) is None:
+            return self._fail("Transfer", "Destination account not found")
 
-        amount_str = input("Enter the amount to transfer: ").strip()
-        try:
-            amount = float(amount_str)
-        except ValueError:
-            log_constraint_error("Transfer", "Invalid amount entered")
-            return False
-
-        if source_account.get("account_type", "basic") == "basic":
-            if self.session_transfer_total + amount > 1000.00:
-                log_constraint_error("Transfer", "Exceeds maximum transfer limit for this session ($1000.00)")
-                return False
-
-        if source_account["balance"] < amount:
-            log_constraint_error("Transfer", "Insufficient funds in source account")
+        amount = self._parse_amount("Transfer", input("Enter the amount to transfer: ").strip())
+        if amount is None:
             return False
-
-        source_account["balance"] -= amount
-        dest_account["balance"] += amount
-        write_new_current_accounts(accounts, FILE_PATH)
-        self.session_transfer_total += amount
-        self.log_transaction("Transfer", f"{amount} transferred from account {from_account} to account {to_account}")
-        # Log the transaction with code "02" and misc "TR"
-        self.logger.log_transaction("02", holder_name, from_account, amount, "SP")
-        return True
+        return self.transfer(from_account, to_account, amount, holder_name)
 
     def interactive_pay_bill(self) -> bool:
         """
@@ -133,49 +381,17 @@ class TransactionSystem:
         holder_name = (input("Enter the account holder's name: ").strip()
                        if admin_input == 'y' else input("Enter your name: ").strip())
         account_number = input("Enter the account number: ").strip()
-        matching_account = login(account_number, holder_name, active_required=True)
-        if matching_account is None:
+        if self._login(account_number, holder_name) is None:
             return False
 
         company = input("Enter the company to whom the bill is being paid: ").strip()
-        allowed_companies = {
-            "The Bright Light Electric Company (EC)",
-            "Credit Card Company Q (CQ)",
-            "Fast Internet, Inc. (FI)"
-        }
-        if company not in allowed_companies:
-            log_constraint_error("Pay Bill", f"Invalid company. Allowed companies: {', '.join(allowed_companies)}")
-            return False
-
-        amount_str = input("Enter the amount to pay: ").strip()
-        try:
-            amount = float(amount_str)
-        except ValueError:
-            log_constraint_error("Pay Bill", "Invalid amount entered")
-            return False
+        if company not in ALLOWED_COMPANIES:
+            return self._fail("Pay Bill", f"Invalid company. Allowed companies: {', '.join(ALLOWED_COMPANIES)}")
 
-        if matching_account.get("account_type", "basic") == "basic":
-            if self.session_bill_total + amount > 2000.00:
-                log_constraint_error("Pay Bill", "Exceeds maximum bill payment limit for this session ($2000.00)")
-                return False
-
-        if matching_account["balance"] < amount:
-            log_constraint_error("Pay Bill", "Insufficient funds in account")
+        amount = self._parse_amount("Pay Bill", input("Enter the amount to pay: ").strip())
+        if amount is None:
             return False
-
-        matching_account["balance"] -= amount
-        accounts = read_old_bank_accounts(FILE_PATH)
-        normalized = account_number.lstrip('0') or '0'
-        for acc in accounts:
-            if acc["account_number"] == normalized:
-                acc["balance"] = matching_account["balance"]
-                break
-        write_new_current_accounts(accounts, FILE_PATH)
-        self.session_bill_total += amount
-        self.log_transaction("Pay Bill", f"Paid {amount} to {company} from account {account_number}")
-        # Log with code "03" and misc "PB"
-        self.logger.log_transaction("03", holder_name, account_number, amount, "SP")
-        return True
+        return self.pay_bill(account_number, holder_name, company, amount)
 
     def interactive_deposit(self) -> bool:
         """
@@ -190,21 +406,13 @@ class TransactionSystem:
         holder_name = (input("Enter the account holder's name: ").strip()
                        if admin_input == 'y' else input("Enter your name: ").strip())
         account_number = input("Enter the account number: ").strip()
-        matching_account = login(account_number, holder_name, active_required=True)
-        if matching_account is None:
+        if self._login(account_number, holder_name) is None:
             return False
 
-        amount_str = input("Enter the amount to deposit: ").strip()
-        try:
-            amount = float(amount_str)
-        except ValueError:
-            log_constraint_error("Deposit", "Invalid amount entered")
+        amount = self._parse_amount("Deposit", input("Enter the amount to deposit: ").strip())
+        if amount is None:
             return False
-
-        self.log_transaction("Deposit", f"Recorded deposit of {amount} to account {account_number}. Funds will be available next session.")
-        # Log with code "04" and misc "DP"
-        self.logger.log_transaction("04", holder_name, account_number, amount, "SP")
-        return True
+        return self.deposit(account_number, holder_name, amount)
 
     def interactive_change_plan(self) -> bool:
         """
@@ -216,28 +424,8 @@ class TransactionSystem:
         """
         print("=== Change Transaction Payment Plan ===")
         if input("Are you logged in as admin? (y/n): ").strip().lower() != 'y':
-            log_constraint_error("Change Plan", "Change plan transaction requires admin privileges")
-            return False
+            return self._fail("Change Plan", "Change plan transaction requires admin privileges")
 
         holder_name = input("Enter the account holder's name: ").strip()
         account_number = input("Enter the account number: ").strip()
-        matching_account = login(account_number, holder_name, active_required=True)
-        if matching_account is None:
-            return False
-
-        if matching_account.get("account_type") != "SP":
-            log_constraint_error("Change Plan", "Account is not on a student plan (SP)")
-            return False
-
-        matching_account["account_type"] = "NP"
-        accounts = read_old_bank_accounts(FILE_PATH)
-        normalized = account_number.lstrip('0') or '0'
-        for acc in accounts:
-            if acc["account_number"] == normalized:
-                acc["account_type"] = "NP"
-                break
-        write_new_current_accounts(accounts, FILE_PATH)
-        self.log_transaction("Change Plan", f"Account {account_number} payment plan changed to non-student (NP)")
-        # Log with code "08" and misc "CP"
-        self.logger.log_transaction("08", holder_name, account_number, 0.0, "NP")
-        return True
+        return self.change_plan(account_number, holder_name)
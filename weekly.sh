@@ -1,19 +1,28 @@
 #!/usr/bin/env bash
 set -euo pipefail
 
+# End-of-day accounts are archived as a base snapshot plus daily deltas
+rm -rf accounts_archive
+
 for day in {1..7}; do
   echo
   echo "########## Day $day ##########"
   ./daily.sh
 
   # Archive this day’s end‑of‑day accounts and merged transactions
-  cp currentaccounts.txt               currentaccounts_day${day}.txt
+  python3 archive.py add ${day} currentaccounts.txt
   cp merged_daily_transactions.txt merged_transactions_day${day}.txt
 
+  # Close the day: aggregate its transactions into merged_transactions_dayN.txt.rollup
+  python3 rollup.py merged_transactions_day${day}.txt > /dev/null
+
   echo "Archived Day $day →"
-  echo "  currentaccounts_day${day}.txt"
+  echo "  accounts_archive (day ${day})"
   echo "  merged_transactions_day${day}.txt"
 done
 
+echo
+echo "=== Weekly summary ==="
+python3 rollup.py --last 7 merged_transactions_day*.txt
 echo
 echo "=== Weekly run (7 days) complete ==="
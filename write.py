@@ -1,46 +1,88 @@
-def write_new_current_accounts(accounts, file_path):
+import contextlib
+import os
+import instrumentation
+import accountcache
+from money import MAX_BALANCE_CENTS, format_amount, format_balance_field
+
+END_OF_FILE_LINE = "00000 END_OF_FILE          A 00000.00 0000 NP\n"
+
+def format_account_line(acc):
+    """
+    Validates one account record and returns its 45-character line (with newline)
+    Format: NNNNN AAAAAAAAAAAAAAAAAAAA S PPPPPPPP TTTT PP
+    """
+    # Validate account number
+    if not isinstance(acc['account_number'], str) or not acc['account_number'].isdigit():
+        raise ValueError(f"Account number must be numeric string, got {acc['account_number']}")
+    if len(acc['account_number']) > 5:
+        raise ValueError(f"Account number exceeds 5 digits: {acc['account_number']}")
+
+    # Validate name
+    if len(acc['name']) > 20:
+        raise ValueError(f"Account name exceeds 20 characters: {acc['name']}")
+
+    # Validate status
+    if acc['status'] not in ('A', 'D'):
+        raise ValueError(f"Invalid status '{acc['status']}'. Must be 'A' or 'D'")
+
+    # Validate balance with explicit negative check
+    if not isinstance(acc['balance'], int):
+        raise ValueError(f"Balance must be integer cents, got {type(acc['balance'])}")
+    if acc['balance'] < 0:
+        raise ValueError(f"Negative balance detected: {format_amount(acc['balance'])}")
+    if acc['balance'] > MAX_BALANCE_CENTS:
+        raise ValueError(f"Balance exceeds maximum $99999.99: {format_amount(acc['balance'])}")
+
+    # Validate plan type
+    plan = acc.get('plan', 'NP')
+    if plan not in ('SP', 'NP'):
+        raise ValueError(f"Invalid plan type '{plan}'. Must be SP or NP")
+
+    # Format fields
+    acc_num = acc['account_number'].zfill(5)
+    name    = acc['name'].ljust(20)[:20]
+    balance = format_balance_field(acc['balance'])
+    txns    = f"{acc.get('total_transactions', 0):04d}"
+
+    # Line is 45 chars total
+    return f"{acc_num} {name} {acc['status']} {balance} {txns} {plan}\n"
+
+@instrumentation.instrumented
+def write_new_current_accounts(accounts, file_path, line_cache=None):
     """
     Writes Current Bank Accounts File with strict validation
     Format: NNNNN AAAAAAAAAAAAAAAAAAAA S PPPPPPPP TT
     Where TT is account plan (SP or NP)
+
+    line_cache, if given, maps account number to the already validated line
+    of that record; cached records are written as is and newly formatted
+    lines are added to it. The caller drops the entries of changed records.
+    The parsed snapshot accountcache may hold for the file is dropped.
+
+    The lines go to <file>.tmp, which replaces the file by rename once it is
+    complete, so a record failing validation leaves the old file intact.
     """
-    with open(file_path, 'w') as file:
-        for acc in accounts:
-            # Validate account number
-            if not isinstance(acc['account_number'], str) or not acc['account_number'].isdigit():
-                raise ValueError(f"Account number must be numeric string, got {acc['account_number']}")
-            if len(acc['account_number']) > 5:
-                raise ValueError(f"Account number exceeds 5 digits: {acc['account_number']}")
-
-            # Validate name
-            if len(acc['name']) > 20:
-                raise ValueError(f"Account name exceeds 20 characters: {acc['name']}")
-
-            # Validate status
-            if acc['status'] not in ('A', 'D'):
-                raise ValueError(f"Invalid status '{acc['status']}'. Must be 'A' or 'D'")
-
-            # Validate balance with explicit negative check
-            if not isinstance(acc['balance'], (int, float)):
-                raise ValueError(f"Balance must be numeric, got {type(acc['balance'])}")
-            if acc['balance'] < 0:
-                raise ValueError(f"Negative balance detected: {acc['balance']}")
-            if acc['balance'] > 99999.99:
-                raise ValueError(f"Balance exceeds maximum $99999.99: {acc['balance']}")
-
-            # Validate plan type
-            plan = acc.get('plan', 'NP')
-            if plan not in ('SP', 'NP'):
-                raise ValueError(f"Invalid plan type '{plan}'. Must be SP or NP")
-
-            # Format fields
-            acc_num = acc['account_number'].zfill(5)
-            name    = acc['name'].ljust(20)[:20]
-            balance = f"{acc['balance']:08.2f}"
-            txns    = f"{acc.get('total_transactions', 0):04d}"
-
-            # Write line (45 chars total)
-            file.write(f"{acc_num} {name} {acc['status']} {balance} {txns} {plan}\n")
-        
-        # Add END_OF_FILE marker (now exactly 45 chars)
-        file.write("00000 END_OF_FILE          A 00000.00 0000 NP\n")
+    accountcache.invalidate(file_path)
+    temp_path = f"{file_path}.tmp"
+    try:
+        with open(temp_path, 'w') as file:
+            for acc in accounts:
+                if line_cache is None:
+                    file.write(format_account_line(acc))
+                    continue
+                line = line_cache.get(acc['account_number'])
+                if line is None:
+                    line = line_cache[acc['account_number']] = format_account_line(acc)
+                file.write(line)
+
+            # Add END_OF_FILE marker (now exactly 45 chars)
+            file.write(END_OF_FILE_LINE)
+
+            if instrumentation.ENABLED:
+                instrumentation.record("write.write_new_current_accounts", bytes_written=file.tell(),
+                                       file_opens=1, records=len(accounts))
+    except BaseException:
+        with contextlib.suppress(FileNotFoundError):
+            os.remove(temp_path)
+        raise
+    os.replace(temp_path, file_path)